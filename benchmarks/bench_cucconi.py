@@ -0,0 +1,153 @@
+import numpy as np
+
+from nonparstat.Cucconi import cucconi_multisample_test, cucconi_test, cucconi_test_counts
+from nonparstat.Pairwise import cucconi_pairwise
+from nonparstat.Power import simulate_power
+
+
+def _samples(sizes, rounded, seed=0):
+    # rounded observations make ties frequent, so the tie handling is exercised
+    rng = np.random.default_rng(seed)
+    samples = [rng.normal(loc=0, scale=1 + 0.1 * k, size=size) for k, size in enumerate(sizes)]
+    return [np.round(sample, 1) for sample in samples] if rounded else samples
+
+
+class CucconiResampling:
+    """Resampled p-values of the two-sample test across sample sizes, methods and tie handling."""
+    params = ([100, 1000, 10000], ['bootstrap', 'permutation'], ['average', 'ordinal'])
+    param_names = ['size', 'method', 'ties']
+    timeout = 300
+
+    def setup(self, size, method, ties):
+        self.a, self.b = _samples([size, size], rounded=True)
+
+    def time_cucconi_test(self, size, method, ties):
+        cucconi_test(self.a, self.b, method=method, ties=ties, random_state=0)
+
+    def peakmem_cucconi_test(self, size, method, ties):
+        cucconi_test(self.a, self.b, method=method, ties=ties, random_state=0)
+
+
+class CucconiReplications:
+    """Scaling of the resampling engine with the number of replications and parallel jobs."""
+    params = ([1000, 10000, 100000], [1, 2, -1])
+    param_names = ['replications', 'n_jobs']
+    timeout = 300
+
+    def setup(self, replications, n_jobs):
+        self.a, self.b = _samples([500, 500], rounded=False)
+
+    def time_cucconi_test(self, replications, n_jobs):
+        cucconi_test(self.a, self.b, method='permutation', replications=replications, n_jobs=n_jobs, random_state=0)
+
+    def peakmem_cucconi_test(self, replications, n_jobs):
+        cucconi_test(self.a, self.b, method='permutation', replications=replications, n_jobs=n_jobs, random_state=0)
+
+
+class CucconiAnalytic:
+    """P-values computed without resampling."""
+    params = (['exact', 'asymptotic'], [8, 10, 1000000])
+    param_names = ['method', 'size']
+
+    def setup(self, method, size):
+        if (method == 'exact') != (size < 100):
+            raise NotImplementedError
+        self.a, self.b = _samples([size, size], rounded=False)
+
+    def time_cucconi_test(self, method, size):
+        cucconi_test(self.a, self.b, method=method)
+
+    def peakmem_cucconi_test(self, method, size):
+        cucconi_test(self.a, self.b, method=method)
+
+
+class CucconiMultisample:
+    """Resampled p-values of the multisample test across the number of groups and their sizes."""
+    params = ([2, 5, 10], [100, 1000], ['bootstrap', 'permutation'], ['average', 'ordinal'])
+    param_names = ['groups', 'size', 'method', 'ties']
+    timeout = 300
+
+    def setup(self, groups, size, method, ties):
+        self.samples = _samples([size] * groups, rounded=True)
+
+    def time_cucconi_multisample_test(self, groups, size, method, ties):
+        cucconi_multisample_test(self.samples, method=method, ties=ties, random_state=0)
+
+    def peakmem_cucconi_multisample_test(self, groups, size, method, ties):
+        cucconi_multisample_test(self.samples, method=method, ties=ties, random_state=0)
+
+
+class CucconiManyGroups:
+    """Multisample test on thousands of small groups given as one vector with offsets."""
+    params = ([1000, 5000], ['asymptotic', 'permutation'])
+    param_names = ['groups', 'method']
+    timeout = 300
+
+    def setup(self, groups, method):
+        self.data = np.concatenate(_samples([20] * groups, rounded=False))
+        self.offsets = np.arange(0, self.data.size, 20)
+
+    def time_cucconi_multisample_test(self, groups, method):
+        cucconi_multisample_test(self.data, offsets=self.offsets, method=method, replications=100, random_state=0)
+
+    def peakmem_cucconi_multisample_test(self, groups, method):
+        cucconi_multisample_test(self.data, offsets=self.offsets, method=method, replications=100, random_state=0)
+
+
+class CucconiPairwise:
+    """All-pairs comparisons of 50 groups, with equal sizes sharing a single null and with distinct sizes."""
+    params = ([True, False], ['bootstrap', 'permutation'])
+    param_names = ['equal_sizes', 'method']
+    timeout = 300
+
+    def setup(self, equal_sizes, method):
+        sizes = [100] * 50 if equal_sizes else list(range(80, 130))
+        self.samples = _samples(sizes, rounded=False)
+
+    def time_cucconi_pairwise(self, equal_sizes, method):
+        cucconi_pairwise(self.samples, method=method, random_state=0)
+
+    def peakmem_cucconi_pairwise(self, equal_sizes, method):
+        cucconi_pairwise(self.samples, method=method, random_state=0)
+
+
+class PowerSimulation:
+    """Power of the Cucconi and Podgor-Gastwirth tests over a grid of 5 shifts and 3 scales."""
+    params = ([20, 100], ['asymptotic', 'permutation'])
+    param_names = ['size', 'method']
+    timeout = 300
+
+    def time_simulate_power(self, size, method):
+        simulate_power(sizes=[size], shifts=np.linspace(0, 1, 5), scales=[1, 1.5, 2], method=method, random_state=0)
+
+    def peakmem_simulate_power(self, size, method):
+        simulate_power(sizes=[size], shifts=np.linspace(0, 1, 5), scales=[1, 1.5, 2], method=method, random_state=0)
+
+
+class CucconiCounts:
+    """Integer data with a few hundred distinct values, as observations and as counts of the distinct values."""
+    params = ([10 ** 4, 10 ** 6], ['observations', 'counts'])
+    param_names = ['size', 'input']
+    timeout = 300
+
+    def setup(self, size, input):
+        if input == 'observations' and size > 10 ** 4:
+            raise NotImplementedError
+        rng = np.random.default_rng(0)
+        self.a = rng.poisson(lam=200, size=size)
+        self.b = rng.poisson(lam=200, size=size)
+        self.values = np.arange(max(self.a.max(), self.b.max()) + 1)
+        self.counts_a = np.bincount(self.a, minlength=len(self.values))
+        self.counts_b = np.bincount(self.b, minlength=len(self.values))
+
+    def _test(self, input):
+        if input == 'counts':
+            cucconi_test_counts(self.values, self.counts_a, self.counts_b, method='permutation', random_state=0)
+        else:
+            cucconi_test(self.a, self.b, method='permutation', random_state=0)
+
+    def time_cucconi_test(self, size, input):
+        self._test(input)
+
+    def peakmem_cucconi_test(self, size, input):
+        self._test(input)
@@ -0,0 +1,40 @@
+import numpy as np
+
+from nonparstat.Lepage import lepage_test
+from nonparstat.Panel import location_scale_panel
+
+
+class Lepage:
+    """P-values of the Lepage test across sample sizes and methods."""
+    params = ([10, 20, 1000], ['exact', 'permutation', 'asymptotic'])
+    param_names = ['size', 'method']
+
+    def setup(self, size, method):
+        if method == 'exact' and size > 10:
+            raise NotImplementedError
+        rng = np.random.default_rng(0)
+        self.a = rng.normal(loc=0, scale=1, size=size)
+        self.b = rng.normal(loc=0, scale=1.1, size=size)
+
+    def time_lepage_test(self, size, method):
+        lepage_test(self.a, self.b, method=method, random_state=0)
+
+    def peakmem_lepage_test(self, size, method):
+        lepage_test(self.a, self.b, method=method, random_state=0)
+
+
+class LocationScalePanel:
+    """All location-scale tests on shared permutations."""
+    params = ([100, 1000], [1000, 10000])
+    param_names = ['size', 'replications']
+
+    def setup(self, size, replications):
+        rng = np.random.default_rng(0)
+        self.a = rng.normal(loc=0, scale=1, size=size)
+        self.b = rng.normal(loc=0, scale=1.1, size=size)
+
+    def time_location_scale_panel(self, size, replications):
+        location_scale_panel(self.a, self.b, replications=replications, random_state=0)
+
+    def peakmem_location_scale_panel(self, size, replications):
+        location_scale_panel(self.a, self.b, replications=replications, random_state=0)
@@ -0,0 +1,37 @@
+import numpy as np
+
+from nonparstat.PodgorGastwirth import podgor_gastwirth_test, podgor_gastwirth_test_batch
+
+
+class PodgorGastwirth:
+    """Single test across sample sizes and tie handling."""
+    params = ([100, 10000, 1000000], ['average', 'ordinal'])
+    param_names = ['size', 'ties']
+
+    def setup(self, size, ties):
+        rng = np.random.default_rng(0)
+        self.a = np.round(rng.normal(loc=0, scale=1, size=size), 1)
+        self.b = np.round(rng.normal(loc=0, scale=1.1, size=size), 1)
+
+    def time_podgor_gastwirth_test(self, size, ties):
+        podgor_gastwirth_test(self.a, self.b, ties=ties)
+
+    def peakmem_podgor_gastwirth_test(self, size, ties):
+        podgor_gastwirth_test(self.a, self.b, ties=ties)
+
+
+class PodgorGastwirthBatch:
+    """Many small tests at once."""
+    params = ([100, 10000], [None, 1000])
+    param_names = ['tests', 'chunk_size']
+
+    def setup(self, tests, chunk_size):
+        rng = np.random.default_rng(0)
+        self.a = rng.normal(loc=0, scale=1, size=(tests, 50))
+        self.b = rng.normal(loc=0, scale=1.1, size=(tests, 50))
+
+    def time_podgor_gastwirth_test_batch(self, tests, chunk_size):
+        podgor_gastwirth_test_batch(self.a, self.b, chunk_size=chunk_size)
+
+    def peakmem_podgor_gastwirth_test_batch(self, tests, chunk_size):
+        podgor_gastwirth_test_batch(self.a, self.b, chunk_size=chunk_size)
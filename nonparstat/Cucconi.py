@@ -1,12 +1,70 @@
+import os
 from collections import namedtuple
+from typing import Callable, Optional, Union
 
 import numpy as np
 import numpy.typing as npt
-from joblib import Parallel, delayed
-from scipy.stats import rankdata
+from scipy.stats import chi2, rankdata
 
-CucconiResult = namedtuple('CucconiResult', ('statistic', 'pvalue'))
-CucconiMultisampleResult = namedtuple('CucconiMultisampleResult', ('statistic', 'pvalue'))
+from nonparstat.Diagnostics import Diagnostics, _attach_diagnostics, _phase, _start_diagnostics
+from nonparstat.NullDistribution import NullDistribution, cached_null_distribution
+from nonparstat.Ranking import (_frequency_rank_sums, _frequency_ranks, _frequency_table, _rankdata_rows,
+                                _has_ties)
+from nonparstat.Resampling import (RandomState, _pooled_ranks, _permuted_ranks, _random_choices,
+                                   _random_hypergeometric_counts, _random_multinomial_counts,
+                                   _random_permutations, _random_subsets, _resample, _seed_sequence,
+                                   _sequential_pvalue, _ASYMPTOTIC_MIN_SIZE, _EXACT_STATES, _exact_states,
+                                   _exact_subset_sums)
+
+
+class CucconiResult(namedtuple('CucconiResult', ('statistic', 'pvalue'))):
+    """
+    Namedtuple with the test statistic value and the p-value of the Cucconi test.
+
+    Attributes:
+        replications (int): number of replications the p-value is based on, lower than requested
+            if a sequential test stopped early
+        diagnostics (Diagnostics): timing breakdown of the test if requested or if a hook is registered
+    """
+    replications = None
+    diagnostics = None
+
+    def __new__(cls, statistic, pvalue, replications=None):
+        result = super().__new__(cls, statistic, pvalue)
+        result.replications = replications
+        return result
+
+
+class CucconiMultisampleResult(namedtuple('CucconiMultisampleResult', ('statistic', 'pvalue'))):
+    """
+    Namedtuple with the test statistic value and the p-value of the multisample Cucconi test.
+
+    Attributes:
+        replications (int): number of replications the p-value is based on, lower than requested
+            if a sequential test stopped early
+        diagnostics (Diagnostics): timing breakdown of the test if requested or if a hook is registered
+    """
+    replications = None
+    diagnostics = None
+
+    def __new__(cls, statistic, pvalue, replications=None):
+        result = super().__new__(cls, statistic, pvalue)
+        result.replications = replications
+        return result
+
+
+def _cucconi_statistic_from_sums(sum_sq: npt.ArrayLike, sum_rev_sq: npt.ArrayLike, n1: int,
+                                 n2: int) -> npt.ArrayLike:
+    n = n1 + n2
+
+    rho = 2 * (n ** 2 - 4) / ((2 * n + 1) * (8 * n + 11)) - 1
+    U = (6 * sum_sq - n1 * (n + 1) * (2 * n + 1)) / np.sqrt(
+        n1 * n2 * (n + 1) * (2 * n + 1) * (8 * n + 11) / 5)
+    V = (6 * sum_rev_sq - n1 * (n + 1) * (2 * n + 1)) / np.sqrt(
+        n1 * n2 * (n + 1) * (2 * n + 1) * (8 * n + 11) / 5)
+    C = (U ** 2 + V ** 2 - 2 * rho * U * V) / 2 * (1 - rho ** 2)
+
+    return C
 
 
 def _cucconi_test_statistic(a: npt.NDArray, b: npt.NDArray, ties: str = 'average') -> float:
@@ -17,67 +75,227 @@ def _cucconi_test_statistic(a: npt.NDArray, b: npt.NDArray, ties: str = 'average
     ranked = rankdata(alldata, method=ties)
     a_ranks = ranked[:n1]
 
-    rho = 2 * (n ** 2 - 4) / ((2 * n + 1) * (8 * n + 11)) - 1
-    U = (6 * np.sum(np.square(a_ranks)) - n1 * (n + 1) * (2 * n + 1)) / np.sqrt(
-        n1 * n2 * (n + 1) * (2 * n + 1) * (8 * n + 11) / 5)
-    V = (6 * np.sum(np.square(n + 1 - a_ranks)) - n1 * (n + 1) * (2 * n + 1)) / np.sqrt(
-        n1 * n2 * (n + 1) * (2 * n + 1) * (8 * n + 11) / 5)
-    C = (U ** 2 + V ** 2 - 2 * rho * U * V) / 2 * (1 - rho ** 2)
+    return _cucconi_statistic_from_sums(np.sum(np.square(a_ranks)), np.sum(np.square(n + 1 - a_ranks)), n1, n2)
 
-    return C
 
+def _cucconi_statistics_from_ranks(a_ranks: npt.NDArray, n: int) -> npt.NDArray:
+    n1 = a_ranks.shape[1]
+    return _cucconi_statistic_from_sums(np.sum(np.square(a_ranks), axis=1),
+                                        np.sum(np.square(n + 1 - a_ranks), axis=1), n1, n - n1)
 
-def _cucconi_dist_permutation(a: npt.NDArray, b: npt.NDArray, replications: int = 1000,
-                              ties: str = 'average', n_jobs: int = 1) -> npt.NDArray:
+
+def _cucconi_permuted_statistics(ranked: npt.NDArray, codes: Optional[npt.NDArray], n1: int,
+                                 indices: npt.NDArray) -> npt.NDArray:
+    if codes is None:
+        a_ranks = ranked[indices[:, :n1]]
+    else:
+        a_ranks = _permuted_ranks(ranked, codes, indices)[:, :n1]
+    return _cucconi_statistics_from_ranks(a_ranks, len(ranked))
+
+
+def _cucconi_permutation_tests(a: npt.NDArray, b: npt.NDArray,
+                               ties: str = 'average') -> Callable[[np.random.Generator, int], npt.NDArray]:
+    n1 = len(a)
+    n = n1 + len(b)
+    ranked, codes = _pooled_ranks(np.concatenate([a, b]), ties=ties)
+
+    def permuted_tests(rng, size):
+        if codes is None:
+            indices = _random_subsets(rng, n, n1, size)
+        else:
+            indices = _random_permutations(rng, n, size)
+        return _cucconi_permuted_statistics(ranked, codes, n1, indices)
+
+    return permuted_tests
+
+
+def _cucconi_bootstrap_tests(a: npt.NDArray, b: npt.NDArray,
+                             ties: str = 'average') -> Callable[[np.random.Generator, int], npt.NDArray]:
     n1 = len(a)
+    n = n1 + len(b)
     h0_data = np.concatenate([a, b])
 
-    def permuted_test():
-        permuted_data = np.random.permutation(h0_data)
-        new_a = permuted_data[:n1]
-        new_b = permuted_data[n1:]
-        return _cucconi_test_statistic(a=new_a, b=new_b, ties=ties)
+    def bootstrap_tests(rng, size):
+        ranked = _rankdata_rows(h0_data[_random_choices(rng, n, n, size)], method=ties)
+        return _cucconi_statistics_from_ranks(ranked[:, :n1], n)
 
-    return np.sort(
-        Parallel(n_jobs=n_jobs)(delayed(permuted_test)() for _ in range(replications)))
+    return bootstrap_tests
+
+
+def _cucconi_dist(tests: Callable[[], Callable[[np.random.Generator, int], npt.NDArray]], replications: int,
+                  row_size: int, n_jobs: int = 1, random_state: RandomState = None,
+                  diagnostics: Optional[Diagnostics] = None,
+                  progress: Optional[Callable[[int, int], None]] = None) -> npt.NDArray:
+    with _phase(diagnostics, 'ranking'):
+        statistics = tests()
+    with _phase(diagnostics, 'resampling'):
+        h0_statistics = _resample(statistics, replications=replications, row_size=row_size, n_jobs=n_jobs,
+                                  random_state=random_state, diagnostics=diagnostics, progress=progress)
+    with _phase(diagnostics, 'pvalue'):
+        return np.sort(h0_statistics)
+
+
+def _cucconi_dist_permutation(a: npt.NDArray, b: npt.NDArray, replications: int = 1000,
+                              ties: str = 'average', n_jobs: int = 1, random_state: RandomState = None,
+                              diagnostics: Optional[Diagnostics] = None,
+                              progress: Optional[Callable[[int, int], None]] = None) -> npt.NDArray:
+    return _cucconi_dist(lambda: _cucconi_permutation_tests(a, b, ties=ties), replications=replications,
+                         row_size=len(a) + len(b), n_jobs=n_jobs, random_state=random_state,
+                         diagnostics=diagnostics, progress=progress)
 
 
 def _cucconi_dist_bootstrap(a: npt.NDArray, b: npt.NDArray, replications: int = 1000,
-                            ties: str = 'average', n_jobs: int = 1) -> npt.NDArray:
+                            ties: str = 'average', n_jobs: int = 1, random_state: RandomState = None,
+                            diagnostics: Optional[Diagnostics] = None,
+                            progress: Optional[Callable[[int, int], None]] = None) -> npt.NDArray:
+    return _cucconi_dist(lambda: _cucconi_bootstrap_tests(a, b, ties=ties), replications=replications,
+                         row_size=len(a) + len(b), n_jobs=n_jobs, random_state=random_state,
+                         diagnostics=diagnostics, progress=progress)
+
+
+def cucconi_null_distribution(n1: int, n2: int, method: str = 'permutation', replications: int = 1000,
+                              ties: str = 'average', n_jobs: int = 1, random_state: RandomState = None,
+                              cache_dir: Optional[Union[str, os.PathLike]] = None) -> NullDistribution:
+    """
+    Resampled null distribution of the Cucconi statistic for samples without ties.
+
+    Without ties the null distribution depends only on the sample sizes. It is cached in memory, and in
+    'cache_dir' if given, unless 'random_state' is a generator, whose draws are not reproducible by key.
+    Args:
+        n1 (int): size of the first sample
+        n2 (int): size of the second sample
+        method (str): method for determining the distribution, possible values are 'bootstrap' and 'permutation'
+        replications (int): number of replications
+        ties (str): string specifying a method to deal with ties in the bootstrap replications,
+            possible values as for scipy.stats.rankdata
+        n_jobs (int): the maximum number of concurrently running jobs, as for cucconi_test
+        random_state ({None, int, numpy.random.Generator, numpy.random.RandomState, numpy.random.SeedSequence}):
+            seed or generator of the resampling
+        cache_dir (str): optional directory in which the distribution is persisted
+
+    Returns:
+        NullDistribution: sorted null distribution
+
+    Raises:
+        ValueError: if 'method' parameter is not specified to 'bootstrap' or 'permutation'
+
+    Examples:
+        >>> null = cucconi_null_distribution(20, 30, method='permutation', random_state=0)
+        >>> null.pvalue([0.01, 0.5])
+        array([0.82417582, 0.000999  ])
+
+    """
+    if method == 'permutation':
+        distribution = _cucconi_dist_permutation
+    elif method == 'bootstrap':
+        distribution = _cucconi_dist_bootstrap
+    else:
+        raise ValueError(
+            f"Unknown method for constructing the distribution,"
+            f" possible values are ['bootstrap', 'permutation'], but {method} was provided")
+
+    def compute():
+        return distribution(np.arange(n1), np.arange(n1, n1 + n2), replications=replications, ties=ties,
+                            n_jobs=n_jobs, random_state=random_state)
+
+    if not isinstance(random_state, (type(None), int, np.integer)):
+        return NullDistribution(compute(), is_sorted=True)
+    return cached_null_distribution(('cucconi', method, ties, (n1, n2), replications, random_state), compute,
+                                    cache_dir=cache_dir)
+
+
+def _cucconi_exact_scores(a: npt.NDArray, b: npt.NDArray,
+                          ties: str = 'average') -> tuple[npt.NDArray, npt.NDArray]:
+    alldata = np.concatenate((a, b))
+    ranked = rankdata(alldata, method=ties)
+    codes = rankdata(alldata, method='dense')
+    order = np.lexsort((ranked, codes))
+    doubled_ranks = np.rint(2 * ranked[order]).astype(np.int64)
+    return np.stack([doubled_ranks, doubled_ranks ** 2]), codes[order]
+
+
+def _cucconi_dist_exact(a: npt.NDArray, b: npt.NDArray, ties: str = 'average') -> tuple[npt.NDArray, npt.NDArray]:
     n1 = len(a)
     n2 = len(b)
-    h0_data = np.concatenate([a, b])
+    n = n1 + n2
+    scores, codes = _cucconi_exact_scores(a, b, ties=ties)
+    if _exact_states(scores, codes, n1) > _EXACT_STATES:
+        raise ValueError(f"Samples of sizes {n1} and {n2} are too large for the exact distribution,"
+                         f" use 'permutation' or 'bootstrap' method instead")
 
-    def bootstrap_test():
-        new_a = np.random.choice(h0_data, size=n1, replace=True)
-        new_b = np.random.choice(h0_data, size=n2, replace=True)
-        return _cucconi_test_statistic(new_a, new_b, ties=ties)
+    sums, probabilities = _exact_subset_sums(scores, codes, n1)
+    sum_ranks = sums[0] / 2
+    sum_sq = sums[1] / 4
+    sum_rev_sq = n1 * (n + 1) ** 2 - 2 * (n + 1) * sum_ranks + sum_sq
+    return _cucconi_statistic_from_sums(sum_sq, sum_rev_sq, n1, n2), probabilities
 
-    return np.sort(
-        Parallel(n_jobs=n_jobs)(delayed(bootstrap_test)() for _ in range(replications)))
+
+def _cucconi_asymptotic_pvalue(statistic: npt.ArrayLike, n: int) -> npt.ArrayLike:
+    # the statistic is scaled by (1 - rho^2)^2 relative to Cucconi's C, whose limiting null is P(C >= c) = exp(-c)
+    rho = 2 * (n ** 2 - 4) / ((2 * n + 1) * (8 * n + 11)) - 1
+    return np.exp(-statistic / (1 - rho ** 2) ** 2)
+
+
+def _cucconi_auto_method(a: npt.NDArray, b: npt.NDArray, ties: str = 'average') -> str:
+    if min(len(a), len(b)) >= _ASYMPTOTIC_MIN_SIZE:
+        return 'asymptotic'
+    if _exact_states(*_cucconi_exact_scores(a, b, ties=ties), len(a)) <= _EXACT_STATES:
+        return 'exact'
+    return 'permutation'
 
 
 def cucconi_test(a: npt.NDArray, b: npt.NDArray, method: str = 'bootstrap', replications: int = 1000,
-                 ties: str = 'average', n_jobs: int = 1) -> CucconiResult:
+                 ties: str = 'average', n_jobs: int = 1, random_state: RandomState = None,
+                 sequential: Optional[str] = None, alpha: float = 0.05, mcse: float = 0.001,
+                 exceedances: int = 10, cache: Union[bool, str, os.PathLike] = False, diagnostics: bool = False,
+                 progress: Optional[Callable[[int, int], None]] = None) -> CucconiResult:
     """
     Method to perform a Cucconi scale-location test.
     Args:
         a (np.ndarray): vector of observations
         b (np.ndarray): vector of observations
         method (str): method for determining p-value,
-            possible values are 'bootstrap' and 'permutation'
+            possible values are 'bootstrap', 'permutation', 'exact', 'asymptotic' and 'auto'.
+            The exact permutation distribution is computed without resampling and is available when the samples
+            are small enough, 'asymptotic' uses the limiting distribution P(C >= c) = exp(-c) of the normalised
+            statistic. 'auto' selects 'asymptotic' for large samples, 'exact' when it is available
+            and 'permutation' otherwise
         replications (int): number of bootstrap replications
         ties (str): string specifying a method to deal with ties in data,
             possible values as for scipy.stats.rankdata
         n_jobs (int): the maximum number of concurrently running jobs. If -1 all CPUs are used. If 1 is given,
             no parallel computing code is used at all. For n_jobs below -1, (n_cpus + 1 + n_jobs) are used.
             None is a marker for ‘unset’ that will be interpreted as n_jobs=1 (sequential execution)
+        random_state ({None, int, numpy.random.Generator, numpy.random.RandomState, numpy.random.SeedSequence}):
+            seed or generator of the resampling. Replications are split into chunks with independent random
+            streams spawned from it, so the same seed gives the same p-value for any n_jobs. If None, the seed
+            is drawn from the global numpy.random state
+        sequential (str): optional rule to stop the resampling early, at most 'replications' are used.
+            'besag-clifford' stops after 'exceedances' resampled statistics at least as large as the observed one;
+            'alpha' stops once the 99% confidence interval of the p-value excludes 'alpha' or its Monte Carlo
+            standard error drops to 'mcse'. If None, all replications are used
+        alpha (float): significance level of the 'alpha' stopping rule
+        mcse (float): target Monte Carlo standard error of the p-value of the 'alpha' stopping rule
+        exceedances (int): number of exceedances of the 'besag-clifford' stopping rule
+        cache (bool or str): whether to reuse resampled null distributions. Without ties in the data the null
+            depends only on the sample sizes, so if True it is kept in an in-memory LRU cache keyed by the sample
+            sizes, 'method', 'ties', 'replications' and an integer 'random_state'. A directory path additionally
+            persists the nulls there as memory-mapped .npy files. Data with ties is never cached
+        diagnostics (bool): whether to collect the timing of the ranking, resampling and p-value phases,
+            the worker time and the throughput of the resampling, see Diagnostics. They are also collected
+            when a hook is registered with nonparstat.Diagnostics.register_hook
+        progress (Callable): optional function called with the number of finished and of all replications
+            while resampling, the chunks are then dispatched in rounds of one chunk per worker
 
     Returns:
-        tuple: namedtuple with test statistic value and the p-value
+        tuple: namedtuple with test statistic value and the p-value, the number of replications used
+            is available as its 'replications' attribute and the diagnostics as its 'diagnostics' attribute
 
     Raises:
-        ValueError: if 'method' parameter is not specified to 'bootstrap' or 'permutation'
+        ValueError: if 'method' parameter is not specified to 'bootstrap', 'permutation', 'exact',
+            'asymptotic' or 'auto' or 'sequential' to None, 'besag-clifford' or 'alpha', or if the samples are too large
+            for the 'exact' method, or if the sequential rule gets 'exceedances' below 1, non-positive 'mcse'
+            or 'alpha' outside (0, 1)
 
     Examples:
         >>> np.random.seed(987654321) # set random seed to get the same result
@@ -91,99 +309,304 @@ def cucconi_test(a: npt.NDArray, b: npt.NDArray, method: str = 'bootstrap', repl
         >>> cucconi_test(sample_a, sample_b, method='permutation')
         CucconiResult(statistic=2.62372293956099, pvalue=0.000999000999000999)
 
+        >>> cucconi_test(sample_a[:10], sample_b[:10], method='exact')
+        CucconiResult(statistic=0.24274671580241702, pvalue=0.0008443568815085843)
+
     """
     a, b = map(np.asarray, (a, b))
-
-    test_statistics = _cucconi_test_statistic(a=a, b=b, ties=ties)
-
-    if method == 'permutation':
-        h0_distribution = _cucconi_dist_permutation(a=a, b=b, replications=replications, ties=ties,
-                                                    n_jobs=n_jobs)
-    elif method == 'bootstrap':
-        h0_distribution = _cucconi_dist_bootstrap(a=a, b=b, replications=replications, ties=ties,
-                                                  n_jobs=n_jobs)
-    else:
+    recorder = _start_diagnostics(diagnostics, test='cucconi', method=method, sizes=(len(a), len(b)), n_jobs=n_jobs)
+
+    with _phase(recorder, 'ranking'):
+        test_statistics = _cucconi_test_statistic(a=a, b=b, ties=ties)
+
+    if method == 'auto':
+        method = _cucconi_auto_method(a=a, b=b, ties=ties)
+        if recorder is not None:
+            recorder.method = method
+    if method == 'asymptotic':
+        with _phase(recorder, 'pvalue'):
+            p_value = _cucconi_asymptotic_pvalue(test_statistics, len(a) + len(b))
+        return _attach_diagnostics(CucconiResult(statistic=test_statistics, pvalue=p_value), recorder)
+    if method == 'exact':
+        with _phase(recorder, 'resampling'):
+            h0_statistics, probabilities = _cucconi_dist_exact(a=a, b=b, ties=ties)
+        with _phase(recorder, 'pvalue'):
+            # mirrored subsets give the observed statistic only up to rounding, which must not drop them from the tail
+            p_value = np.sum(probabilities[h0_statistics >= test_statistics * (1 - 1e-12)])
+        return _attach_diagnostics(CucconiResult(statistic=test_statistics, pvalue=p_value), recorder)
+
+    if sequential is not None:
+        with _phase(recorder, 'ranking'):
+            if method == 'permutation':
+                statistics = _cucconi_permutation_tests(a=a, b=b, ties=ties)
+            elif method == 'bootstrap':
+                statistics = _cucconi_bootstrap_tests(a=a, b=b, ties=ties)
+            else:
+                raise ValueError(
+                    f"Unknown method for constructing the distribution, possible values are"
+                    f" ['bootstrap', 'permutation', 'exact', 'asymptotic', 'auto'], but {method} was provided")
+        with _phase(recorder, 'resampling'):
+            p_value, used = _sequential_pvalue(statistics, test_statistics, replications=replications,
+                                               row_size=len(a) + len(b), sequential=sequential, alpha=alpha,
+                                               mcse=mcse, exceedances=exceedances, n_jobs=n_jobs,
+                                               random_state=random_state, diagnostics=recorder, progress=progress)
+        return _attach_diagnostics(CucconiResult(statistic=test_statistics, pvalue=p_value, replications=used),
+                                   recorder)
+
+    if method not in ('bootstrap', 'permutation'):
         raise ValueError(
-            f"Unknown method for constructing the distribution,"
-            f" possible values are ['bootstrap', 'permutation'], but {method} was provided")
-
-    p_value = (len(np.array(h0_distribution)[h0_distribution >= test_statistics]) + 1) / (
-            replications + 1)
+            f"Unknown method for constructing the distribution, possible values are"
+            f" ['bootstrap', 'permutation', 'exact', 'asymptotic', 'auto'], but {method} was provided")
+
+    if cache is not False and not _has_ties(np.concatenate((a, b))):
+        with _phase(recorder, 'resampling'):
+            h0_distribution = cucconi_null_distribution(len(a), len(b), method=method, replications=replications,
+                                                        ties=ties, n_jobs=n_jobs, random_state=random_state,
+                                                        cache_dir=None if cache is True else cache)
+    elif method == 'permutation':
+        h0_distribution = NullDistribution(_cucconi_dist_permutation(a=a, b=b, replications=replications, ties=ties,
+                                                                     n_jobs=n_jobs, random_state=random_state,
+                                                                     diagnostics=recorder, progress=progress),
+                                           is_sorted=True)
+    else:
+        h0_distribution = NullDistribution(_cucconi_dist_bootstrap(a=a, b=b, replications=replications, ties=ties,
+                                                                   n_jobs=n_jobs, random_state=random_state,
+                                                                   diagnostics=recorder, progress=progress),
+                                           is_sorted=True)
 
-    return CucconiResult(statistic=test_statistics, pvalue=p_value)
+    with _phase(recorder, 'pvalue'):
+        p_value = h0_distribution.pvalue(test_statistics)
 
+    return _attach_diagnostics(CucconiResult(statistic=test_statistics, pvalue=p_value, replications=replications),
+                               recorder)
 
-def _cucconi_multisample_test_statistic(samples: list[npt.NDArray], ties: str = 'average') -> float:
-    lengths = np.cumsum([0] + [s.shape[0] for s in samples])
-    ranked_data = rankdata(np.concatenate(samples), method=ties)
-    samples_ranks = [ranked_data[lengths[k]:lengths[k + 1]] for k, _ in enumerate(lengths[:-1])]
 
-    n_i = np.array([s.shape[0] for s in samples])
-    n = sum(n_i)
+def _cucconi_multisample_components(sum_sq: npt.NDArray, sum_rev_sq: npt.NDArray,
+                                    n_i: npt.NDArray) -> tuple[npt.NDArray, npt.NDArray, float]:
+    n_i = n_i.astype(float)
+    n = np.sum(n_i)
 
     expected_values = n_i * (n + 1) * (2 * n + 1) / 6
     std_deviations = np.sqrt(n_i * (n - n_i) * (n + 1) * (2 * n + 1) * (8 * n + 11) / 180)
     correlation = -(30 * n + 14 * n ** 2 + 19) / ((8 * n + 11) * (2 * n + 1))
 
-    U = np.array(
-        [(np.sum(sample ** 2) - expected_values[i]) / std_deviations[i] for i, sample in
-         enumerate(samples_ranks)])
-    V = np.array(
-        [(np.sum((n + 1 - sample) ** 2) - expected_values[i]) / std_deviations[i] for i, sample in
-         enumerate(samples_ranks)])
-    MC = np.mean(U ** 2 + V ** 2 - 2 * U * V * correlation) / (2 - 2 * correlation ** 2)
+    U = (sum_sq - expected_values) / std_deviations
+    V = (sum_rev_sq - expected_values) / std_deviations
+
+    return U, V, correlation
+
+
+def _cucconi_multisample_statistic_from_sums(sum_sq: npt.NDArray, sum_rev_sq: npt.NDArray,
+                                             n_i: npt.NDArray) -> npt.ArrayLike:
+    U, V, correlation = _cucconi_multisample_components(sum_sq, sum_rev_sq, n_i)
+    MC = np.mean(U ** 2 + V ** 2 - 2 * U * V * correlation, axis=-1) / (2 - 2 * correlation ** 2)
 
     return MC
 
 
-def _cucconi_multisample_dist_bootstrap(samples: list[npt.NDArray], replications: int = 1000,
-                                        ties: str = 'average', n_jobs: int = 1) -> npt.NDArray:
-    lengths = [len(s) for s in samples]
-    h0_data = np.concatenate(samples)
+def _cucconi_multisample_data(samples: Union[list[npt.NDArray], npt.NDArray],
+                              offsets: Optional[npt.ArrayLike] = None) -> tuple[npt.NDArray, npt.NDArray]:
+    """
+    Pooled observations and sample sizes of the multisample tests.
+    Args:
+        samples (List[numpy.ndarray] or numpy.ndarray): list of observation vectors, or their concatenation
+            if 'offsets' is given
+        offsets (numpy.ndarray): optional start index of every sample in the concatenated observations
+
+    Returns:
+        tuple: pooled vector of observations and vector of the sample sizes
+
+    Raises:
+        ValueError: if 'offsets' does not start at zero or is not strictly increasing within the observations
+    """
+    if offsets is None:
+        samples = [np.asarray(sample) for sample in samples]
+        return np.concatenate(samples), np.array([sample.shape[0] for sample in samples])
+
+    data, offsets = np.asarray(samples), np.asarray(offsets)
+    if data.ndim != 1 or offsets.ndim != 1 or offsets.size == 0:
+        raise ValueError("With 'offsets' the samples must be given as one vector of observations and a vector "
+                         "of start indices")
+    if offsets[0] != 0 or np.any(np.diff(offsets) <= 0) or offsets[-1] >= data.shape[0]:
+        raise ValueError("'offsets' must start at 0 and be strictly increasing start indices of non-empty samples")
+    return data, np.diff(np.append(offsets, data.shape[0]))
+
+
+def _cucconi_multisample_asymptotic_pvalue(data: npt.NDArray, n_i: npt.NDArray, ties: str = 'average') -> float:
+    # U_k * sqrt(1 - n_k / n) are the Kruskal-Wallis type standardisations of the squared-rank sums, so the weighted
+    # sum of the per-sample quadratic forms is asymptotically chi-square with 2 (k - 1) degrees of freedom
+    n = data.shape[0]
+    sum_sq, sum_rev_sq = _cucconi_multisample_sums(rankdata(data, method=ties), n_i)
+
+    U, V, correlation = _cucconi_multisample_components(sum_sq, sum_rev_sq, n_i)
+    chi_square = np.sum((1 - n_i / n) * (U ** 2 + V ** 2 - 2 * U * V * correlation)) / (1 - correlation ** 2)
+    return chi2.sf(chi_square, df=2 * (len(n_i) - 1))
+
+
+def _cucconi_multisample_sums(ranks: npt.NDArray, n_i: npt.NDArray) -> tuple[npt.NDArray, npt.NDArray]:
+    # segment sums over the consecutive samples of the pooled ranks, along the last axis; the sums of the squared
+    # reversed ranks follow from the sums of the ranks and of their squares without another pass over the replicates
+    n = ranks.shape[-1]
+    offsets = np.cumsum(n_i) - n_i
+    sum_r = np.add.reduceat(ranks, offsets, axis=-1)
+    sum_sq = np.add.reduceat(np.square(ranks), offsets, axis=-1)
+    return sum_sq, n_i * (n + 1) ** 2 - 2 * (n + 1) * sum_r + sum_sq
+
+
+def _cucconi_multisample_test_statistic(data: npt.NDArray, n_i: npt.NDArray, ties: str = 'average') -> float:
+    return _cucconi_multisample_statistics_from_ranks(rankdata(data, method=ties), n_i)
+
+
+def _cucconi_multisample_statistics_from_ranks(ranks: npt.NDArray, n_i: npt.NDArray) -> npt.NDArray:
+    sum_sq, sum_rev_sq = _cucconi_multisample_sums(ranks, n_i)
+    return _cucconi_multisample_statistic_from_sums(sum_sq, sum_rev_sq, n_i)
+
+
+def _cucconi_multisample_permuted_statistics(ranked: npt.NDArray, codes: Optional[npt.NDArray],
+                                             n_i: npt.NDArray, indices: npt.NDArray) -> npt.NDArray:
+    return _cucconi_multisample_statistics_from_ranks(_permuted_ranks(ranked, codes, indices), n_i)
 
-    def bootstrap_test():
-        new_samples = [np.random.choice(h0_data, size=n, replace=True) for n in lengths]
-        return _cucconi_multisample_test_statistic(samples=new_samples, ties=ties)
 
-    return np.sort(
-        Parallel(n_jobs=n_jobs)(delayed(bootstrap_test)() for _ in range(replications)))
+def _cucconi_multisample_bootstrap_tests(data: npt.NDArray, n_i: npt.NDArray, ties: str = 'average') -> Callable[
+        [np.random.Generator, int], npt.NDArray]:
+    n = data.shape[0]
 
+    def bootstrap_tests(rng, size):
+        ranked = _rankdata_rows(data[_random_choices(rng, n, n, size)], method=ties)
+        return _cucconi_multisample_statistics_from_ranks(ranked, n_i)
 
-def _cucconi_multisample_dist_permutation(samples: list[npt.NDArray], replications: int = 1000,
-                                          ties: str = 'average', n_jobs: int = 1) -> npt.NDArray:
-    lengths = lengths = np.cumsum([0] + [s.shape[0] for s in samples])
-    h0_data = np.concatenate(samples)
+    return bootstrap_tests
 
-    def permuted_test():
-        permuted_data = np.random.permutation(h0_data)
-        new_samples = [permuted_data[lengths[k]:lengths[k + 1]] for k, _ in enumerate(lengths[:-1])]
-        return _cucconi_multisample_test_statistic(samples=new_samples, ties=ties)
 
-    return np.sort(
-        Parallel(n_jobs=n_jobs)(delayed(permuted_test)() for _ in range(replications)))
+def _cucconi_multisample_permutation_tests(data: npt.NDArray, n_i: npt.NDArray, ties: str = 'average') -> Callable[
+        [np.random.Generator, int], npt.NDArray]:
+    n = data.shape[0]
+    ranked, codes = _pooled_ranks(data, ties=ties)
 
+    def permuted_tests(rng, size):
+        return _cucconi_multisample_permuted_statistics(ranked, codes, n_i, _random_permutations(rng, n, size))
 
-def cucconi_multisample_test(samples: list[npt.NDArray], method: str = 'bootstrap',
+    return permuted_tests
+
+
+def _cucconi_multisample_dist_bootstrap(data: npt.NDArray, n_i: npt.NDArray, replications: int = 1000,
+                                        ties: str = 'average', n_jobs: int = 1, random_state: RandomState = None,
+                                        diagnostics: Optional[Diagnostics] = None,
+                                        progress: Optional[Callable[[int, int], None]] = None) -> npt.NDArray:
+    return _cucconi_dist(lambda: _cucconi_multisample_bootstrap_tests(data, n_i, ties=ties),
+                         replications=replications, row_size=data.shape[0], n_jobs=n_jobs,
+                         random_state=random_state, diagnostics=diagnostics, progress=progress)
+
+
+def _cucconi_multisample_dist_permutation(data: npt.NDArray, n_i: npt.NDArray, replications: int = 1000,
+                                          ties: str = 'average', n_jobs: int = 1, random_state: RandomState = None,
+                                          diagnostics: Optional[Diagnostics] = None,
+                                          progress: Optional[Callable[[int, int], None]] = None) -> npt.NDArray:
+    return _cucconi_dist(lambda: _cucconi_multisample_permutation_tests(data, n_i, ties=ties),
+                         replications=replications, row_size=data.shape[0], n_jobs=n_jobs,
+                         random_state=random_state, diagnostics=diagnostics, progress=progress)
+
+
+def cucconi_multisample_null_distribution(sizes: list[int], method: str = 'permutation', replications: int = 1000,
+                                          ties: str = 'average', n_jobs: int = 1, random_state: RandomState = None,
+                                          cache_dir: Optional[Union[str, os.PathLike]] = None) -> NullDistribution:
+    """
+    Resampled null distribution of the multisample Cucconi statistic for samples without ties.
+
+    Without ties the null distribution depends only on the sample sizes. It is cached in memory, and in
+    'cache_dir' if given, unless 'random_state' is a generator, whose draws are not reproducible by key.
+    Args:
+        sizes (List[int]): sizes of the samples
+        method (str): method for determining the distribution, possible values are 'bootstrap' and 'permutation'
+        replications (int): number of replications
+        ties (str): string specifying a method to deal with ties in the bootstrap replications,
+            possible values as for scipy.stats.rankdata
+        n_jobs (int): the maximum number of concurrently running jobs, as for cucconi_multisample_test
+        random_state ({None, int, numpy.random.Generator, numpy.random.RandomState, numpy.random.SeedSequence}):
+            seed or generator of the resampling
+        cache_dir (str): optional directory in which the distribution is persisted
+
+    Returns:
+        NullDistribution: sorted null distribution
+
+    Raises:
+        ValueError: if 'method' parameter is not specified to 'bootstrap' or 'permutation'
+    """
+    if method == 'permutation':
+        distribution = _cucconi_multisample_dist_permutation
+    elif method == 'bootstrap':
+        distribution = _cucconi_multisample_dist_bootstrap
+    else:
+        raise ValueError(
+            f"Unknown method for constructing the distribution,"
+            f" possible values are ['bootstrap', 'permutation'], but {method} was provided")
+
+    def compute():
+        return distribution(np.arange(np.sum(sizes)), np.asarray(sizes), replications=replications, ties=ties,
+                            n_jobs=n_jobs, random_state=random_state)
+
+    if not isinstance(random_state, (type(None), int, np.integer)):
+        return NullDistribution(compute(), is_sorted=True)
+    return cached_null_distribution(('cucconi_multisample', method, ties, tuple(sizes), replications, random_state),
+                                    compute, cache_dir=cache_dir)
+
+
+def cucconi_multisample_test(samples: Union[list[npt.NDArray], npt.NDArray], method: str = 'bootstrap',
                              replications: int = 1000,
-                             ties: str = 'average', n_jobs: int = 1) -> CucconiMultisampleResult:
+                             ties: str = 'average', n_jobs: int = 1,
+                             random_state: RandomState = None, sequential: Optional[str] = None,
+                             alpha: float = 0.05, mcse: float = 0.001, exceedances: int = 10,
+                             cache: Union[bool, str, os.PathLike] = False, diagnostics: bool = False,
+                             progress: Optional[Callable[[int, int], None]] = None,
+                             offsets: Optional[npt.ArrayLike] = None) -> CucconiMultisampleResult:
     """
     Method to perform a multisample Cucconi scale-location test.
     Args:
-        samples (List[numpy.ndarray]): list of observation vectors
+        samples (List[numpy.ndarray] or numpy.ndarray): list of observation vectors, or all observations
+            concatenated into one vector if 'offsets' is given
         method (str): method for determining p-value,
-            possible values are 'bootstrap' and 'permutation'
+            possible values are 'bootstrap', 'permutation', 'asymptotic' and 'auto'. 'asymptotic' uses
+            the chi-square limit with 2 (k - 1) degrees of freedom of the weighted sum of the per-sample
+            quadratic forms, 'auto' selects it when all samples are large and 'permutation' otherwise
         replications (int): number of bootstrap replications
         ties (str): string specifying a method to deal with ties in data,
             possible values as for scipy.stats.rankdata
         n_jobs (int): the maximum number of concurrently running jobs. If -1 all CPUs are used. If 1 is given,
             no parallel computing code is used at all. For n_jobs below -1, (n_cpus + 1 + n_jobs) are used.
             None is a marker for ‘unset’ that will be interpreted as n_jobs=1 (sequential execution)
+        random_state ({None, int, numpy.random.Generator, numpy.random.RandomState, numpy.random.SeedSequence}):
+            seed or generator of the resampling. Replications are split into chunks with independent random
+            streams spawned from it, so the same seed gives the same p-value for any n_jobs. If None, the seed
+            is drawn from the global numpy.random state
+        sequential (str): optional rule to stop the resampling early, at most 'replications' are used.
+            'besag-clifford' stops after 'exceedances' resampled statistics at least as large as the observed one;
+            'alpha' stops once the 99% confidence interval of the p-value excludes 'alpha' or its Monte Carlo
+            standard error drops to 'mcse'. If None, all replications are used
+        alpha (float): significance level of the 'alpha' stopping rule
+        mcse (float): target Monte Carlo standard error of the p-value of the 'alpha' stopping rule
+        exceedances (int): number of exceedances of the 'besag-clifford' stopping rule
+        cache (bool or str): whether to reuse resampled null distributions. Without ties in the data the null
+            depends only on the sample sizes, so if True it is kept in an in-memory LRU cache keyed by the sample
+            sizes, 'method', 'ties', 'replications' and an integer 'random_state'. A directory path additionally
+            persists the nulls there as memory-mapped .npy files. Data with ties is never cached
+        diagnostics (bool): whether to collect the timing of the ranking, resampling and p-value phases,
+            the worker time and the throughput of the resampling, see Diagnostics. They are also collected
+            when a hook is registered with nonparstat.Diagnostics.register_hook
+        progress (Callable): optional function called with the number of finished and of all replications
+            while resampling, the chunks are then dispatched in rounds of one chunk per worker
+        offsets (numpy.ndarray): optional start index of every sample in the vector 'samples', as for
+            numpy.add.reduceat. Avoids building a list of arrays when the data of many groups is already stored
+            as one vector ordered by group
 
     Returns:
-        tuple: namedtuple with test statistic value and the p-value
+        tuple: namedtuple with test statistic value and the p-value, the number of replications used
+            is available as its 'replications' attribute and the diagnostics as its 'diagnostics' attribute
 
     Raises:
-        ValueError: if 'method' parameter is not specified to 'bootstrap' or 'permutation'
+        ValueError: if 'method' parameter is not specified to 'bootstrap', 'permutation', 'asymptotic'
+            or 'auto' or 'sequential' to None, 'besag-clifford' or 'alpha', or if 'offsets' are not strictly
+            increasing start indices of non-empty samples, or if the sequential rule gets 'exceedances' below 1,
+            non-positive 'mcse' or 'alpha' outside (0, 1)
 
     Examples:
         >>> np.random.seed(987654321) # set random seed to get the same result
@@ -196,26 +619,262 @@ def cucconi_multisample_test(samples: list[npt.NDArray], method: str = 'bootstra
         >>> sample_b = np.random.normal(loc=10, scale=10, size=100)
         >>> cucconi_multisample_test([sample_a, sample_a, sample_b], method='permutation')
         CucconiMultisampleResult(statistic=45.3891929069273, pvalue=0.000999000999000999)
+        >>> cucconi_multisample_test(np.concatenate([sample_a, sample_a, sample_b]), method='asymptotic',
+        ...                          offsets=[0, 100, 200])
+        CucconiMultisampleResult(statistic=45.3891929069273, pvalue=3.4529348175211043e-38)
 
     """
-    samples = list(map(np.asarray, samples))
+    data, n_i = _cucconi_multisample_data(samples, offsets)
+    recorder = _start_diagnostics(diagnostics, test='cucconi_multisample', method=method,
+                                  sizes=tuple(n_i.tolist()), n_jobs=n_jobs)
+
+    with _phase(recorder, 'ranking'):
+        test_statistics = _cucconi_multisample_test_statistic(data=data, n_i=n_i, ties=ties)
+
+    if method == 'auto':
+        method = 'asymptotic' if np.min(n_i) >= _ASYMPTOTIC_MIN_SIZE else 'permutation'
+        if recorder is not None:
+            recorder.method = method
+    if method == 'asymptotic':
+        with _phase(recorder, 'pvalue'):
+            p_value = _cucconi_multisample_asymptotic_pvalue(data=data, n_i=n_i, ties=ties)
+        return _attach_diagnostics(CucconiMultisampleResult(statistic=test_statistics, pvalue=p_value), recorder)
+
+    if sequential is not None:
+        with _phase(recorder, 'ranking'):
+            if method == 'permutation':
+                statistics = _cucconi_multisample_permutation_tests(data=data, n_i=n_i, ties=ties)
+            elif method == 'bootstrap':
+                statistics = _cucconi_multisample_bootstrap_tests(data=data, n_i=n_i, ties=ties)
+            else:
+                raise ValueError(
+                    f"Unknown method for constructing the distribution, possible values are"
+                    f" ['bootstrap', 'permutation', 'asymptotic', 'auto'], but {method} was provided")
+        with _phase(recorder, 'resampling'):
+            p_value, used = _sequential_pvalue(statistics, test_statistics, replications=replications,
+                                               row_size=data.shape[0], sequential=sequential,
+                                               alpha=alpha, mcse=mcse, exceedances=exceedances, n_jobs=n_jobs,
+                                               random_state=random_state, diagnostics=recorder, progress=progress)
+        return _attach_diagnostics(CucconiMultisampleResult(statistic=test_statistics, pvalue=p_value,
+                                                            replications=used), recorder)
+
+    if method not in ('bootstrap', 'permutation'):
+        raise ValueError(
+            f"Unknown method for constructing the distribution, "
+            f"possible values are ['bootstrap', 'permutation', 'asymptotic', 'auto'], but {method} was provided")
+
+    if cache is not False and not _has_ties(data):
+        with _phase(recorder, 'resampling'):
+            h0_distribution = cucconi_multisample_null_distribution(n_i.tolist(), method=method,
+                                                                    replications=replications, ties=ties,
+                                                                    n_jobs=n_jobs, random_state=random_state,
+                                                                    cache_dir=None if cache is True else cache)
+    elif method == 'permutation':
+        h0_distribution = NullDistribution(
+            _cucconi_multisample_dist_permutation(data=data, n_i=n_i, replications=replications, ties=ties,
+                                                  n_jobs=n_jobs, random_state=random_state,
+                                                  diagnostics=recorder, progress=progress), is_sorted=True)
+    else:
+        h0_distribution = NullDistribution(
+            _cucconi_multisample_dist_bootstrap(data=data, n_i=n_i, replications=replications, ties=ties,
+                                                n_jobs=n_jobs, random_state=random_state,
+                                                diagnostics=recorder, progress=progress), is_sorted=True)
 
-    test_statistics = _cucconi_multisample_test_statistic(samples=samples, ties=ties)
+    with _phase(recorder, 'pvalue'):
+        p_value = h0_distribution.pvalue(test_statistics)
 
-    if method == 'permutation':
-        h0_distribution = _cucconi_multisample_dist_bootstrap(samples=samples, replications=replications,
-                                                              ties=ties,
-                                                              n_jobs=n_jobs)
-    elif method == 'bootstrap':
-        h0_distribution = _cucconi_multisample_dist_permutation(samples=samples,
-                                                                replications=replications, ties=ties,
-                                                                n_jobs=n_jobs)
-    else:
+    return _attach_diagnostics(CucconiMultisampleResult(statistic=test_statistics, pvalue=p_value,
+                                                        replications=replications), recorder)
+
+
+def _cucconi_batch_dist(codes: npt.NDArray, n1: int, method: str = 'bootstrap', replications: int = 1000,
+                        ties: str = 'average', n_jobs: int = 1, random_state: RandomState = None) -> npt.NDArray:
+    """
+    Null distributions of the Cucconi statistic for a set of pooled samples given by their sorted tie codes.
+
+    Both resampling schemes are invariant to the order of the pooled sample and to monotone transformations
+    of the observations, so the null of every pair depends only on the sorted dense ranks of its pooled sample.
+    Rows of `codes` are such configurations; all of them are evaluated on the same resampled indices.
+    """
+    configurations, n = codes.shape
+    ranked = _rankdata_rows(codes, method=ties)
+
+    def resampled_tests(rng, size):
+        if method == 'bootstrap':
+            indices = _random_choices(rng, n, n, size)
+            a_ranks = _rankdata_rows(codes[:, indices].reshape(-1, n), method=ties)[:, :n1]
+        elif ties == 'ordinal':
+            indices = _random_permutations(rng, n, size)
+            a_ranks = _rankdata_rows(codes[:, indices].reshape(-1, n), method=ties)[:, :n1]
+        else:
+            a_ranks = ranked[:, _random_subsets(rng, n, n1, size)].reshape(-1, n1)
+        return _cucconi_statistics_from_ranks(a_ranks, n).reshape(configurations, size).T
+
+    return np.sort(_resample(resampled_tests, replications=replications, row_size=configurations * n,
+                             n_jobs=n_jobs, random_state=random_state).T, axis=1)
+
+
+def cucconi_test_batch(a: npt.NDArray, b: npt.NDArray, method: str = 'bootstrap', replications: int = 1000,
+                       ties: str = 'average', n_jobs: int = 1, random_state: RandomState = None,
+                       chunk_size: Optional[int] = None) -> CucconiResult:
+    """
+    Method to perform many independent Cucconi scale-location tests at once.
+    Args:
+        a (np.ndarray): matrix of observations, each row is the first sample of one test
+        b (np.ndarray): matrix of observations with the same number of rows as 'a',
+            each row is the second sample of one test
+        method (str): method for determining p-value,
+            possible values are 'bootstrap', 'permutation' and 'asymptotic'
+        replications (int): number of bootstrap replications
+        ties (str): string specifying a method to deal with ties in data,
+            possible values as for scipy.stats.rankdata
+        n_jobs (int): the maximum number of concurrently running jobs. If -1 all CPUs are used. If 1 is given,
+            no parallel computing code is used at all. For n_jobs below -1, (n_cpus + 1 + n_jobs) are used.
+            None is a marker for ‘unset’ that will be interpreted as n_jobs=1 (sequential execution)
+        random_state ({None, int, numpy.random.Generator, numpy.random.RandomState, numpy.random.SeedSequence}):
+            seed or generator of the resampling. If None, the seed is drawn from the global numpy.random state
+        chunk_size (int): maximal number of tests processed together, bounds the memory used by the ranking
+            and by the resampled null distributions. If None, all tests are processed together
+
+    Returns:
+        tuple: namedtuple with vectors of test statistic values and p-values, one entry per row
+
+    Raises:
+        ValueError: if 'method' parameter is not specified to 'bootstrap', 'permutation' or 'asymptotic'
+            or if 'a' and 'b' have different numbers of rows
+
+    Examples:
+        >>> sample_a = np.random.default_rng(987654321).normal(loc=0, scale=1, size=(3, 100))
+        >>> sample_b = np.random.default_rng(123456789).normal(loc=[[0], [1], [10]], scale=1, size=(3, 100))
+        >>> cucconi_test_batch(sample_a, sample_b, method='permutation', random_state=0).pvalue
+        array([0.41058941, 0.000999  , 0.000999  ])
+
+    """
+    a, b = map(np.atleast_2d, (a, b))
+    if a.shape[0] != b.shape[0]:
+        raise ValueError(f"Samples must have the same number of rows, but {a.shape[0]} and {b.shape[0]} were provided")
+    if method not in ('bootstrap', 'permutation', 'asymptotic'):
         raise ValueError(
-            f"Unknown method for constructing the distribution, "
-            f"possible values are ['bootstrap', 'permutation'], but {method} was provided")
+            f"Unknown method for constructing the distribution,"
+            f" possible values are ['bootstrap', 'permutation', 'asymptotic'], but {method} was provided")
+
+    n1 = a.shape[1]
+    n = n1 + b.shape[1]
+    tests = a.shape[0]
+    chunk_size = tests if chunk_size is None else chunk_size
+    chunks = range(0, tests, max(chunk_size, 1))
+    seeds = _seed_sequence(random_state).spawn(len(chunks)) if method != 'asymptotic' else [None] * len(chunks)
+
+    test_statistics = np.empty(tests)
+    p_values = np.empty(tests)
+    for start, seed in zip(chunks, seeds):
+        rows = slice(start, start + chunk_size)
+        alldata = np.concatenate((a[rows], b[rows]), axis=1)
+        test_statistics[rows] = _cucconi_statistics_from_ranks(_rankdata_rows(alldata, method=ties)[:, :n1], n)
+        if method == 'asymptotic':
+            p_values[rows] = _cucconi_asymptotic_pvalue(test_statistics[rows], n)
+            continue
+
+        configurations, inverse = np.unique(np.sort(_rankdata_rows(alldata, method='dense'), axis=1), axis=0,
+                                            return_inverse=True)
+        h0_distributions = _cucconi_batch_dist(configurations, n1=n1, method=method, replications=replications,
+                                               ties=ties, n_jobs=n_jobs, random_state=seed)
+        exceedances = np.empty(len(inverse))
+        for configuration, h0_distribution in enumerate(h0_distributions):
+            selected = inverse.ravel() == configuration
+            exceedances[selected] = replications - np.searchsorted(h0_distribution, test_statistics[rows][selected])
+        p_values[rows] = (exceedances + 1) / (replications + 1)
+
+    return CucconiResult(statistic=test_statistics, pvalue=p_values)
+
+
+def _cucconi_frequency_statistics(ranks: npt.NDArray, counts: npt.NDArray, n1: int, n2: int,
+                                  ties: str = 'average') -> npt.ArrayLike:
+    n = n1 + n2
+    sum_ranks, sum_sq = _frequency_rank_sums(ranks, counts, method=ties)
+    return _cucconi_statistic_from_sums(sum_sq, n1 * (n + 1) ** 2 - 2 * (n + 1) * sum_ranks + sum_sq, n1, n2)
+
+
+def _cucconi_frequency_tests(counts: npt.NDArray, method: str = 'bootstrap',
+                             ties: str = 'average') -> Callable[[np.random.Generator, int], npt.NDArray]:
+    # a random permutation puts a random n1-subset of the pooled observations into the first sample, so only the
+    # counts of the values in that subset are drawn, from the multivariate hypergeometric distribution; bootstrap
+    # samples draw the counts of both samples from the multinomial distribution and rank their pooled counts
+    totals = np.sum(counts, axis=0)
+    n1, n2 = map(int, np.sum(counts, axis=1))
+    ranks = _frequency_ranks(totals, method=ties)
+
+    def permuted_tests(rng, size):
+        return _cucconi_frequency_statistics(ranks, _random_hypergeometric_counts(rng, totals, n1, size), n1, n2,
+                                             ties=ties)
+
+    def bootstrap_tests(rng, size):
+        a_counts = _random_multinomial_counts(rng, totals, n1, size)
+        b_counts = _random_multinomial_counts(rng, totals, n2, size)
+        return _cucconi_frequency_statistics(_frequency_ranks(a_counts + b_counts, method=ties), a_counts, n1, n2,
+                                             ties=ties)
+
+    return permuted_tests if method == 'permutation' else bootstrap_tests
+
+
+def cucconi_test_counts(values: npt.ArrayLike, counts_a: npt.ArrayLike, counts_b: npt.ArrayLike,
+                        method: str = 'bootstrap', replications: int = 1000, ties: str = 'average', n_jobs: int = 1,
+                        random_state: RandomState = None) -> CucconiResult:
+    """
+    Method to perform a Cucconi scale-location test on samples given by the counts of their values.
+
+    The test is the same as cucconi_test on the samples with every value repeated as many times as it is counted,
+    but it works with the distinct values only: their ranks follow from the cumulative counts and a resampled
+    replicate draws the counts of every value in the first sample, from the multivariate hypergeometric
+    distribution for 'permutation' and from the multinomial distribution for 'bootstrap', instead of permuting
+    all observations. The time and memory scale with the number of distinct values instead of the number of
+    observations, which suits discrete data with many ties, e.g. latencies in milliseconds.
+    Args:
+        values (np.ndarray): vector of observed values
+        counts_a (np.ndarray): vector of numbers of observations of every value in the first sample
+        counts_b (np.ndarray): vector of numbers of observations of every value in the second sample
+        method (str): method for determining p-value, possible values are 'bootstrap', 'permutation' and
+            'asymptotic'
+        replications (int): number of bootstrap replications
+        ties (str): string specifying a method to deal with ties in data,
+            possible values as for scipy.stats.rankdata
+        n_jobs (int): the maximum number of concurrently running jobs. If -1 all CPUs are used. If 1 is given,
+            no parallel computing code is used at all. For n_jobs below -1, (n_cpus + 1 + n_jobs) are used.
+            None is a marker for ‘unset’ that will be interpreted as n_jobs=1 (sequential execution)
+        random_state ({None, int, numpy.random.Generator, numpy.random.RandomState, numpy.random.SeedSequence}):
+            seed or generator of the resampling. The same seed gives the same p-value for any n_jobs.
+            If None, the seed is drawn from the global numpy.random state
+
+    Returns:
+        tuple: namedtuple with test statistic value and the p-value, the number of replications used
+            is available as its 'replications' attribute
+
+    Raises:
+        ValueError: if 'method' parameter is not specified to 'bootstrap', 'permutation' or 'asymptotic',
+            if the vectors have different lengths, if the counts are not non-negative integers
+            or if a sample has no observations
+
+    Examples:
+        >>> values = [1, 2, 3, 4, 5]
+        >>> cucconi_test_counts(values, [10, 20, 40, 20, 10], [30, 10, 20, 10, 30], method='permutation',
+        ...                     random_state=0)
+        CucconiResult(statistic=0.9339143010784183, pvalue=0.000999000999000999)
+
+    """
+    if method not in ('bootstrap', 'permutation', 'asymptotic'):
+        raise ValueError(
+            f"Unknown method for constructing the distribution,"
+            f" possible values are ['bootstrap', 'permutation', 'asymptotic'], but {method} was provided")
+    counts = _frequency_table(values, counts_a, counts_b)
+    n1, n2 = map(int, np.sum(counts, axis=1))
+
+    test_statistics = _cucconi_frequency_statistics(_frequency_ranks(np.sum(counts, axis=0), method=ties),
+                                                    counts[0], n1, n2, ties=ties)
+    if method == 'asymptotic':
+        return CucconiResult(statistic=test_statistics, pvalue=_cucconi_asymptotic_pvalue(test_statistics, n1 + n2))
 
-    p_value = (len(np.array(h0_distribution)[h0_distribution >= test_statistics]) + 1) / (
-            replications + 1)
+    h0_statistics = _resample(_cucconi_frequency_tests(counts, method=method, ties=ties), replications=replications,
+                              row_size=counts.shape[1], n_jobs=n_jobs, random_state=random_state)
+    p_value = NullDistribution(h0_statistics).pvalue(test_statistics)
 
-    return CucconiMultisampleResult(statistic=test_statistics, pvalue=p_value)
+    return CucconiResult(statistic=test_statistics, pvalue=p_value, replications=replications)
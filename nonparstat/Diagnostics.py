@@ -0,0 +1,131 @@
+import contextlib
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, ContextManager, Optional
+
+from joblib import effective_n_jobs
+
+# functions called with the diagnostics of every test run, e.g. exporters of metrics
+_hooks: list[Callable[['Diagnostics'], None]] = []
+_hooks_lock = threading.Lock()
+
+
+@dataclass
+class Diagnostics:
+    """
+    Instrumentation of a single test run.
+
+    Phases are 'ranking' (the observed statistic and the pooled ranks shared by the replicates), 'resampling'
+    (the replicates or the exact distribution, including the dispatch of the chunks to the joblib workers)
+    and 'pvalue' (sorting the null distribution and locating the observed statistic in it).
+
+    Attributes:
+        test (str): name of the test
+        method (str): method used for the p-value, after resolving 'auto'
+        sizes (tuple): sizes of the samples
+        n_jobs (int): requested number of concurrently running jobs
+        replications (int): number of replications the p-value is based on, None without resampling
+        phases (dict): wall-clock seconds spent in every phase
+        worker_time (float): seconds spent computing the resampled chunks, summed over the workers
+        total (float): wall-clock seconds of the whole test
+
+    Examples:
+        >>> diagnostics = Diagnostics(test='cucconi', method='permutation', sizes=(10, 10), n_jobs=1)
+        >>> with diagnostics.phase('resampling'):
+        ...     pass
+        >>> list(diagnostics.phases)
+        ['resampling']
+
+    """
+    test: str
+    method: str
+    sizes: tuple
+    n_jobs: Optional[int] = 1
+    replications: Optional[int] = None
+    phases: dict = field(default_factory=dict)
+    worker_time: float = 0.0
+    total: float = 0.0
+    _start: float = field(default_factory=time.perf_counter, repr=False)
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """Context manager adding the wall-clock time of its body to the phase 'name'."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    @property
+    def throughput(self) -> Optional[float]:
+        """Replications per second of the resampling phase, None without resampling."""
+        resampling = self.phases.get('resampling')
+        if not self.replications or not resampling:
+            return None
+        return self.replications / resampling
+
+    @property
+    def dispatch_overhead(self) -> float:
+        """
+        Seconds of the resampling phase not explained by the computations of the workers, i.e. spent on starting
+        workers, pickling the tasks and collecting the results, assuming the chunks are spread evenly over them.
+        """
+        return max(self.phases.get('resampling', 0.0) - self.worker_time / effective_n_jobs(self.n_jobs), 0.0)
+
+
+def register_hook(hook: Callable[[Diagnostics], None]) -> None:
+    """
+    Call 'hook' with the diagnostics of every subsequent test run, which are then collected even if not requested.
+    Args:
+        hook (Callable): function of the Diagnostics of a finished test
+    """
+    with _hooks_lock:
+        _hooks.append(hook)
+
+
+def unregister_hook(hook: Callable[[Diagnostics], None]) -> None:
+    """
+    Stop calling a hook added with 'register_hook'.
+    Args:
+        hook (Callable): the registered function
+
+    Raises:
+        ValueError: if 'hook' is not registered
+    """
+    with _hooks_lock:
+        _hooks.remove(hook)
+
+
+def _start_diagnostics(enabled: bool, test: str, method: str, sizes: tuple,
+                       n_jobs: Optional[int]) -> Optional[Diagnostics]:
+    if not enabled and not _hooks:
+        return None
+    return Diagnostics(test=test, method=method, sizes=sizes, n_jobs=n_jobs)
+
+
+def _phase(diagnostics: Optional[Diagnostics], name: str) -> ContextManager:
+    return contextlib.nullcontext() if diagnostics is None else diagnostics.phase(name)
+
+
+def _attach_diagnostics(result, diagnostics: Optional[Diagnostics]):
+    """Finish the diagnostics of a test, pass them to the hooks and attach them to its result."""
+    if diagnostics is not None:
+        diagnostics.replications = result.replications
+        diagnostics.total = time.perf_counter() - diagnostics._start
+        with _hooks_lock:
+            hooks = list(_hooks)
+        for hook in hooks:
+            hook(diagnostics)
+    result.diagnostics = diagnostics
+    return result
+
+
+def _timed(statistics: Callable) -> Callable:
+    # wraps a chunk function of the resampling engine to also return its computation time
+    def timed_statistics(rng, size):
+        start = time.perf_counter()
+        values = statistics(rng, size)
+        return values, time.perf_counter() - start
+
+    return timed_statistics
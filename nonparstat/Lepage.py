@@ -1,3 +1,336 @@
+import os
 from collections import namedtuple
+from typing import Callable, Optional, Union
 
-LepageResult = namedtuple('LepageResult', ('statistic', 'pvalue'))
\ No newline at end of file
+import numpy as np
+import numpy.typing as npt
+from scipy.stats import chi2, rankdata
+
+from nonparstat.NullDistribution import NullDistribution, cached_null_distribution
+from nonparstat.Ranking import _rankdata_rows
+from nonparstat.Resampling import (RandomState, _pooled_ranks, _permuted_ranks, _random_permutations,
+                                   _random_subsets, _resample, _seed_sequence, _sequential_pvalue,
+                                   _ASYMPTOTIC_MIN_SIZE, _EXACT_STATES, _exact_states, _exact_subset_sums)
+
+
+class LepageResult(namedtuple('LepageResult', ('statistic', 'pvalue'))):
+    """
+    Namedtuple with the test statistic value and the p-value of the Lepage test.
+
+    Attributes:
+        replications (int): number of replications the p-value is based on, lower than requested
+            if a sequential test stopped early
+    """
+    replications = None
+
+    def __new__(cls, statistic, pvalue, replications=None):
+        result = super().__new__(cls, statistic, pvalue)
+        result.replications = replications
+        return result
+
+
+def _ansari_bradley_scores(ranked: npt.NDArray, n: int) -> npt.NDArray:
+    return np.minimum(ranked, n + 1 - ranked)
+
+
+def _lepage_moments(ranked: npt.NDArray, n1: int) -> tuple[npt.NDArray, ...]:
+    # permutation moments of the first-sample sums of the Wilcoxon and Ansari-Bradley scores of the pooled sample,
+    # exact under ties and independent of the permutation, so they are computed once per pooled sample
+    n = ranked.shape[-1]
+    factor = n1 * (n - n1) / (n * (n - 1))
+    moments = []
+    for scores in (ranked, _ansari_bradley_scores(ranked, n)):
+        mean = np.mean(scores, axis=-1, keepdims=True)
+        moments += [n1 * mean[..., 0], factor * np.sum(np.square(scores - mean), axis=-1)]
+    return tuple(moments)
+
+
+def _lepage_statistic_from_sums(sum_ranks: npt.ArrayLike, sum_ab: npt.ArrayLike,
+                                moments: tuple[npt.NDArray, ...]) -> npt.ArrayLike:
+    expected_ranks, variance_ranks, expected_ab, variance_ab = moments
+    return np.square(sum_ranks - expected_ranks) / variance_ranks + np.square(sum_ab - expected_ab) / variance_ab
+
+
+def _lepage_statistics_from_ranks(a_ranks: npt.NDArray, n: int, moments: tuple[npt.NDArray, ...]) -> npt.NDArray:
+    return _lepage_statistic_from_sums(np.sum(a_ranks, axis=-1),
+                                       np.sum(_ansari_bradley_scores(a_ranks, n), axis=-1), moments)
+
+
+def _lepage_test_statistic(a: npt.NDArray, b: npt.NDArray, ties: str = 'average') -> float:
+    n1 = len(a)
+    ranked = rankdata(np.concatenate((a, b)), method=ties)
+    return _lepage_statistics_from_ranks(ranked[:n1], len(ranked), _lepage_moments(ranked, n1))
+
+
+def _lepage_permutation_tests(a: npt.NDArray, b: npt.NDArray,
+                              ties: str = 'average') -> Callable[[np.random.Generator, int], npt.NDArray]:
+    n1 = len(a)
+    n = n1 + len(b)
+    ranked, codes = _pooled_ranks(np.concatenate([a, b]), ties=ties)
+    moments = _lepage_moments(ranked, n1)
+
+    def permuted_tests(rng, size):
+        if codes is None:
+            a_ranks = ranked[_random_subsets(rng, n, n1, size)]
+        else:
+            a_ranks = _permuted_ranks(ranked, codes, _random_permutations(rng, n, size))[:, :n1]
+        return _lepage_statistics_from_ranks(a_ranks, n, moments)
+
+    return permuted_tests
+
+
+def _lepage_dist_permutation(a: npt.NDArray, b: npt.NDArray, replications: int = 1000, ties: str = 'average',
+                             n_jobs: int = 1, random_state: RandomState = None) -> npt.NDArray:
+    return np.sort(_resample(_lepage_permutation_tests(a, b, ties=ties), replications=replications,
+                             row_size=len(a) + len(b), n_jobs=n_jobs, random_state=random_state))
+
+
+def lepage_null_distribution(n1: int, n2: int, replications: int = 1000, ties: str = 'average', n_jobs: int = 1,
+                             random_state: RandomState = None,
+                             cache_dir: Optional[Union[str, os.PathLike]] = None) -> NullDistribution:
+    """
+    Permutation null distribution of the Lepage statistic for samples without ties.
+
+    Without ties the null distribution depends only on the sample sizes. It is cached in memory, and in
+    'cache_dir' if given, unless 'random_state' is a generator, whose draws are not reproducible by key.
+    Args:
+        n1 (int): size of the first sample
+        n2 (int): size of the second sample
+        replications (int): number of permutation replications
+        ties (str): string specifying a method to deal with ties, possible values as for scipy.stats.rankdata
+        n_jobs (int): the maximum number of concurrently running jobs, as for lepage_test
+        random_state ({None, int, numpy.random.Generator, numpy.random.RandomState, numpy.random.SeedSequence}):
+            seed or generator of the resampling
+        cache_dir (str): optional directory in which the distribution is persisted
+
+    Returns:
+        NullDistribution: sorted null distribution
+
+    Examples:
+        >>> null = lepage_null_distribution(20, 30, random_state=0)
+        >>> null.pvalue([0.5, 10])
+        array([0.77922078, 0.00699301])
+
+    """
+    def compute():
+        return _lepage_dist_permutation(np.arange(n1), np.arange(n1, n1 + n2), replications=replications, ties=ties,
+                                        n_jobs=n_jobs, random_state=random_state)
+
+    if not isinstance(random_state, (type(None), int, np.integer)):
+        return NullDistribution(compute(), is_sorted=True)
+    return cached_null_distribution(('lepage', 'permutation', ties, (n1, n2), replications, random_state), compute,
+                                    cache_dir=cache_dir)
+
+
+def _lepage_exact_scores(a: npt.NDArray, b: npt.NDArray, ties: str = 'average') -> tuple[npt.NDArray, npt.NDArray]:
+    alldata = np.concatenate((a, b))
+    ranked = rankdata(alldata, method=ties)
+    codes = rankdata(alldata, method='dense')
+    order = np.lexsort((ranked, codes))
+    doubled_ranks = np.rint(2 * ranked[order]).astype(np.int64)
+    return np.stack([doubled_ranks, np.minimum(doubled_ranks, 2 * (len(alldata) + 1) - doubled_ranks)]), codes[order]
+
+
+def _lepage_dist_exact(a: npt.NDArray, b: npt.NDArray, ties: str = 'average') -> tuple[npt.NDArray, npt.NDArray]:
+    n1 = len(a)
+    n2 = len(b)
+    scores, codes = _lepage_exact_scores(a, b, ties=ties)
+    if _exact_states(scores, codes, n1) > _EXACT_STATES:
+        raise ValueError(f"Samples of sizes {n1} and {n2} are too large for the exact distribution,"
+                         f" use 'permutation' or 'asymptotic' method instead")
+
+    sums, probabilities = _exact_subset_sums(scores, codes, n1)
+    moments = _lepage_moments(rankdata(np.concatenate((a, b)), method=ties), n1)
+    return _lepage_statistic_from_sums(sums[0] / 2, sums[1] / 2, moments), probabilities
+
+
+def _lepage_auto_method(a: npt.NDArray, b: npt.NDArray, ties: str = 'average') -> str:
+    if min(len(a), len(b)) >= _ASYMPTOTIC_MIN_SIZE:
+        return 'asymptotic'
+    if _exact_states(*_lepage_exact_scores(a, b, ties=ties), len(a)) <= _EXACT_STATES:
+        return 'exact'
+    return 'permutation'
+
+
+def lepage_test(a: npt.NDArray, b: npt.NDArray, method: str = 'auto', replications: int = 1000,
+                ties: str = 'average', n_jobs: int = 1, random_state: RandomState = None,
+                sequential: Optional[str] = None, alpha: float = 0.05, mcse: float = 0.001,
+                exceedances: int = 10) -> LepageResult:
+    """
+    Method to perform a Lepage location-scale test.
+
+    The statistic is the sum of the squared standardised Wilcoxon and Ansari-Bradley statistics of the first
+    sample, both computed from a single ranking of the pooled sample. Their means and variances are the exact
+    permutation moments of the pooled ranks, so ties are accounted for.
+    Args:
+        a (np.ndarray): vector of observations
+        b (np.ndarray): vector of observations
+        method (str): method for determining p-value,
+            possible values are 'permutation', 'exact', 'asymptotic' and 'auto'. The exact permutation
+            distribution is computed without resampling and is available when the samples are small enough,
+            'asymptotic' uses the chi-square limit with 2 degrees of freedom. 'auto' selects 'asymptotic'
+            for large samples, 'exact' when it is available and 'permutation' otherwise
+        replications (int): number of permutation replications
+        ties (str): string specifying a method to deal with ties in data,
+            possible values as for scipy.stats.rankdata
+        n_jobs (int): the maximum number of concurrently running jobs. If -1 all CPUs are used. If 1 is given,
+            no parallel computing code is used at all. For n_jobs below -1, (n_cpus + 1 + n_jobs) are used.
+            None is a marker for ‘unset’ that will be interpreted as n_jobs=1 (sequential execution)
+        random_state ({None, int, numpy.random.Generator, numpy.random.RandomState, numpy.random.SeedSequence}):
+            seed or generator of the resampling. Replications are split into chunks with independent random
+            streams spawned from it, so the same seed gives the same p-value for any n_jobs. If None, the seed
+            is drawn from the global numpy.random state
+        sequential (str): optional rule to stop the resampling early, as for cucconi_test
+        alpha (float): significance level of the 'alpha' stopping rule
+        mcse (float): target Monte Carlo standard error of the p-value of the 'alpha' stopping rule
+        exceedances (int): number of exceedances of the 'besag-clifford' stopping rule
+
+    Returns:
+        tuple: namedtuple with test statistic value and the p-value, the number of replications used
+            is available as its 'replications' attribute
+
+    Raises:
+        ValueError: if 'method' parameter is not specified to 'permutation', 'exact', 'asymptotic' or 'auto'
+            or 'sequential' to None, 'besag-clifford' or 'alpha', or if the samples are too large
+            for the 'exact' method, or if the sequential rule gets 'exceedances' below 1, non-positive 'mcse'
+            or 'alpha' outside (0, 1)
+
+    Examples:
+        >>> np.random.seed(987654321) # set random seed to get the same result
+        >>> sample_a = np.random.normal(loc=0, scale=1, size=100)
+        >>> sample_b = np.random.normal(loc=0.5, scale=2, size=100)
+        >>> lepage_test(sample_a, sample_b)
+        LepageResult(statistic=34.628715375418146, pvalue=3.023221716298457e-08)
+
+        >>> lepage_test(sample_a[:10], sample_b[:10])
+        LepageResult(statistic=1.1948051948051948, pvalue=0.566217064669077)
+
+    """
+    a, b = map(np.asarray, (a, b))
+
+    test_statistics = _lepage_test_statistic(a=a, b=b, ties=ties)
+
+    if method == 'auto':
+        method = _lepage_auto_method(a=a, b=b, ties=ties)
+    if method == 'asymptotic':
+        return LepageResult(statistic=test_statistics, pvalue=chi2.sf(test_statistics, df=2))
+    if method == 'exact':
+        h0_statistics, probabilities = _lepage_dist_exact(a=a, b=b, ties=ties)
+        # the exact sums reproduce the observed statistic only up to rounding, which must not drop it from the tail
+        p_value = np.sum(probabilities[h0_statistics >= test_statistics * (1 - 1e-12)])
+        return LepageResult(statistic=test_statistics, pvalue=p_value)
+    if method != 'permutation':
+        raise ValueError(
+            f"Unknown method for constructing the distribution, possible values are"
+            f" ['permutation', 'exact', 'asymptotic', 'auto'], but {method} was provided")
+
+    if sequential is not None:
+        p_value, used = _sequential_pvalue(_lepage_permutation_tests(a=a, b=b, ties=ties), test_statistics,
+                                           replications=replications, row_size=len(a) + len(b),
+                                           sequential=sequential, alpha=alpha, mcse=mcse, exceedances=exceedances,
+                                           n_jobs=n_jobs, random_state=random_state)
+        return LepageResult(statistic=test_statistics, pvalue=p_value, replications=used)
+
+    h0_statistics = _lepage_dist_permutation(a=a, b=b, replications=replications, ties=ties, n_jobs=n_jobs,
+                                             random_state=random_state)
+    p_value = (replications - np.searchsorted(h0_statistics, test_statistics) + 1) / (replications + 1)
+
+    return LepageResult(statistic=test_statistics, pvalue=p_value, replications=replications)
+
+
+def _lepage_batch_dist(codes: npt.NDArray, n1: int, replications: int = 1000, ties: str = 'average',
+                       n_jobs: int = 1, random_state: RandomState = None) -> npt.NDArray:
+    """
+    Permutation null distributions of the Lepage statistic for a set of pooled samples given by their sorted
+    tie codes, all evaluated on the same resampled indices as in the batch Cucconi test.
+    """
+    configurations, n = codes.shape
+    ranked = _rankdata_rows(codes, method=ties)
+    moments = tuple(moment[:, np.newaxis] for moment in _lepage_moments(ranked, n1))
+
+    def permuted_tests(rng, size):
+        if ties == 'ordinal':
+            indices = _random_permutations(rng, n, size)
+            a_ranks = _rankdata_rows(codes[:, indices].reshape(-1, n), method=ties)[:, :n1]
+            a_ranks = a_ranks.reshape(configurations, size, n1)
+        else:
+            a_ranks = ranked[:, _random_subsets(rng, n, n1, size)]
+        return _lepage_statistics_from_ranks(a_ranks, n, moments).T
+
+    return np.sort(_resample(permuted_tests, replications=replications, row_size=configurations * n,
+                             n_jobs=n_jobs, random_state=random_state).T, axis=1)
+
+
+def lepage_test_batch(a: npt.NDArray, b: npt.NDArray, method: str = 'asymptotic', replications: int = 1000,
+                      ties: str = 'average', n_jobs: int = 1, random_state: RandomState = None,
+                      chunk_size: Optional[int] = None) -> LepageResult:
+    """
+    Method to perform many independent Lepage location-scale tests at once.
+    Args:
+        a (np.ndarray): matrix of observations, each row is the first sample of one test
+        b (np.ndarray): matrix of observations with the same number of rows as 'a',
+            each row is the second sample of one test
+        method (str): method for determining p-value,
+            possible values are 'asymptotic' and 'permutation'
+        replications (int): number of permutation replications
+        ties (str): string specifying a method to deal with ties in data,
+            possible values as for scipy.stats.rankdata
+        n_jobs (int): the maximum number of concurrently running jobs. If -1 all CPUs are used. If 1 is given,
+            no parallel computing code is used at all. For n_jobs below -1, (n_cpus + 1 + n_jobs) are used.
+            None is a marker for ‘unset’ that will be interpreted as n_jobs=1 (sequential execution)
+        random_state ({None, int, numpy.random.Generator, numpy.random.RandomState, numpy.random.SeedSequence}):
+            seed or generator of the resampling. If None, the seed is drawn from the global numpy.random state
+        chunk_size (int): maximal number of tests processed together, bounds the memory used by the ranking
+            and by the resampled null distributions. If None, all tests are processed together
+
+    Returns:
+        tuple: namedtuple with vectors of test statistic values and p-values, one entry per row
+
+    Raises:
+        ValueError: if 'method' parameter is not specified to 'asymptotic' or 'permutation'
+            or if 'a' and 'b' have different numbers of rows
+
+    Examples:
+        >>> sample_a = np.random.default_rng(987654321).normal(loc=0, scale=1, size=(3, 100))
+        >>> sample_b = np.random.default_rng(123456789).normal(loc=[[0], [1], [10]], scale=1, size=(3, 100))
+        >>> lepage_test_batch(sample_a, sample_b).pvalue
+        array([5.34395990e-01, 5.69620281e-10, 3.89012930e-33])
+
+    """
+    a, b = map(np.atleast_2d, (a, b))
+    if a.shape[0] != b.shape[0]:
+        raise ValueError(f"Samples must have the same number of rows, but {a.shape[0]} and {b.shape[0]} were provided")
+    if method not in ('asymptotic', 'permutation'):
+        raise ValueError(
+            f"Unknown method for constructing the distribution,"
+            f" possible values are ['asymptotic', 'permutation'], but {method} was provided")
+
+    n1 = a.shape[1]
+    n = n1 + b.shape[1]
+    tests = a.shape[0]
+    chunk_size = tests if chunk_size is None else max(chunk_size, 1)
+    chunks = range(0, tests, chunk_size)
+    seeds = _seed_sequence(random_state).spawn(len(chunks)) if method == 'permutation' else [None] * len(chunks)
+
+    test_statistics = np.empty(tests)
+    p_values = np.empty(tests)
+    for start, seed in zip(chunks, seeds):
+        rows = slice(start, start + chunk_size)
+        alldata = np.concatenate((a[rows], b[rows]), axis=1)
+        ranked = _rankdata_rows(alldata, method=ties)
+        test_statistics[rows] = _lepage_statistics_from_ranks(ranked[:, :n1], n, _lepage_moments(ranked, n1))
+        if method == 'asymptotic':
+            p_values[rows] = chi2.sf(test_statistics[rows], df=2)
+            continue
+
+        configurations, inverse = np.unique(np.sort(_rankdata_rows(alldata, method='dense'), axis=1), axis=0,
+                                            return_inverse=True)
+        h0_distributions = _lepage_batch_dist(configurations, n1=n1, replications=replications, ties=ties,
+                                              n_jobs=n_jobs, random_state=seed)
+        exceedances = np.empty(len(inverse))
+        for configuration, h0_distribution in enumerate(h0_distributions):
+            selected = inverse.ravel() == configuration
+            exceedances[selected] = replications - np.searchsorted(h0_distribution, test_statistics[rows][selected])
+        p_values[rows] = (exceedances + 1) / (replications + 1)
+
+    return LepageResult(statistic=test_statistics, pvalue=p_values)
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Hashable, Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+
+# maximal number of null distributions kept in memory
+_CACHE_SIZE = 128
+
+_memory_cache: 'OrderedDict[tuple, NullDistribution]' = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class NullDistribution:
+    """
+    Resampled null distribution of a test statistic.
+
+    The replications are kept sorted, so p-values of any number of statistics are computed with a binary
+    search in O(log R) instead of a scan over all replications.
+
+    Args:
+        statistics (np.ndarray): vector of resampled values of the test statistic
+        is_sorted (bool): whether 'statistics' is already sorted in ascending order
+
+    Examples:
+        >>> null = NullDistribution(np.array([0.3, 0.1, 0.2]))
+        >>> null.pvalue([0.05, 0.2, 0.5])
+        array([1.  , 0.75, 0.25])
+
+    """
+
+    def __init__(self, statistics: npt.ArrayLike, is_sorted: bool = False):
+        statistics = np.asanyarray(statistics)
+        self.statistics = statistics if is_sorted else np.sort(statistics)
+
+    @property
+    def replications(self) -> int:
+        return len(self.statistics)
+
+    def pvalue(self, statistic: npt.ArrayLike) -> npt.ArrayLike:
+        """
+        Monte Carlo p-value (1 + #{replications >= statistic}) / (1 + replications).
+        Args:
+            statistic (np.ndarray): observed value or array of observed values of the test statistic
+
+        Returns:
+            np.ndarray: p-value of every statistic
+        """
+        exceedances = self.replications - np.searchsorted(self.statistics, statistic, side='left')
+        return (exceedances + 1) / (self.replications + 1)
+
+    def save(self, path: Union[str, os.PathLike]) -> None:
+        """
+        Persist the distribution as a .npy file, written atomically so concurrent readers never see a partial file.
+        Args:
+            path (str): path of the file
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=path.parent, suffix='.npy', delete=False) as file:
+            np.save(file, np.asarray(self.statistics))
+        os.replace(file.name, path)
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike], mmap: bool = True) -> 'NullDistribution':
+        """
+        Load a distribution saved with 'save'.
+        Args:
+            path (str): path of the file
+            mmap (bool): whether to memory-map the file instead of reading it into memory
+
+        Returns:
+            NullDistribution: the loaded distribution
+        """
+        return cls(np.load(path, mmap_mode='r' if mmap else None), is_sorted=True)
+
+
+def _cache_file_name(key: tuple) -> str:
+    return '_'.join('-'.join(map(str, part)) if isinstance(part, tuple) else str(part) for part in key) + '.npy'
+
+
+def cached_null_distribution(key: tuple[Hashable, ...], compute: Callable[[], npt.NDArray],
+                             cache_dir: Optional[Union[str, os.PathLike]] = None) -> NullDistribution:
+    """
+    Get a null distribution from the in-memory LRU cache or the disk cache, computing and storing it if missing.
+    Args:
+        key (tuple): hashable key identifying the distribution, e.g. the test, method and sample sizes
+        compute (Callable): function returning the sorted replications of the distribution
+        cache_dir (str): optional directory in which the distribution is persisted as a memory-mapped .npy file
+
+    Returns:
+        NullDistribution: the cached distribution
+    """
+    with _cache_lock:
+        if key in _memory_cache:
+            _memory_cache.move_to_end(key)
+            return _memory_cache[key]
+
+    path = None if cache_dir is None else Path(cache_dir) / _cache_file_name(key)
+    if path is not None and path.exists():
+        null_distribution = NullDistribution.load(path)
+    else:
+        null_distribution = NullDistribution(compute(), is_sorted=True)
+        if path is not None:
+            null_distribution.save(path)
+
+    with _cache_lock:
+        _memory_cache[key] = null_distribution
+        while len(_memory_cache) > _CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+    return null_distribution
+
+
+def clear_cache() -> None:
+    """Remove all null distributions from the in-memory cache, files on disk are kept."""
+    with _cache_lock:
+        _memory_cache.clear()
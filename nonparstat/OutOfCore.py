@@ -0,0 +1,204 @@
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from nonparstat.Cucconi import CucconiResult, _cucconi_asymptotic_pvalue, _cucconi_statistic_from_sums
+
+# number of block-sized arrays alive at the same time, used to turn the memory budget into a block length
+_BLOCK_COPIES = 8
+# minimal number of elements read from every run in a merge round, more runs than a block holds slices of this length
+# are merged in several passes
+_MERGE_SLICE = 64
+_OUT_OF_CORE_TIES = ('average', 'min', 'max', 'ordinal')
+
+
+def _as_array(data: Union[npt.ArrayLike, str, os.PathLike]) -> npt.NDArray:
+    if isinstance(data, (str, os.PathLike)):
+        return np.load(data, mmap_mode='r')
+    return np.asanyarray(data).ravel()
+
+
+def _merge_runs(runs: list[npt.NDArray], output: npt.NDArray, block: int) -> None:
+    """
+    Merge sorted runs into `output` reading at most `block` elements in total at a time.
+
+    Every round reads the next slice of each run and takes the elements not larger than the smallest of their last
+    values: all smaller elements of the runs are among the slices, so the taken elements precede everything left.
+    """
+    positions = [0] * len(runs)
+    slice_length = max(block // len(runs), 1)
+    written = 0
+    while written < len(output):
+        slices = [np.asarray(run[position:position + slice_length]) for run, position in zip(runs, positions)]
+        pivot = min(part[-1] for part in slices if len(part))
+        taken = [int(np.searchsorted(part, pivot, side='right')) for part in slices]
+        merged = np.sort(np.concatenate([part[:count] for part, count in zip(slices, taken)]), kind='stable')
+        output[written:written + len(merged)] = merged
+        written += len(merged)
+        positions = [position + count for position, count in zip(positions, taken)]
+
+
+def _external_sort(data: npt.NDArray, directory: Path, name: str, block: int) -> npt.NDArray:
+    """
+    Sort a possibly memory-mapped vector with at most `block` elements in memory at a time.
+
+    Vectors fitting in a block are sorted in memory; longer ones are cut into sorted runs saved in `directory`,
+    which are merged into a memory-mapped .npy file there. A merge reads slices of at least `_MERGE_SLICE` elements
+    from every run, so when there are more runs than that allows, groups of runs are first merged into longer runs
+    in as many passes as needed. The runs of a merge are removed as soon as it finishes, so at most about twice
+    the size of the vector is on disk at any time.
+    """
+    if len(data) <= block:
+        return np.sort(data)
+    paths = []
+    for number, start in enumerate(range(0, len(data), block)):
+        paths.append(directory / f'{name}_run{number}.npy')
+        np.save(paths[-1], np.sort(data[start:start + block]))
+
+    fan_in = max(block // _MERGE_SLICE, 2)
+    merge_pass = 0
+    while len(paths) > fan_in:
+        merged_paths = []
+        for number, start in enumerate(range(0, len(paths), fan_in)):
+            group = paths[start:start + fan_in]
+            runs = [np.load(path, mmap_mode='r') for path in group]
+            merged_paths.append(directory / f'{name}_pass{merge_pass}_run{number}.npy')
+            merged = np.lib.format.open_memmap(merged_paths[-1], mode='w+', dtype=data.dtype,
+                                               shape=(sum(len(run) for run in runs),))
+            _merge_runs(runs, merged, block)
+            merged.flush()
+            del runs, merged
+            for path in group:
+                os.remove(path)
+        paths = merged_paths
+        merge_pass += 1
+
+    runs = [np.load(path, mmap_mode='r') for path in paths]
+    output = np.lib.format.open_memmap(directory / f'{name}.npy', mode='w+', dtype=data.dtype, shape=data.shape)
+    _merge_runs(runs, output, block)
+    output.flush()
+    del runs
+    for path in paths:
+        os.remove(path)
+    return output
+
+
+def _group_rank_sums(less: int, first: int, count: int, ties: str) -> tuple[float, float]:
+    # sums of the ranks and squared ranks of the 'first' first-sample members of a tie group of 'count'
+    # observations preceded by 'less' smaller observations
+    if ties == 'ordinal':
+        return (first * less + first * (first + 1) / 2,
+                first * less ** 2 + less * first * (first + 1) + first * (first + 1) * (2 * first + 1) / 6)
+    rank = less + {'average': (count + 1) / 2, 'min': 1, 'max': count}[ties]
+    return first * rank, first * rank ** 2
+
+
+def _block_rank_sums(a: npt.NDArray, b: npt.NDArray, less: int, ties: str) -> tuple[float, float]:
+    # ranks of the sorted first-sample values 'a' when all smaller pooled values are either among the sorted 'a'
+    # and 'b' or among the 'less' values before them, and the whole tie group of every value is in 'a' and 'b'
+    a_left = np.searchsorted(a, a, side='left')
+    b_left = np.searchsorted(b, a, side='left')
+    if ties == 'ordinal':
+        ranks = less + np.arange(1, len(a) + 1) + b_left
+    elif ties == 'min':
+        ranks = less + a_left + b_left + 1
+    else:
+        a_right = np.searchsorted(a, a, side='right')
+        b_right = np.searchsorted(b, a, side='right')
+        if ties == 'max':
+            ranks = less + a_right + b_right
+        else:
+            ranks = less + (a_left + b_left + a_right + b_right + 1) / 2
+    ranks = ranks.astype(float)
+    return float(np.sum(ranks)), float(np.sum(np.square(ranks)))
+
+
+def _sorted_rank_sums(a: npt.NDArray, b: npt.NDArray, block: int, ties: str) -> tuple[float, float]:
+    """
+    Sums of the pooled ranks and squared pooled ranks of the first sample, given both samples sorted.
+
+    Both vectors are walked in blocks. Values below the smaller of the last values of the two blocks are complete
+    in the blocks and ranked there; the tie group of that pivot value may continue past the blocks, so it is
+    counted with a binary search over the whole vectors and consumed at once.
+    """
+    sums, squares = [], []
+    position_a = position_b = 0
+    while position_a < len(a) or position_b < len(b):
+        block_a = np.asarray(a[position_a:position_a + block])
+        block_b = np.asarray(b[position_b:position_b + block])
+        pivot = min(part[-1] for part in (block_a, block_b) if len(part))
+        below_a = int(np.searchsorted(block_a, pivot, side='left'))
+        below_b = int(np.searchsorted(block_b, pivot, side='left'))
+        block_sum, block_squares = _block_rank_sums(block_a[:below_a], block_b[:below_b], position_a + position_b, ties)
+
+        end_a = int(np.searchsorted(a, pivot, side='right'))
+        end_b = int(np.searchsorted(b, pivot, side='right'))
+        first = end_a - position_a - below_a
+        group_sum, group_squares = _group_rank_sums(position_a + below_a + position_b + below_b, first,
+                                                    first + end_b - position_b - below_b, ties)
+        sums += [block_sum, group_sum]
+        squares += [block_squares, group_squares]
+        position_a, position_b = end_a, end_b
+    return math.fsum(sums), math.fsum(squares)
+
+
+def cucconi_test_out_of_core(a: Union[npt.ArrayLike, str, os.PathLike], b: Union[npt.ArrayLike, str, os.PathLike],
+                             ties: str = 'average', memory: int = 2 ** 28,
+                             temporary_directory: Optional[Union[str, os.PathLike]] = None) -> CucconiResult:
+    """
+    Method to perform a Cucconi scale-location test on samples larger than the available memory.
+
+    Both samples are sorted with an external merge sort into temporary .npy files and then walked together
+    in blocks, accumulating only the sums of the pooled ranks and squared ranks of the first sample.
+    Ties are ranked exactly, also when a tie group spans several blocks. The p-value is asymptotic.
+    Args:
+        a (np.ndarray or str): vector of observations, typically a numpy.memmap, or a path of a .npy file
+            which is memory-mapped
+        b (np.ndarray or str): vector of observations, typically a numpy.memmap, or a path of a .npy file
+            which is memory-mapped
+        ties (str): string specifying a method to deal with ties in data,
+            possible values are 'average', 'min', 'max' and 'ordinal' as for scipy.stats.rankdata
+        memory (int): approximate budget in bytes of the memory used for the data, the rest stays on disk
+        temporary_directory (str): directory of the temporary sorted runs, by default the system temporary
+            directory. It holds a sorted copy of both samples and, while a sample is merged, also its sorted runs,
+            so it needs space for about twice the size of both samples
+
+    Returns:
+        tuple: namedtuple with test statistic value and the p-value
+
+    Raises:
+        ValueError: if 'ties' is not one of the supported methods
+
+    Examples:
+        >>> np.random.seed(987654321) # set random seed to get the same result
+        >>> sample_a = np.random.normal(loc=0, scale=1, size=100000)
+        >>> sample_b = np.random.normal(loc=0, scale=1.01, size=100000)
+        >>> cucconi_test_out_of_core(sample_a, sample_b, memory=2 ** 20)
+        CucconiResult(statistic=0.07081715437882136, pvalue=0.27548846688376544)
+
+    """
+    if ties not in _OUT_OF_CORE_TIES:
+        raise ValueError(f"Unknown method for ranking, possible values are {list(_OUT_OF_CORE_TIES)},"
+                         f" but {ties} was provided")
+    a, b = map(_as_array, (a, b))
+    dtype = np.result_type(a.dtype, b.dtype)
+    block = max(memory // (_BLOCK_COPIES * dtype.itemsize), 1)
+
+    n1 = len(a)
+    n2 = len(b)
+    n = n1 + n2
+    with tempfile.TemporaryDirectory(dir=temporary_directory) as directory:
+        sorted_a = _external_sort(a, Path(directory), 'a', block)
+        sorted_b = _external_sort(b, Path(directory), 'b', block)
+        sum_ranks, sum_sq = _sorted_rank_sums(sorted_a, sorted_b, block, ties)
+        del sorted_a, sorted_b
+
+    sum_rev_sq = n1 * (n + 1) ** 2 - 2 * (n + 1) * sum_ranks + sum_sq
+    test_statistics = _cucconi_statistic_from_sums(sum_sq, sum_rev_sq, n1, n2)
+
+    return CucconiResult(statistic=test_statistics, pvalue=_cucconi_asymptotic_pvalue(test_statistics, n))
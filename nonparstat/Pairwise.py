@@ -0,0 +1,174 @@
+import os
+from collections import namedtuple
+from typing import Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+from scipy.stats import rankdata
+
+from nonparstat.Cucconi import (_cucconi_asymptotic_pvalue, _cucconi_batch_dist, _cucconi_multisample_data,
+                                _cucconi_statistics_from_ranks, cucconi_null_distribution)
+from nonparstat.Ranking import _rankdata_rows
+from nonparstat.Resampling import RandomState, _seed_sequence, _ASYMPTOTIC_MIN_SIZE
+
+CucconiPairwiseResult = namedtuple('CucconiPairwiseResult', ('statistic', 'pvalue', 'adjusted_pvalue'))
+
+
+def _holm(p_values: npt.NDArray) -> npt.NDArray:
+    m = len(p_values)
+    order = np.argsort(p_values)
+    adjusted = np.empty(m)
+    adjusted[order] = np.maximum.accumulate((m - np.arange(m)) * p_values[order])
+    return np.minimum(adjusted, 1)
+
+
+def _bonferroni(p_values: npt.NDArray) -> npt.NDArray:
+    return np.minimum(len(p_values) * p_values, 1)
+
+
+def _benjamini_hochberg(p_values: npt.NDArray) -> npt.NDArray:
+    m = len(p_values)
+    order = np.argsort(p_values)[::-1]
+    adjusted = np.empty(m)
+    adjusted[order] = np.minimum.accumulate(m / np.arange(m, 0, -1) * p_values[order])
+    return np.minimum(adjusted, 1)
+
+
+# adjustments of a vector of p-values for multiple comparisons
+_ADJUSTMENTS = {
+    'holm': _holm,
+    'bonferroni': _bonferroni,
+    'benjamini-hochberg': _benjamini_hochberg,
+    None: lambda p_values: p_values,
+}
+
+
+def _cucconi_pairwise_pvalues(alldata: npt.NDArray, n1: int, test_statistics: npt.NDArray, method: str,
+                              replications: int, ties: str, n_jobs: int, random_state: RandomState,
+                              seed: np.random.SeedSequence,
+                              cache: Union[bool, str, os.PathLike]) -> npt.NDArray:
+    # p-values of pairs with the same sample sizes, given as rows of their pooled observations. The null depends only
+    # on the sorted dense ranks of the pooled pair, so it is resampled once per distinct configuration
+    n = alldata.shape[1]
+    configurations, inverse = np.unique(np.sort(_rankdata_rows(alldata, method='dense'), axis=1), axis=0,
+                                        return_inverse=True)
+    inverse = inverse.ravel()
+    # the untied configuration is the only one with n distinct values, its null may come from the cache
+    cached = configurations[:, -1] == n if cache is not False else np.zeros(len(configurations), dtype=bool)
+
+    p_values = np.empty(len(alldata))
+    if np.any(cached):
+        h0_distribution = cucconi_null_distribution(n1, n - n1, method=method, replications=replications, ties=ties,
+                                                    n_jobs=n_jobs, random_state=random_state,
+                                                    cache_dir=None if cache is True else cache)
+        selected = inverse == np.flatnonzero(cached)[0]
+        p_values[selected] = h0_distribution.pvalue(test_statistics[selected])
+    if not np.all(cached):
+        resampled = np.flatnonzero(~cached)
+        h0_distributions = _cucconi_batch_dist(configurations[resampled], n1=n1, method=method,
+                                               replications=replications, ties=ties, n_jobs=n_jobs, random_state=seed)
+        for configuration, h0_distribution in zip(resampled, h0_distributions):
+            selected = inverse == configuration
+            exceedances = replications - np.searchsorted(h0_distribution, test_statistics[selected])
+            p_values[selected] = (exceedances + 1) / (replications + 1)
+    return p_values
+
+
+def cucconi_pairwise(samples: Union[list[npt.NDArray], npt.NDArray], method: str = 'bootstrap',
+                     replications: int = 1000, ties: str = 'average', adjustment: Optional[str] = 'holm',
+                     n_jobs: int = 1, random_state: RandomState = None, cache: Union[bool, str, os.PathLike] = False,
+                     offsets: Optional[npt.ArrayLike] = None) -> CucconiPairwiseResult:
+    """
+    Method to perform the two-sample Cucconi test on all pairs of samples, e.g. as a post-hoc analysis
+    after a rejection by the multisample test.
+
+    The pooled observations are ranked once and the pairs are processed together per pair of sample sizes.
+    Resampling is invariant to monotone transformations of the pooled pair, so all pairs with the same sizes and
+    the same tie pattern share one null distribution, evaluated on the same resampled indices; without ties this
+    is a single null per pair of sizes.
+    Args:
+        samples (List[numpy.ndarray] or numpy.ndarray): list of observation vectors, or all observations
+            concatenated into one vector if 'offsets' is given
+        method (str): method for determining p-value,
+            possible values are 'bootstrap', 'permutation', 'asymptotic' and 'auto'. 'auto' selects
+            'asymptotic' when all samples are large and 'permutation' otherwise
+        replications (int): number of bootstrap replications
+        ties (str): string specifying a method to deal with ties in data,
+            possible values as for scipy.stats.rankdata
+        adjustment (str): method adjusting the p-values for the k (k - 1) / 2 comparisons, possible values are
+            'holm', 'bonferroni', 'benjamini-hochberg' and None
+        n_jobs (int): the maximum number of concurrently running jobs. If -1 all CPUs are used. If 1 is given,
+            no parallel computing code is used at all. For n_jobs below -1, (n_cpus + 1 + n_jobs) are used.
+            None is a marker for ‘unset’ that will be interpreted as n_jobs=1 (sequential execution)
+        random_state ({None, int, numpy.random.Generator, numpy.random.RandomState, numpy.random.SeedSequence}):
+            seed or generator of the resampling. If None, the seed is drawn from the global numpy.random state
+        cache (bool or str): whether to take the nulls of pairs without ties from the cache of null distributions,
+            shared with cucconi_test, as for cucconi_test
+        offsets (numpy.ndarray): optional start index of every sample in the vector 'samples',
+            as for cucconi_multisample_test
+
+    Returns:
+        tuple: namedtuple with (k x k) matrices of the test statistic values, p-values and adjusted p-values.
+            Entry (i, j) with i < j is the test of samples i and j in this order, the lower triangle mirrors
+            the upper one and the diagonal is NaN
+
+    Raises:
+        ValueError: if 'method' or 'adjustment' parameter is not specified to one of the possible values,
+            or if fewer than two samples are given
+
+    Examples:
+        >>> np.random.seed(987654321) # set random seed to get the same result
+        >>> samples = [np.random.normal(loc=0, scale=scale, size=50) for scale in (1, 1, 5)]
+        >>> result = cucconi_pairwise(samples, method='permutation', random_state=0)
+        >>> result.pvalue
+        array([[       nan, 0.13786214, 0.000999  ],
+               [0.13786214,        nan, 0.000999  ],
+               [0.000999  , 0.000999  ,        nan]])
+        >>> result.adjusted_pvalue
+        array([[       nan, 0.13786214, 0.002997  ],
+               [0.13786214,        nan, 0.002997  ],
+               [0.002997  , 0.002997  ,        nan]])
+
+    """
+    if method not in ('bootstrap', 'permutation', 'asymptotic', 'auto'):
+        raise ValueError(
+            f"Unknown method for constructing the distribution, "
+            f"possible values are ['bootstrap', 'permutation', 'asymptotic', 'auto'], but {method} was provided")
+    if adjustment not in _ADJUSTMENTS:
+        raise ValueError(f"Unknown adjustment, possible values are {list(_ADJUSTMENTS)}, but {adjustment} was provided")
+
+    data, n_i = _cucconi_multisample_data(samples, offsets)
+    k = len(n_i)
+    if k < 2:
+        raise ValueError(f"At least two samples are required, but {k} was provided")
+    if method == 'auto':
+        method = 'asymptotic' if np.min(n_i) >= _ASYMPTOTIC_MIN_SIZE else 'permutation'
+
+    # ranks within a pair are a monotone function of the pooled dense ranks, so these replace the observations
+    groups = np.split(rankdata(data, method='dense').astype(np.int64), np.cumsum(n_i)[:-1])
+    first, second = np.triu_indices(k, 1)
+    sizes, pair_sizes = np.unique(np.stack((n_i[first], n_i[second]), axis=1), axis=0, return_inverse=True)
+    pair_sizes = pair_sizes.ravel()
+    seeds = _seed_sequence(random_state).spawn(len(sizes))
+
+    test_statistics = np.empty(len(first))
+    p_values = np.empty(len(first))
+    for size, ((n1, n2), seed) in enumerate(zip(sizes, seeds)):
+        pairs = np.flatnonzero(pair_sizes == size)
+        alldata = np.stack([np.concatenate((groups[first[pair]], groups[second[pair]])) for pair in pairs])
+        test_statistics[pairs] = _cucconi_statistics_from_ranks(_rankdata_rows(alldata, method=ties)[:, :n1],
+                                                                n1 + n2)
+        if method == 'asymptotic':
+            p_values[pairs] = _cucconi_asymptotic_pvalue(test_statistics[pairs], n1 + n2)
+        else:
+            p_values[pairs] = _cucconi_pairwise_pvalues(alldata, n1, test_statistics[pairs], method=method,
+                                                        replications=replications, ties=ties, n_jobs=n_jobs,
+                                                        random_state=random_state, seed=seed, cache=cache)
+
+    def matrix(values):
+        result = np.full((k, k), np.nan)
+        result[first, second] = result[second, first] = values
+        return result
+
+    return CucconiPairwiseResult(statistic=matrix(test_statistics), pvalue=matrix(p_values),
+                                 adjusted_pvalue=matrix(_ADJUSTMENTS[adjustment](p_values)))
@@ -0,0 +1,139 @@
+from collections import namedtuple
+from typing import Callable, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from nonparstat.Cucconi import _cucconi_statistics_from_ranks
+from nonparstat.Lepage import _lepage_moments, _lepage_statistics_from_ranks
+from nonparstat.PodgorGastwirth import _podgor_gastwirth_moments, _podgor_gastwirth_statistic_from_sums
+from nonparstat.Resampling import (RandomState, _pooled_ranks, _permuted_ranks, _random_permutations,
+                                   _random_subsets, _resample)
+
+PanelResult = namedtuple('PanelResult', ('tests', 'statistic', 'pvalue', 'adjusted_pvalue'))
+
+
+def _cucconi_panel_statistics(ranked: npt.NDArray, n1: int) -> Callable[[npt.NDArray], npt.NDArray]:
+    n = len(ranked)
+
+    def statistics(a_ranks):
+        return _cucconi_statistics_from_ranks(a_ranks, n)
+
+    return statistics
+
+
+def _lepage_panel_statistics(ranked: npt.NDArray, n1: int) -> Callable[[npt.NDArray], npt.NDArray]:
+    n = len(ranked)
+    moments = _lepage_moments(ranked, n1)
+
+    def statistics(a_ranks):
+        return _lepage_statistics_from_ranks(a_ranks, n, moments)
+
+    return statistics
+
+
+def _podgor_gastwirth_panel_statistics(ranked: npt.NDArray, n1: int) -> Callable[[npt.NDArray], npt.NDArray]:
+    n = len(ranked)
+    moments = _podgor_gastwirth_moments(ranked)
+
+    def statistics(a_ranks):
+        return _podgor_gastwirth_statistic_from_sums(np.sum(a_ranks, axis=-1), np.sum(np.square(a_ranks), axis=-1),
+                                                     n1, n, moments)
+
+    return statistics
+
+
+# factories of the statistics of the first-sample ranks, given the pooled ranks and the first sample size
+_PANEL_TESTS = {
+    'cucconi': _cucconi_panel_statistics,
+    'lepage': _lepage_panel_statistics,
+    'podgor_gastwirth': _podgor_gastwirth_panel_statistics,
+}
+
+
+def _minp_adjusted_pvalues(h0_statistics: npt.NDArray, test_statistics: npt.NDArray,
+                           p_values: npt.NDArray) -> npt.NDArray:
+    # single-step minP: every replicate gets its own p-value within the pool of the replicates and the observed
+    # statistic of each test, the observed p-values are compared with the distribution of their minima over tests
+    replications = h0_statistics.shape[0]
+    h0_pvalues = np.empty(h0_statistics.shape)
+    for test, h0_statistic in enumerate(h0_statistics.T):
+        h0_pvalues[:, test] = (replications - np.searchsorted(np.sort(h0_statistic), h0_statistic, side='left')
+                               + (test_statistics[test] >= h0_statistic))
+    h0_minp = np.sort(np.min(h0_pvalues, axis=1) / (replications + 1))
+    exceedances = np.searchsorted(h0_minp, p_values, side='right')
+    return np.maximum((exceedances + 1) / (replications + 1), p_values)
+
+
+def location_scale_panel(a: npt.NDArray, b: npt.NDArray,
+                         tests: Sequence[str] = ('cucconi', 'lepage', 'podgor_gastwirth'),
+                         replications: int = 1000, ties: str = 'average', n_jobs: int = 1,
+                         random_state: RandomState = None) -> PanelResult:
+    """
+    Method to perform several location-scale tests on the same pair of samples at once.
+
+    The pooled sample is ranked once and one set of permutation replicates is drawn, on which all requested
+    statistics are evaluated. The p-values of all tests are permutation p-values on these shared replicates,
+    which also yields the minP (Westfall-Young single-step) p-values adjusted for testing several hypotheses.
+    Args:
+        a (np.ndarray): vector of observations
+        b (np.ndarray): vector of observations
+        tests (Sequence[str]): tests to perform, possible values are 'cucconi', 'lepage' and 'podgor_gastwirth'
+        replications (int): number of permutation replications
+        ties (str): string specifying a method to deal with ties in data,
+            possible values as for scipy.stats.rankdata
+        n_jobs (int): the maximum number of concurrently running jobs. If -1 all CPUs are used. If 1 is given,
+            no parallel computing code is used at all. For n_jobs below -1, (n_cpus + 1 + n_jobs) are used.
+            None is a marker for ‘unset’ that will be interpreted as n_jobs=1 (sequential execution)
+        random_state ({None, int, numpy.random.Generator, numpy.random.RandomState, numpy.random.SeedSequence}):
+            seed or generator of the resampling, the same seed gives the same permutations as the single tests
+            with method='permutation'. If None, the seed is drawn from the global numpy.random state
+
+    Returns:
+        tuple: namedtuple with the names of the tests and vectors of test statistic values, p-values
+            and minP adjusted p-values in the same order
+
+    Raises:
+        ValueError: if 'tests' is empty or contains an unknown test
+
+    Examples:
+        >>> np.random.seed(987654321) # set random seed to get the same result
+        >>> sample_a = np.random.normal(loc=0, scale=1, size=100)
+        >>> sample_b = np.random.normal(loc=0, scale=1.3, size=100)
+        >>> result = location_scale_panel(sample_a, sample_b, random_state=0)
+        >>> result.tests
+        ('cucconi', 'lepage', 'podgor_gastwirth')
+        >>> result.pvalue
+        array([0.02397602, 0.03396603, 0.02397602])
+        >>> result.adjusted_pvalue
+        array([0.02697303, 0.03796204, 0.02697303])
+
+    """
+    tests = tuple(tests)
+    unknown = [test for test in tests if test not in _PANEL_TESTS]
+    if not tests or unknown:
+        raise ValueError(f"Unknown tests, possible values are {list(_PANEL_TESTS)}, but {list(tests)} was provided")
+
+    a, b = map(np.asarray, (a, b))
+    n1 = len(a)
+    n = n1 + len(b)
+    ranked, codes = _pooled_ranks(np.concatenate((a, b)), ties=ties)
+    statistics = [_PANEL_TESTS[test](ranked, n1) for test in tests]
+
+    def evaluate(a_ranks):
+        return np.stack([statistic(a_ranks) for statistic in statistics], axis=-1)
+
+    def permuted_tests(rng, size):
+        if codes is None:
+            a_ranks = ranked[_random_subsets(rng, n, n1, size)]
+        else:
+            a_ranks = _permuted_ranks(ranked, codes, _random_permutations(rng, n, size))[:, :n1]
+        return evaluate(a_ranks)
+
+    test_statistics = evaluate(ranked[np.newaxis, :n1])[0]
+    h0_statistics = _resample(permuted_tests, replications=replications, row_size=n, n_jobs=n_jobs,
+                              random_state=random_state)
+    p_values = (np.sum(h0_statistics >= test_statistics, axis=0) + 1) / (replications + 1)
+
+    return PanelResult(tests=tests, statistic=test_statistics, pvalue=p_values,
+                       adjusted_pvalue=_minp_adjusted_pvalues(h0_statistics, test_statistics, p_values))
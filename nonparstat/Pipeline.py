@@ -0,0 +1,304 @@
+import argparse
+import os
+import tempfile
+from pathlib import Path
+from typing import Hashable, Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+from nonparstat.Cucconi import cucconi_test_batch
+from nonparstat.Lepage import lepage_test_batch
+from nonparstat.PodgorGastwirth import podgor_gastwirth_test_batch
+from nonparstat.Resampling import RandomState, _seed_sequence
+
+# suffixes of Arrow IPC files, any other file is read and written as Parquet
+_ARROW_SUFFIXES = ('.arrow', '.feather', '.ipc')
+
+
+def _cucconi_batch(a, b, method, replications, ties, n_jobs, random_state):
+    return cucconi_test_batch(a, b, method=method, replications=replications, ties=ties, n_jobs=n_jobs,
+                              random_state=random_state)
+
+
+def _lepage_batch(a, b, method, replications, ties, n_jobs, random_state):
+    return lepage_test_batch(a, b, method=method, replications=replications, ties=ties, n_jobs=n_jobs,
+                             random_state=random_state)
+
+
+def _podgor_gastwirth_batch(a, b, method, replications, ties, n_jobs, random_state):
+    return podgor_gastwirth_test_batch(a, b, ties=ties)
+
+
+# batch tests of the pipeline, called with the matrices of the first and second samples of equally sized pairs
+_PIPELINE_TESTS = {
+    'cucconi': _cucconi_batch,
+    'lepage': _lepage_batch,
+    'podgor_gastwirth': _podgor_gastwirth_batch,
+}
+# methods accepted by the batch tests, the Podgor-Gastwirth test ignores the method and is always asymptotic
+_PIPELINE_METHODS = {
+    'cucconi': ('asymptotic', 'permutation', 'bootstrap'),
+    'lepage': ('asymptotic', 'permutation'),
+    'podgor_gastwirth': ('asymptotic', 'permutation', 'bootstrap'),
+}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError("Reading and writing columnar files requires pyarrow, install it with "
+                          "'pip install NonParStat[parquet]'") from error
+    return pyarrow
+
+
+def _is_arrow(path: Union[str, os.PathLike]) -> bool:
+    return Path(path).suffix.lower() in _ARROW_SUFFIXES
+
+
+def _schema(path: Union[str, os.PathLike]):
+    pa = _pyarrow()
+    if _is_arrow(path):
+        return pa.ipc.open_file(pa.memory_map(str(path))).schema
+    return pa.parquet.read_schema(path)
+
+
+def _row_groups(source: Union[str, os.PathLike], group_column: str, value_column: str) -> Iterator[tuple]:
+    # yields the group and value columns of every Parquet row group or Arrow record batch; Arrow files are
+    # memory-mapped, so their value columns are read without copying
+    pa = _pyarrow()
+    if _is_arrow(source):
+        reader = pa.ipc.open_file(pa.memory_map(str(source)))
+        for index in range(reader.num_record_batches):
+            batch = reader.get_batch(index)
+            yield batch.column(group_column), batch.column(value_column)
+    else:
+        parquet_file = pa.parquet.ParquetFile(source)
+        for index in range(parquet_file.num_row_groups):
+            table = parquet_file.read_row_group(index, columns=[group_column, value_column])
+            yield table.column(group_column).combine_chunks(), table.column(value_column).combine_chunks()
+
+
+def _read_groups(source: Union[str, os.PathLike], group_column: str, value_column: str,
+                 labels: Optional[set] = None) -> dict:
+    """
+    Collect the observations of the groups of a columnar file, one row group at a time.
+
+    Only the group and value columns are read, but the observations of all collected groups are held in memory
+    at once, as the tests rank the whole groups. Groups stored as whole Arrow record batches are kept as views of
+    the memory-mapped file instead of copies.
+    Args:
+        source (str): path of a Parquet or Arrow IPC file
+        group_column (str): name of the column with the group labels
+        value_column (str): name of the numeric column with the observations
+        labels (set): optional labels of the groups to collect, the observations of other groups are dropped
+            row group by row group. If None, all groups are collected
+
+    Returns:
+        dict: vector of observations of every collected group label, in the order of the first appearance
+            of the groups
+
+    Raises:
+        ValueError: if the value column contains missing values
+    """
+    pa = _pyarrow()
+    chunks = {}
+    for keys, values in _row_groups(source, group_column, value_column):
+        if values.null_count:
+            raise ValueError(f"Column '{value_column}' contains missing values")
+        values = values.to_numpy(zero_copy_only=True)
+        encoded = pa.compute.dictionary_encode(keys)
+        batch_labels = encoded.dictionary.to_pylist()
+        if len(batch_labels) == 1:
+            # files written group by group have a single group per row group, whose column is used as is
+            if labels is None or batch_labels[0] in labels:
+                chunks.setdefault(batch_labels[0], []).append(values)
+            continue
+        codes = encoded.indices.to_numpy()
+        order = np.argsort(codes, kind='stable')
+        split = np.cumsum(np.bincount(codes, minlength=len(batch_labels)))[:-1]
+        for label, chunk in zip(batch_labels, np.split(values[order], split)):
+            if labels is None or label in labels:
+                chunks.setdefault(label, []).append(chunk)
+    return {label: chunk[0] if len(chunk) == 1 else np.concatenate(chunk) for label, chunk in chunks.items()}
+
+
+def _write_atomically(destination: Union[str, os.PathLike], schema, tables: Iterator) -> None:
+    # the tables are written to a temporary file next to the destination, which replaces the destination only
+    # once all of them are written, so a failing test leaves no truncated output behind
+    pa = _pyarrow()
+    destination = Path(destination)
+    descriptor, temporary = tempfile.mkstemp(suffix=destination.suffix, prefix=f'.{destination.name}.',
+                                             dir=destination.parent)
+    os.close(descriptor)
+    try:
+        if _is_arrow(destination):
+            writer = pa.ipc.new_file(temporary, schema)
+        else:
+            writer = pa.parquet.ParquetWriter(temporary, schema)
+        with writer:
+            for table in tables:
+                writer.write_table(table)
+        os.replace(temporary, destination)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def _comparisons(labels: list, pairs: Optional[Sequence[tuple]], reference: Optional[Hashable]) -> list[tuple]:
+    if pairs is not None and reference is not None:
+        raise ValueError("At most one of 'pairs' and 'reference' can be given")
+    if reference is not None:
+        if reference not in labels:
+            raise ValueError(f"Unknown reference group {reference}")
+        return [(reference, label) for label in labels if label != reference]
+    if pairs is None:
+        return [(labels[i], labels[j]) for i in range(len(labels)) for j in range(i + 1, len(labels))]
+    unknown = {label for pair in pairs for label in pair} - set(labels)
+    if unknown:
+        raise ValueError(f"Unknown groups {sorted(map(str, unknown))}")
+    return [tuple(pair) for pair in pairs]
+
+
+def compare_groups(source: Union[str, os.PathLike], destination: Union[str, os.PathLike],
+                   group_column: str = 'group', value_column: str = 'value',
+                   tests: Sequence[str] = ('cucconi', 'podgor_gastwirth'), pairs: Optional[Sequence[tuple]] = None,
+                   reference: Optional[Hashable] = None, method: str = 'asymptotic', replications: int = 1000,
+                   ties: str = 'average', batch_size: int = 1000, n_jobs: int = 1,
+                   random_state: RandomState = None) -> int:
+    """
+    Method to compare the groups of a columnar file with two-sample tests and write the results to another one.
+
+    The file is read one Parquet row group or Arrow record batch at a time and its value column is viewed as
+    a numpy array without copying where Arrow allows it. Comparisons of groups with the same pair of sizes are
+    stacked and evaluated by the batch version of every test, at most 'batch_size' at once, and every batch
+    of results is appended to the output file as its own row group. Only the group and value columns are read,
+    but the observations of all compared groups are held in memory at once. The results are written to
+    a temporary file which replaces 'destination' only when all comparisons succeeded.
+    Requires pyarrow, available with 'pip install NonParStat[parquet]'.
+    Args:
+        source (str): path of the input Parquet file, or of an Arrow IPC file if its suffix is
+            .arrow, .feather or .ipc
+        destination (str): path of the output file, written in the same way
+        group_column (str): name of the column with the group labels
+        value_column (str): name of the numeric column with the observations
+        tests (Sequence[str]): tests to perform, possible values are 'cucconi', 'lepage' and 'podgor_gastwirth'
+        pairs (Sequence[tuple]): optional pairs of group labels to compare
+        reference (Hashable): optional label of a group compared with every other group.
+            If neither 'pairs' nor 'reference' is given, all pairs of groups are compared
+        method (str): method for determining p-value of the Cucconi and Lepage tests, possible values are
+            'asymptotic', 'permutation' and, for the Cucconi test only, 'bootstrap'. The Podgor-Gastwirth test
+            is always asymptotic
+        replications (int): number of replications of the resampling methods
+        ties (str): string specifying a method to deal with ties in data,
+            possible values as for scipy.stats.rankdata
+        batch_size (int): maximal number of comparisons evaluated at once
+        n_jobs (int): the maximum number of concurrently running jobs, as for cucconi_test
+        random_state ({None, int, numpy.random.Generator, numpy.random.RandomState, numpy.random.SeedSequence}):
+            seed or generator of the resampling. If None, the seed is drawn from the global numpy.random state
+
+    Returns:
+        int: number of comparisons written, one row each with the columns 'group_a', 'group_b', 'size_a',
+            'size_b' and '<test>_statistic', '<test>_pvalue' for every test. Rows are ordered by the sizes
+            of the compared groups
+
+    Raises:
+        ValueError: if 'tests' is empty or contains an unknown test, if 'method' is not available for one
+            of the tests, if the value column contains missing values, if both 'pairs' and 'reference' are given
+            or if they refer to unknown groups
+        ImportError: if pyarrow is not installed
+
+    Examples:
+        >>> import tempfile
+        >>> import pyarrow as pa, pyarrow.parquet as pq
+        >>> rng = np.random.default_rng(987654321)
+        >>> table = pa.table({'group': np.repeat(['a', 'b', 'c'], 100),
+        ...                   'value': rng.normal(loc=0, scale=np.repeat([1, 1, 5], 100))})
+        >>> with tempfile.TemporaryDirectory() as directory:
+        ...     pq.write_table(table, f'{directory}/data.parquet', row_group_size=100)
+        ...     compare_groups(f'{directory}/data.parquet', f'{directory}/results.parquet')
+        ...     results = pq.read_table(f'{directory}/results.parquet')
+        3
+        >>> results.column('group_b').to_pylist()
+        ['b', 'c', 'c']
+        >>> results.column('cucconi_pvalue').to_numpy()
+        array([6.98959163e-01, 5.54703067e-20, 1.02469192e-19])
+
+    """
+    tests = tuple(tests)
+    unknown = [test for test in tests if test not in _PIPELINE_TESTS]
+    if not tests or unknown:
+        raise ValueError(f"Unknown tests, possible values are {list(_PIPELINE_TESTS)}, but {list(tests)} was provided")
+    for test in tests:
+        if method not in _PIPELINE_METHODS[test]:
+            raise ValueError(f"Unknown method for the {test} test, possible values are"
+                             f" {list(_PIPELINE_METHODS[test])}, but {method} was provided")
+    pa = _pyarrow()
+
+    # with explicit pairs only their groups are kept in memory
+    wanted = None if pairs is None or reference is not None else {label for pair in pairs for label in pair}
+    groups = _read_groups(source, group_column, value_column, labels=wanted)
+    comparisons = _comparisons(list(groups), pairs, reference)
+    sizes = np.array([(len(groups[first]), len(groups[second])) for first, second in comparisons], dtype=np.int64)
+    # comparisons of groups with the same sizes are consecutive, so they can be stacked into matrices
+    order = np.lexsort(sizes.reshape(-1, 2).T[::-1])
+    batches = [order[start:start + max(batch_size, 1)] for start in range(0, len(order), max(batch_size, 1))]
+    batches = [part for batch in batches
+               for part in np.split(batch, np.flatnonzero(np.any(np.diff(sizes[batch], axis=0), axis=1)) + 1)]
+    seeds = _seed_sequence(random_state).spawn(len(batches))
+
+    label_type = _schema(source).field(group_column).type
+    schema = pa.schema([('group_a', label_type), ('group_b', label_type), ('size_a', pa.int64()),
+                        ('size_b', pa.int64())]
+                       + [(f'{test}_{column}', pa.float64()) for test in tests for column in ('statistic', 'pvalue')])
+
+    def tables():
+        for batch, seed in zip(batches, seeds):
+            a = np.stack([groups[comparisons[comparison][0]] for comparison in batch])
+            b = np.stack([groups[comparisons[comparison][1]] for comparison in batch])
+            columns = {'group_a': [comparisons[comparison][0] for comparison in batch],
+                       'group_b': [comparisons[comparison][1] for comparison in batch],
+                       'size_a': sizes[batch, 0], 'size_b': sizes[batch, 1]}
+            for test, test_seed in zip(tests, seed.spawn(len(tests))):
+                result = _PIPELINE_TESTS[test](a, b, method=method, replications=replications, ties=ties,
+                                               n_jobs=n_jobs, random_state=test_seed)
+                columns[f'{test}_statistic'] = np.asarray(result.statistic, dtype=float)
+                columns[f'{test}_pvalue'] = np.asarray(result.pvalue, dtype=float)
+            yield pa.table(columns, schema=schema)
+
+    _write_atomically(destination, schema, tables())
+    return len(comparisons)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command line entry point of compare_groups, installed as the 'nonparstat-compare' script."""
+    parser = argparse.ArgumentParser(prog='nonparstat-compare',
+                                     description='Compare the groups of a Parquet or Arrow file with two-sample '
+                                                 'tests and write the statistics and p-values to another file.')
+    parser.add_argument('source', help='input Parquet file, or Arrow IPC file with suffix .arrow, .feather or .ipc')
+    parser.add_argument('destination', help='output file, written in the same format as its suffix indicates')
+    parser.add_argument('--group-column', default='group', help='column with the group labels')
+    parser.add_argument('--value-column', default='value', help='column with the observations')
+    parser.add_argument('--tests', nargs='+', default=['cucconi', 'podgor_gastwirth'], choices=list(_PIPELINE_TESTS))
+    parser.add_argument('--reference', help='compare only this group with every other group')
+    parser.add_argument('--method', default='asymptotic', choices=['asymptotic', 'permutation', 'bootstrap'])
+    parser.add_argument('--replications', type=int, default=1000)
+    parser.add_argument('--ties', default='average', choices=['average', 'min', 'max', 'dense', 'ordinal'])
+    parser.add_argument('--batch-size', type=int, default=1000, help='maximal number of comparisons at once')
+    parser.add_argument('--n-jobs', type=int, default=1)
+    parser.add_argument('--random-state', type=int)
+    args = parser.parse_args(argv)
+
+    reference = args.reference
+    if reference is not None:
+        # labels of integer group columns are matched as integers
+        if _pyarrow().types.is_integer(_schema(args.source).field(args.group_column).type):
+            reference = int(reference)
+    written = compare_groups(args.source, args.destination, group_column=args.group_column,
+                             value_column=args.value_column, tests=args.tests, reference=reference,
+                             method=args.method, replications=args.replications, ties=args.ties,
+                             batch_size=args.batch_size, n_jobs=args.n_jobs, random_state=args.random_state)
+    print(f'{written} comparisons written to {args.destination}')
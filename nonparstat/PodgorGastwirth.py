@@ -2,27 +2,94 @@ import numpy as np
 from scipy.stats import rankdata, f
 from collections import namedtuple
 
+from nonparstat.Ranking import _frequency_rank_sums, _frequency_ranks, _frequency_table, _rankdata_rows
+
 Podgor_GastwirthResult = namedtuple('Podgor_GastwirthResult', ('statistic', 'pvalue'))
 
 
+def _podgor_gastwirth_check_ranks(n, mean_squares, sum_xx):
+    # a pooled sample with a single distinct rank carries no information about the samples
+    if np.any(sum_xx <= 1e-12 * n * mean_squares):
+        raise ValueError("All observations are equal, the Podgor-Gastwirth test is undefined")
+
+
+def _podgor_gastwirth_quadratic(sum_yy, sum_ss):
+    # with two distinct ranks the squared ranks are a linear function of the ranks, so the quadratic term is
+    # dropped, which is marked by an infinite sum_yy, and the F statistic has a single numerator degree of freedom
+    return np.where(sum_yy <= 1e-10 * sum_ss, np.inf, sum_yy)
+
+
+def _podgor_gastwirth_moments(ranked):
+    # the regression of the first-sample indicator on (1, r, r^2) is projected onto the orthogonal basis
+    # (1, x, y) with x = r - mean(r) and y = r^2 - mean(r^2) - beta * x, which avoids inverting the
+    # ill-conditioned normal equations; only these pooled moments and two sums over the first sample are needed
+    mean_ranks = np.mean(ranked, axis=-1, keepdims=True)
+    centered = ranked - mean_ranks
+    squares = np.square(ranked)
+    mean_squares = np.mean(squares, axis=-1, keepdims=True)
+    sum_xx = np.sum(np.square(centered), axis=-1)
+    _podgor_gastwirth_check_ranks(ranked.shape[-1], mean_squares[..., 0], sum_xx)
+    beta = np.sum((squares - mean_squares) * centered, axis=-1) / sum_xx
+    sum_yy = np.sum(np.square(squares - mean_squares - beta[..., np.newaxis] * centered), axis=-1)
+    sum_ss = np.sum(np.square(squares - mean_squares), axis=-1)
+    return mean_ranks[..., 0], mean_squares[..., 0], sum_xx, beta, _podgor_gastwirth_quadratic(sum_yy, sum_ss)
+
+
+def _podgor_gastwirth_frequency_moments(ranks, totals, ties):
+    # the moments of _podgor_gastwirth_moments with the rank of every distinct value weighted by its count
+    n = float(np.sum(totals))
+    if ties == 'ordinal':
+        # the pooled ordinal ranks are 1, ..., n whatever the data
+        mean_squares, sum_xx = (n + 1) * (2 * n + 1) / 6, n * (n ** 2 - 1) / 12
+        _podgor_gastwirth_check_ranks(n, mean_squares, sum_xx)
+        sum_yy = n * (n ** 2 - 1) * (n ** 2 - 4) / 180
+        sum_ss = n * (n ** 2 - 1) * (16 * n ** 2 + 30 * n + 11) / 180
+        return (n + 1) / 2, mean_squares, sum_xx, n + 1, _podgor_gastwirth_quadratic(sum_yy, sum_ss)
+    mean_ranks = np.sum(totals * ranks) / n
+    centered = ranks - mean_ranks
+    squares = np.square(ranks)
+    mean_squares = np.sum(totals * squares) / n
+    sum_xx = np.sum(totals * np.square(centered))
+    _podgor_gastwirth_check_ranks(n, mean_squares, sum_xx)
+    beta = np.sum(totals * (squares - mean_squares) * centered) / sum_xx
+    sum_yy = np.sum(totals * np.square(squares - mean_squares - beta * centered))
+    sum_ss = np.sum(totals * np.square(squares - mean_squares))
+    return mean_ranks, mean_squares, sum_xx, beta, _podgor_gastwirth_quadratic(sum_yy, sum_ss)
+
+
+def _podgor_gastwirth_df(moments):
+    # numerator degrees of freedom, 1 where the quadratic term of the regression was dropped
+    return np.where(np.isinf(moments[4]), 1, 2)
+
+
+def _podgor_gastwirth_statistic_from_sums(sum_ranks, sum_squares, n1, n, moments):
+    mean_ranks, mean_squares, sum_xx, beta, sum_yy = moments
+    sum_x = sum_ranks - n1 * mean_ranks
+    sum_y = sum_squares - n1 * mean_squares - beta * sum_x
+    explained = np.square(sum_x) / sum_xx + np.square(sum_y) / sum_yy
+    df1 = _podgor_gastwirth_df(moments)
+    numerator = explained / df1
+    denumerator = (n1 - n1 ** 2 / n - explained) / (n - 1 - df1)
+    return numerator / denumerator
+
+
+def _podgor_gastwirth_statistics_from_ranks(ranked, n1):
+    # statistics together with their numerator degrees of freedom
+    n = ranked.shape[-1]
+    a_ranks = ranked[..., :n1]
+    moments = _podgor_gastwirth_moments(ranked)
+    return (_podgor_gastwirth_statistic_from_sums(np.sum(a_ranks, axis=-1), np.sum(np.square(a_ranks), axis=-1),
+                                                  n1, n, moments), _podgor_gastwirth_df(moments))
+
+
 def _podgor_gastwirth_test_statistic(a, b, ties='average'):
-    n1 = len(a)
-    n2 = len(b)
-    n = n1 + n2
     alldata = np.concatenate((a, b))
     ranked = rankdata(alldata, method=ties)
-    ranked_sq = np.square(ranked)
-    I_vector = np.hstack([np.repeat(1, n1), np.repeat(0, n2)])
-    S_matrix = np.vstack([np.repeat(1, n), ranked, ranked_sq])
-    b_vector = np.matmul(np.linalg.inv(np.matmul(S_matrix, S_matrix.T)), np.matmul(S_matrix, I_vector))
-    numerator = (np.matmul(b_vector.T, np.matmul(S_matrix, I_vector)) - n1 ** 2 / n) / 2
-    denumerator = (n1 - np.matmul(b_vector.T, np.matmul(S_matrix, I_vector))) / (n - 3)
-    return numerator / denumerator
+    return _podgor_gastwirth_statistics_from_ranks(ranked, len(a))
 
 
-def _podgor_gastwirth_dist(a, b, x):
-    df1 = 2
-    df2 = len(a) + len(b) - 3
+def _podgor_gastwirth_dist(x, n, df1):
+    df2 = n - 1 - df1
     return f.cdf(x=x, dfn=df1, dfd=df2)
 
 
@@ -42,13 +109,98 @@ def podgor_gastwirth_test(a, b, ties='average'):
         >>> np.random.seed(987654321) # set random seed to get the same result
         >>> sample_a = sample_b = np.random.normal(loc=0, scale=1, size=100)
         >>> podgor_gastwirth_test(sample_a, sample_b)
-        Podgor_GastwirthResult(statistic=-1.9596768652263527e-13, pvalue=1.0)
+        Podgor_GastwirthResult(statistic=0.0, pvalue=1.0)
 
     """
     a, b = map(np.asarray, (a, b))
 
-    test_statistics = _podgor_gastwirth_test_statistic(a, b, ties=ties)
+    test_statistics, df1 = _podgor_gastwirth_test_statistic(a, b, ties=ties)
+
+    p_value = 1 - _podgor_gastwirth_dist(test_statistics, len(a) + len(b), df1)
+
+    return Podgor_GastwirthResult(statistic=test_statistics, pvalue=p_value)
+
+
+def podgor_gastwirth_test_batch(a, b, ties='average', chunk_size=None):
+    """
+    Method to perform many independent Podgor-Gastwirth scale-location tests at once.
+    Args:
+        a (np.ndarray): matrix of observations, each row is the first sample of one test
+        b (np.ndarray): matrix of observations with the same number of rows as 'a',
+            each row is the second sample of one test
+        ties (str): string specifying a method to deal with ties in data,
+            possible values as for scipy.stats.rankdata
+        chunk_size (int): maximal number of tests processed together, bounds the memory used by the ranking.
+            If None, all tests are processed together
+
+    Returns:
+        tuple: namedtuple with vectors of test statistic values and p-values, one entry per row
+
+    Raises:
+        ValueError: if 'a' and 'b' have different numbers of rows
+
+    Examples:
+        >>> sample_a = np.random.default_rng(987654321).normal(loc=0, scale=1, size=(3, 100))
+        >>> sample_b = np.random.default_rng(123456789).normal(loc=[[0], [1], [10]], scale=1, size=(3, 100))
+        >>> podgor_gastwirth_test_batch(sample_a, sample_b).pvalue
+        array([3.90595991e-01, 6.79891698e-11, 1.11022302e-16])
+
+    """
+    a, b = map(np.atleast_2d, (a, b))
+    if a.shape[0] != b.shape[0]:
+        raise ValueError(f"Samples must have the same number of rows, but {a.shape[0]} and {b.shape[0]} were provided")
+
+    tests = a.shape[0]
+    chunk_size = tests if chunk_size is None else max(chunk_size, 1)
+    test_statistics = np.empty(tests)
+    df1 = np.empty(tests)
+    for start in range(0, tests, chunk_size):
+        rows = slice(start, start + chunk_size)
+        ranked = _rankdata_rows(np.concatenate((a[rows], b[rows]), axis=1), method=ties)
+        test_statistics[rows], df1[rows] = _podgor_gastwirth_statistics_from_ranks(ranked, a.shape[1])
+
+    p_value = 1 - _podgor_gastwirth_dist(test_statistics, a.shape[1] + b.shape[1], df1)
+
+    return Podgor_GastwirthResult(statistic=test_statistics, pvalue=p_value)
+
+
+def podgor_gastwirth_test_counts(values, counts_a, counts_b, ties='average'):
+    """
+    Method to perform a Podgor-Gastwirth scale-location test on samples given by the counts of their values.
+
+    The test is the same as podgor_gastwirth_test on the samples with every value repeated as many times as it is
+    counted, but the ranks are computed for the distinct values only, so the time and memory scale with their
+    number instead of the number of observations. Useful for discrete data with many ties.
+    Args:
+        values (np.ndarray): vector of observed values
+        counts_a (np.ndarray): vector of numbers of observations of every value in the first sample
+        counts_b (np.ndarray): vector of numbers of observations of every value in the second sample
+        ties (str): string specifying a method to deal with ties in data,
+            possible values as for scipy.stats.rankdata
+
+    Returns:
+        tuple: namedtuple with test statistic value and the p-value
+
+    Raises:
+        ValueError: if the vectors have different lengths, if the counts are not non-negative integers,
+            if a sample has no observations or if there are fewer than 4 observations in total
+
+    Examples:
+        >>> podgor_gastwirth_test_counts([1, 2, 3, 4, 5], [30, 25, 20, 15, 10], [10, 15, 20, 25, 30])
+        Podgor_GastwirthResult(statistic=14.071428571428571, pvalue=1.9399619984872274e-06)
+
+    """
+    counts = _frequency_table(values, counts_a, counts_b)
+    totals = np.sum(counts, axis=0)
+    n1, n = np.sum(counts[0]), np.sum(totals)
+    if n < 4:
+        raise ValueError(f"The test requires at least 4 observations, but {n} were provided")
+
+    ranks = _frequency_ranks(totals, method=ties)
+    sum_ranks, sum_squares = _frequency_rank_sums(ranks, counts[0], method=ties)
+    moments = _podgor_gastwirth_frequency_moments(ranks, totals, ties)
+    test_statistics = _podgor_gastwirth_statistic_from_sums(sum_ranks, sum_squares, n1, n, moments)
 
-    p_value = 1 - _podgor_gastwirth_dist(a, b, test_statistics)
+    p_value = 1 - _podgor_gastwirth_dist(test_statistics, n, _podgor_gastwirth_df(moments))
 
     return Podgor_GastwirthResult(statistic=test_statistics, pvalue=p_value)
@@ -0,0 +1,167 @@
+from collections import namedtuple
+from typing import Callable, Optional, Sequence, Union
+
+import numpy as np
+import numpy.typing as npt
+from joblib import Parallel, delayed
+
+from nonparstat.Cucconi import cucconi_null_distribution, cucconi_test_batch
+from nonparstat.Lepage import lepage_null_distribution, lepage_test_batch
+from nonparstat.NullDistribution import NullDistribution
+from nonparstat.PodgorGastwirth import podgor_gastwirth_test_batch
+from nonparstat.Resampling import RandomState, _chunk_sizes, _seed_sequence
+
+PowerResult = namedtuple('PowerResult', ('tests', 'distributions', 'sizes', 'shifts', 'scales', 'power',
+                                         'standard_error'))
+
+# standardised distributions of the simulated samples, functions of a random generator and the shape of the sample
+_DISTRIBUTIONS = {
+    'normal': lambda rng, shape: rng.standard_normal(shape),
+    'logistic': lambda rng, shape: rng.logistic(size=shape),
+    'laplace': lambda rng, shape: rng.laplace(size=shape),
+    'cauchy': lambda rng, shape: rng.standard_cauchy(shape),
+    'uniform': lambda rng, shape: rng.uniform(-1, 1, size=shape),
+    'exponential': lambda rng, shape: rng.standard_exponential(shape),
+}
+
+
+def _cucconi_power_pvalues(a: npt.NDArray, b: npt.NDArray, ties: str,
+                           null: Optional[NullDistribution]) -> npt.NDArray:
+    result = cucconi_test_batch(a, b, method='asymptotic', ties=ties)
+    return result.pvalue if null is None else null.pvalue(result.statistic)
+
+
+def _lepage_power_pvalues(a: npt.NDArray, b: npt.NDArray, ties: str,
+                          null: Optional[NullDistribution]) -> npt.NDArray:
+    result = lepage_test_batch(a, b, method='asymptotic', ties=ties)
+    return result.pvalue if null is None else null.pvalue(result.statistic)
+
+
+def _podgor_gastwirth_power_pvalues(a: npt.NDArray, b: npt.NDArray, ties: str,
+                                    null: Optional[NullDistribution]) -> npt.NDArray:
+    return podgor_gastwirth_test_batch(a, b, ties=ties).pvalue
+
+
+# p-values of the simulated pairs of samples, given as rows, from their asymptotic or cached permutation null
+_POWER_TESTS = {
+    'cucconi': _cucconi_power_pvalues,
+    'lepage': _lepage_power_pvalues,
+    'podgor_gastwirth': _podgor_gastwirth_power_pvalues,
+}
+# permutation null distributions depending only on the sample sizes, the Podgor-Gastwirth test has none
+_POWER_NULLS = {
+    'cucconi': lambda n1, n2, **kwargs: cucconi_null_distribution(n1, n2, method='permutation', **kwargs),
+    'lepage': lepage_null_distribution,
+}
+
+
+def _power_cell(distribution: Union[str, Callable], n1: int, n2: int, shift: float, scale: float,
+                tests: tuple[str, ...], nulls: list[Optional[NullDistribution]], simulations: int, alpha: float,
+                ties: str, seed: np.random.SeedSequence) -> npt.NDArray:
+    # numbers of rejections of every test among the simulated datasets of one cell of the grid, generated in blocks
+    # of (simulations x sample size) arrays and evaluated by the batch versions of the tests
+    rng = np.random.default_rng(seed)
+    draw = _DISTRIBUTIONS[distribution] if isinstance(distribution, str) else distribution
+    rejections = np.zeros(len(tests), dtype=np.int64)
+    for size in _chunk_sizes(simulations, n1 + n2):
+        a = draw(rng, (size, n1))
+        b = shift + scale * draw(rng, (size, n2))
+        for test, (name, null) in enumerate(zip(tests, nulls)):
+            rejections[test] += np.sum(_POWER_TESTS[name](a, b, ties, null) <= alpha)
+    return rejections
+
+
+def simulate_power(tests: Sequence[str] = ('cucconi', 'podgor_gastwirth'),
+                   distributions: Sequence[Union[str, Callable]] = ('normal',),
+                   sizes: Sequence[Union[int, tuple[int, int]]] = (50,), shifts: Sequence[float] = (0.0,),
+                   scales: Sequence[float] = (1.0,), simulations: int = 1000, alpha: float = 0.05,
+                   method: str = 'permutation', replications: int = 1000, ties: str = 'average', n_jobs: int = 1,
+                   random_state: RandomState = None) -> PowerResult:
+    """
+    Method to estimate the power of the location-scale tests by Monte Carlo simulation over a grid of alternatives.
+
+    In every cell of the grid the first sample is drawn from the standardised distribution and the second one
+    from the same distribution shifted by 'shift' and multiplied by 'scale', so the cells with shift 0 and scale 1
+    estimate the size of the tests. All simulated datasets of a cell are generated as one array and the statistics
+    are evaluated by the batch versions of the tests. Without ties the permutation null distribution depends only
+    on the sample sizes, so it is resampled once per pair of sizes, or taken from the cache of null distributions,
+    instead of once per simulated dataset. The cells are spread over 'n_jobs' workers.
+    Args:
+        tests (Sequence[str]): tests to compare, possible values are 'cucconi', 'lepage' and 'podgor_gastwirth'
+        distributions (Sequence): names of the distributions, possible values are 'normal', 'logistic', 'laplace',
+            'cauchy', 'uniform' and 'exponential', or functions of a numpy.random.Generator and a shape returning
+            an array of that shape of observations of a continuous distribution
+        sizes (Sequence): sample sizes, either a common size of both samples or a pair of sizes
+        shifts (Sequence[float]): location shifts of the second sample
+        scales (Sequence[float]): scale ratios of the second sample to the first one
+        simulations (int): number of simulated datasets per cell of the grid
+        alpha (float): significance level
+        method (str): method for determining the p-values of the Cucconi and Lepage tests, possible values are
+            'permutation' and 'asymptotic'. The Podgor-Gastwirth test is always asymptotic
+        replications (int): number of replications of the permutation null distributions
+        ties (str): string specifying a method to deal with ties in data,
+            possible values as for scipy.stats.rankdata
+        n_jobs (int): the maximum number of concurrently running jobs. If -1 all CPUs are used. If 1 is given,
+            no parallel computing code is used at all. For n_jobs below -1, (n_cpus + 1 + n_jobs) are used.
+            None is a marker for ‘unset’ that will be interpreted as n_jobs=1 (sequential execution)
+        random_state ({None, int, numpy.random.Generator, numpy.random.RandomState, numpy.random.SeedSequence}):
+            seed or generator of the simulations and of the null distributions. The same seed gives the same
+            result for any n_jobs. If None, the seed is drawn from the global numpy.random state
+
+    Returns:
+        tuple: namedtuple with the axes of the grid and the arrays of the estimated rejection rates and of their
+            Monte Carlo standard errors, both of shape (tests, distributions, sizes, shifts, scales), so that
+            e.g. power[t, d, s, :, k] is the power curve of a test over the location shifts
+
+    Raises:
+        ValueError: if 'tests' is empty or contains an unknown test, if 'distributions' contains an unknown name
+            or if 'method' is not specified to 'permutation' or 'asymptotic'
+
+    Examples:
+        >>> result = simulate_power(sizes=[30], shifts=[0, 1], scales=[1, 2], simulations=200, random_state=0)
+        >>> result.power[0, 0, 0]
+        array([[0.045, 0.775],
+               [0.87 , 0.935]])
+        >>> result.standard_error[0, 0, 0]
+        array([[0.01465862, 0.02952753],
+               [0.02378024, 0.01743201]])
+
+    """
+    tests = tuple(tests)
+    unknown = [test for test in tests if test not in _POWER_TESTS]
+    if not tests or unknown:
+        raise ValueError(f"Unknown tests, possible values are {list(_POWER_TESTS)}, but {list(tests)} was provided")
+    if method not in ('permutation', 'asymptotic'):
+        raise ValueError(
+            f"Unknown method for constructing the distribution,"
+            f" possible values are ['permutation', 'asymptotic'], but {method} was provided")
+    unknown = [distribution for distribution in distributions
+               if isinstance(distribution, str) and distribution not in _DISTRIBUTIONS]
+    if unknown:
+        raise ValueError(f"Unknown distributions, possible values are {list(_DISTRIBUTIONS)} or functions,"
+                         f" but {unknown} was provided")
+
+    distributions, shifts, scales = list(distributions), list(shifts), list(scales)
+    sizes = [(size, size) if np.ndim(size) == 0 else tuple(size) for size in sizes]
+    seed = _seed_sequence(random_state)
+    null_seed, cells_seed = seed.spawn(2)
+    # integer seeds reuse the cached nulls of previous simulations and of the tests with the same seed
+    null_state = random_state if isinstance(random_state, (int, np.integer)) else null_seed
+
+    nulls = {}
+    for n1, n2 in sizes:
+        nulls[n1, n2] = [_POWER_NULLS[test](n1, n2, replications=replications, ties=ties, n_jobs=n_jobs,
+                                            random_state=null_state)
+                         if method == 'permutation' and test in _POWER_NULLS else None for test in tests]
+
+    cells = [(distribution, n1, n2, shift, scale) for distribution in distributions for n1, n2 in sizes
+             for shift in shifts for scale in scales]
+    rejections = Parallel(n_jobs=n_jobs)(
+        delayed(_power_cell)(distribution, n1, n2, shift, scale, tests, nulls[n1, n2], simulations, alpha, ties,
+                             cell_seed)
+        for (distribution, n1, n2, shift, scale), cell_seed in zip(cells, cells_seed.spawn(len(cells))))
+
+    shape = (len(distributions), len(sizes), len(shifts), len(scales), len(tests))
+    power = np.moveaxis(np.reshape(rejections, shape) / simulations, -1, 0)
+    return PowerResult(tests=tests, distributions=distributions, sizes=sizes, shifts=shifts, scales=scales,
+                       power=power, standard_error=np.sqrt(power * (1 - power) / simulations))
@@ -0,0 +1,152 @@
+import numpy as np
+import numpy.typing as npt
+
+_TIES_METHODS = ('average', 'min', 'max', 'dense', 'ordinal')
+
+
+def _has_ties(data: npt.NDArray) -> bool:
+    sorted_data = np.sort(data)
+    return bool(np.any(sorted_data[1:] == sorted_data[:-1]))
+
+
+def _rankdata_rows(data: npt.ArrayLike, method: str = 'average') -> npt.NDArray:
+    """
+    Rank every row of a matrix of observations in one vectorized pass.
+    Args:
+        data (np.ndarray): (replications x n) matrix of observations, each row is ranked independently
+        method (str): string specifying a method to deal with ties in data,
+            possible values as for scipy.stats.rankdata
+
+    Returns:
+        np.ndarray: float matrix of ranks, equal to scipy.stats.rankdata(row, method=method) for every row;
+            rows containing NaN are ranked as NaN
+
+    Raises:
+        ValueError: if 'method' is not one of the scipy.stats.rankdata methods
+    """
+    if method not in _TIES_METHODS:
+        raise ValueError(f"Unknown method for ranking, possible values are {list(_TIES_METHODS)},"
+                         f" but {method} was provided")
+    data = np.asarray(data)
+    rows, n = data.shape
+    ranks = np.empty(data.shape, dtype=float)
+    if n == 0:
+        return ranks
+
+    order = np.argsort(data, axis=1, kind='stable')
+    if method == 'ordinal':
+        sorted_ranks = np.broadcast_to(np.arange(1, n + 1, dtype=float), data.shape)
+    else:
+        sorted_data = np.take_along_axis(data, order, axis=1)
+        new_group = np.ones(data.shape, dtype=bool)
+        new_group[:, 1:] = sorted_data[:, 1:] != sorted_data[:, :-1]
+        if method == 'dense':
+            sorted_ranks = np.cumsum(new_group, axis=1, dtype=float)
+        else:
+            flat_new_group = new_group.ravel()
+            starts = np.flatnonzero(flat_new_group)
+            counts = np.diff(np.append(starts, rows * n))
+            first = starts % n + 1
+            if method == 'min':
+                group_ranks = first
+            elif method == 'max':
+                group_ranks = first + counts - 1
+            else:
+                group_ranks = first + (counts - 1) / 2
+            sorted_ranks = group_ranks[np.cumsum(flat_new_group) - 1].reshape(data.shape).astype(float)
+    np.put_along_axis(ranks, order, sorted_ranks, axis=1)
+
+    if np.issubdtype(data.dtype, np.inexact):
+        ranks[np.isnan(data).any(axis=1)] = np.nan
+    return ranks
+
+
+def _frequency_table(values: npt.ArrayLike, counts_a: npt.ArrayLike, counts_b: npt.ArrayLike) -> npt.NDArray:
+    """
+    Merge the frequency tables of two samples into the counts of their distinct values in increasing order.
+    Args:
+        values (np.ndarray): vector of observed values, repeated values are merged
+        counts_a (np.ndarray): vector of numbers of observations of every value in the first sample
+        counts_b (np.ndarray): vector of numbers of observations of every value in the second sample
+
+    Returns:
+        np.ndarray: (2 x u) integer matrix of counts of the u distinct values observed in any of the samples
+
+    Raises:
+        ValueError: if the vectors have different lengths, if 'values' contains NaN, if the counts
+            are not non-negative integers or if a sample has no observations
+    """
+    values, counts_a, counts_b = map(np.asarray, (values, counts_a, counts_b))
+    if not values.ndim == counts_a.ndim == counts_b.ndim == 1 or not len(values) == len(counts_a) == len(counts_b):
+        raise ValueError(f"Values and counts must be vectors of the same length, but lengths {len(values)},"
+                         f" {len(counts_a)} and {len(counts_b)} were provided")
+    if np.issubdtype(values.dtype, np.inexact) and np.any(np.isnan(values)):
+        raise ValueError("Values must not contain NaN")
+    counts = np.stack((counts_a, counts_b))
+    if counts.size and (np.any(counts < 0) or np.any(counts != np.round(counts))):
+        raise ValueError("Counts must be non-negative integers")
+
+    sizes = np.sum(counts, axis=1).astype(np.int64)
+    if np.any(sizes < 1):
+        raise ValueError(f"Both samples must have observations, but their sizes are {sizes.tolist()}")
+
+    distinct, inverse = np.unique(values, return_inverse=True)
+    table = np.zeros((2, len(distinct)), dtype=np.int64)
+    np.add.at(table, (slice(None), inverse), counts.astype(np.int64))
+    return table[:, np.sum(table, axis=0) > 0]
+
+
+def _frequency_ranks(totals: npt.ArrayLike, method: str = 'average') -> npt.NDArray:
+    """
+    Ranks of the distinct values of a pooled sample given by the numbers of their observations.
+    Args:
+        totals (np.ndarray): counts of the distinct values in increasing order along the last axis,
+            every row of a matrix is ranked independently
+        method (str): string specifying a method to deal with ties in data,
+            possible values as for scipy.stats.rankdata
+
+    Returns:
+        np.ndarray: float array with the rank scipy.stats.rankdata gives to the observations of every value,
+            for 'ordinal', which ranks the observations of a value consecutively, the lowest of their ranks
+
+    Raises:
+        ValueError: if 'method' is not one of the scipy.stats.rankdata methods
+    """
+    if method not in _TIES_METHODS:
+        raise ValueError(f"Unknown method for ranking, possible values are {list(_TIES_METHODS)},"
+                         f" but {method} was provided")
+    totals = np.asarray(totals)
+    last = np.cumsum(totals, axis=-1, dtype=float)
+    first = last - totals + 1
+    if method == 'average':
+        return (first + last) / 2
+    if method == 'max':
+        return last
+    if method == 'dense':
+        return np.cumsum(totals > 0, axis=-1, dtype=float)
+    return first
+
+
+def _frequency_rank_sums(ranks: npt.NDArray, counts: npt.NDArray,
+                         method: str = 'average') -> tuple[npt.NDArray, npt.NDArray]:
+    """
+    Sums of the ranks and of the squared ranks of a sample given by its counts of the distinct values.
+
+    For 'ordinal' ranks the observations of the sample precede the equal observations of the other sample,
+    as when ranking the sample concatenated before the other one.
+    Args:
+        ranks (np.ndarray): ranks of the distinct values of the pooled sample, as given by _frequency_ranks
+        counts (np.ndarray): counts of the distinct values in the sample along the last axis
+        method (str): method used to compute 'ranks'
+
+    Returns:
+        tuple: sums of the ranks and of the squared ranks over the last axis
+    """
+    sum_ranks = np.sum(counts * ranks, axis=-1)
+    sum_squares = np.sum(counts * np.square(ranks), axis=-1)
+    if method == 'ordinal':
+        # sum of i and of (r + i)^2 - r^2 for i = 0, ..., k - 1 over the k observations of every value
+        within = counts * (counts - 1) / 2
+        sum_ranks = sum_ranks + np.sum(within, axis=-1)
+        sum_squares = sum_squares + np.sum(within * (2 * ranks + (2 * counts - 1) / 3), axis=-1)
+    return sum_ranks, sum_squares
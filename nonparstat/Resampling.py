@@ -0,0 +1,332 @@
+import contextlib
+from concurrent.futures import Executor
+from math import comb, prod
+from typing import Callable, Iterator, Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+from joblib import Parallel, delayed, effective_n_jobs
+from scipy.stats import beta, rankdata
+
+from nonparstat.Diagnostics import Diagnostics, _timed
+from nonparstat.Ranking import _rankdata_rows
+
+RandomState = Union[None, int, np.random.Generator, np.random.RandomState, np.random.SeedSequence]
+
+# smallest sample size for which method='auto' relies on the asymptotic distribution
+_ASYMPTOTIC_MIN_SIZE = 100
+# upper bound on the number of states of one step of the exact subset-sum distribution, about 50 ms and 20 MB
+_EXACT_STATES = 2 * 10 ** 6
+# upper bound on the number of elements of a single (replications x n) block of resampled data
+_CHUNK_ELEMENTS = 2 ** 22
+# replications are split into about this many blocks, so that every worker gets a few large tasks
+_CHUNKS_PER_CALL = 64
+_MIN_CHUNK_ROWS = 256
+
+
+def _chunk_sizes(replications: int, row_size: int) -> list[int]:
+    rows = max(_MIN_CHUNK_ROWS, -(-replications // _CHUNKS_PER_CALL))
+    rows = max(1, min(rows, _CHUNK_ELEMENTS // max(row_size, 1)))
+    return [min(rows, replications - start) for start in range(0, replications, rows)]
+
+
+def _seed_sequence(random_state: RandomState = None) -> np.random.SeedSequence:
+    """
+    Root seed sequence of the resampling streams.
+    Args:
+        random_state ({None, int, numpy.random.Generator, numpy.random.RandomState, numpy.random.SeedSequence}):
+            if None, the seed is drawn from the global numpy.random state, so numpy.random.seed keeps the
+            results reproducible. Integers and seed sequences are used directly, generators are advanced
+            to draw the seed.
+
+    Returns:
+        numpy.random.SeedSequence: seed sequence to spawn the per-chunk streams from
+
+    Raises:
+        ValueError: if 'random_state' is not one of the supported types
+    """
+    if isinstance(random_state, np.random.SeedSequence):
+        return random_state
+    if isinstance(random_state, (int, np.integer)):
+        return np.random.SeedSequence(int(random_state))
+    if random_state is None:
+        return np.random.SeedSequence(np.random.randint(2 ** 63, size=4, dtype=np.uint64))
+    if isinstance(random_state, np.random.Generator):
+        return np.random.SeedSequence(random_state.integers(2 ** 63, size=4, dtype=np.uint64))
+    if isinstance(random_state, np.random.RandomState):
+        return np.random.SeedSequence(random_state.randint(2 ** 63, size=4, dtype=np.uint64))
+    raise ValueError(f"Unknown type of random_state, possible values are None, int, numpy.random.Generator, "
+                     f"numpy.random.RandomState and numpy.random.SeedSequence, but {random_state!r} was provided")
+
+
+@contextlib.contextmanager
+def _chunk_runner(n_jobs: int = 1, executor: Optional[Executor] = None) -> Iterator[Callable]:
+    """
+    Context of a function evaluating chunk functions on lists of generators and chunk sizes, in order.
+    Args:
+        n_jobs (int): the maximum number of concurrently running jobs, as for joblib.Parallel
+        executor (concurrent.futures.Executor): optional pool replacing joblib, e.g. the persistent pool
+            of a TestSession; it receives the chunk function with every chunk, so it should be cheap to pickle
+
+    Returns:
+        Callable: function of the chunk function, the generators and the chunk sizes returning the list of chunks
+    """
+    if executor is not None:
+        yield lambda statistics, generators, sizes: list(executor.map(statistics, generators, sizes))
+        return
+    with Parallel(n_jobs=n_jobs) as parallel:
+        yield lambda statistics, generators, sizes: parallel(delayed(statistics)(rng, size)
+                                                             for rng, size in zip(generators, sizes))
+
+
+def _resample(statistics: Callable[[np.random.Generator, int], npt.NDArray], replications: int, row_size: int,
+              n_jobs: int = 1, random_state: RandomState = None, diagnostics: Optional[Diagnostics] = None,
+              progress: Optional[Callable[[int, int], None]] = None,
+              executor: Optional[Executor] = None) -> npt.NDArray:
+    """
+    Evaluate resampled statistics in large chunks, each with its own independent random stream.
+
+    The chunk layout depends only on `replications` and `row_size` and every chunk draws from a child of
+    the same seed sequence, so a given `random_state` produces the same replicates for any `n_jobs`.
+    Args:
+        statistics (Callable): function of a random generator and a number of replications returning
+            that many resampled values of the test statistic
+        replications (int): number of replications
+        row_size (int): number of resampled observations per replication, used to bound the chunk memory
+        n_jobs (int): the maximum number of concurrently running jobs, as for joblib.Parallel
+        random_state ({None, int, numpy.random.Generator, numpy.random.RandomState, numpy.random.SeedSequence}):
+            seed of the random streams
+        diagnostics (Diagnostics): optional diagnostics accumulating the computation time of the chunks
+        progress (Callable): optional function called with the number of finished and of all replications;
+            the chunks are then dispatched in rounds of one chunk per worker
+        executor (concurrent.futures.Executor): optional pool evaluating the chunks instead of joblib
+
+    Returns:
+        np.ndarray: vector of the resampled statistics in the order of the chunks
+    """
+    sizes = _chunk_sizes(replications, row_size)
+    generators = [np.random.default_rng(seed) for seed in _seed_sequence(random_state).spawn(len(sizes))]
+    if diagnostics is not None:
+        statistics = _timed(statistics)
+    round_size = max(len(sizes), 1) if progress is None else effective_n_jobs(n_jobs)
+
+    chunks = []
+    with _chunk_runner(n_jobs, executor) as run:
+        for start in range(0, len(sizes), round_size):
+            chunks += run(statistics, generators[start:start + round_size], sizes[start:start + round_size])
+            if progress is not None:
+                progress(sum(sizes[:start + round_size]), replications)
+    if diagnostics is not None:
+        chunks, times = zip(*chunks)
+        diagnostics.worker_time += sum(times)
+    return np.concatenate(chunks)
+
+
+def _sequential_pvalue(statistics: Callable[[np.random.Generator, int], npt.NDArray], test_statistic: float,
+                       replications: int, row_size: int, sequential: str = 'besag-clifford', alpha: float = 0.05,
+                       mcse: float = 0.001, exceedances: int = 10, n_jobs: int = 1,
+                       random_state: RandomState = None, diagnostics: Optional[Diagnostics] = None,
+                       progress: Optional[Callable[[int, int], None]] = None,
+                       executor: Optional[Executor] = None) -> tuple[float, int]:
+    """
+    Monte Carlo p-value with sequential early stopping.
+
+    Chunks are generated as in `_resample` and inspected in order, so the stopping point and the p-value
+    depend only on `random_state`, not on `n_jobs`.
+    Args:
+        statistics (Callable): function of a random generator and a number of replications returning
+            that many resampled values of the test statistic
+        test_statistic (float): observed value of the test statistic
+        replications (int): maximal number of replications
+        row_size (int): number of resampled observations per replication, used to bound the chunk memory
+        sequential (str): stopping rule, 'besag-clifford' stops after `exceedances` resampled statistics
+            at least as large as the observed one; 'alpha' stops once the 99% Clopper-Pearson interval
+            of the p-value excludes `alpha` or the Monte Carlo standard error drops to `mcse`
+        alpha (float): significance level used by the 'alpha' rule
+        mcse (float): target Monte Carlo standard error of the p-value used by the 'alpha' rule
+        exceedances (int): number of exceedances after which the 'besag-clifford' rule stops
+        n_jobs (int): the maximum number of concurrently running jobs, as for joblib.Parallel
+        random_state ({None, int, numpy.random.Generator, numpy.random.RandomState, numpy.random.SeedSequence}):
+            seed of the random streams
+        diagnostics (Diagnostics): optional diagnostics accumulating the computation time of the chunks
+        progress (Callable): optional function called with the number of inspected and of the maximal number
+            of replications after every round of chunks
+        executor (concurrent.futures.Executor): optional pool evaluating the chunks instead of joblib
+
+    Returns:
+        tuple: p-value and number of replications it is based on
+
+    Raises:
+        ValueError: if 'sequential' is not 'besag-clifford' or 'alpha', if 'exceedances' is smaller than 1,
+            if 'mcse' is not positive or if 'alpha' is not between 0 and 1
+    """
+    if sequential not in ('besag-clifford', 'alpha'):
+        raise ValueError(f"Unknown sequential stopping rule, possible values are ['besag-clifford', 'alpha'],"
+                         f" but {sequential} was provided")
+    if exceedances < 1:
+        raise ValueError(f"The number of exceedances must be at least 1, but {exceedances} was provided")
+    if mcse <= 0:
+        raise ValueError(f"The Monte Carlo standard error must be positive, but {mcse} was provided")
+    if not 0 < alpha < 1:
+        raise ValueError(f"The significance level must be between 0 and 1, but {alpha} was provided")
+
+    sizes = _chunk_sizes(replications, row_size)
+    generators = [np.random.default_rng(seed) for seed in _seed_sequence(random_state).spawn(len(sizes))]
+    if diagnostics is not None:
+        statistics = _timed(statistics)
+    round_size = effective_n_jobs(n_jobs)
+    used = count = 0
+    with _chunk_runner(n_jobs, executor) as run:
+        for start in range(0, len(sizes), round_size):
+            chunks = run(statistics, generators[start:start + round_size], sizes[start:start + round_size])
+            if diagnostics is not None:
+                chunks, times = zip(*chunks)
+                diagnostics.worker_time += sum(times)
+            if progress is not None:
+                progress(used + sum(len(chunk) for chunk in chunks), replications)
+            for chunk in chunks:
+                hits = chunk >= test_statistic
+                if sequential == 'besag-clifford' and count + np.sum(hits) >= exceedances:
+                    used += np.flatnonzero(hits)[exceedances - count - 1] + 1
+                    return exceedances / used, int(used)
+                count += np.sum(hits)
+                used += len(chunk)
+                if sequential == 'alpha':
+                    lower, upper = beta.ppf([0.005, 0.995], [count, count + 1], [used - count + 1, used - count])
+                    lower = 0 if count == 0 else lower
+                    upper = 1 if count == used else upper
+                    p_hat = (count + 1) / (used + 1)
+                    if upper < alpha or lower > alpha or np.sqrt(p_hat * (1 - p_hat) / used) <= mcse:
+                        return p_hat, int(used)
+    return (count + 1) / (used + 1), int(used)
+
+
+def _random_permutations(rng: np.random.Generator, n: int, size: int) -> npt.NDArray:
+    return rng.permuted(np.tile(np.arange(n), (size, 1)), axis=1)
+
+
+def _random_choices(rng: np.random.Generator, n: int, k: int, size: int) -> npt.NDArray:
+    return rng.integers(0, n, size=(size, k))
+
+
+def _random_subsets(rng: np.random.Generator, n: int, k: int, size: int) -> npt.NDArray:
+    if k == 0:
+        return np.empty((size, 0), dtype=np.intp)
+    return np.argpartition(rng.random((size, n)), k - 1, axis=1)[:, :k]
+
+
+def _random_hypergeometric_counts(rng: np.random.Generator, totals: npt.NDArray, k: int, size: int) -> npt.NDArray:
+    # counts of the distinct values among k observations drawn without replacement, i.e. in a random k-subset
+    return rng.multivariate_hypergeometric(totals, k, size=size)
+
+
+def _random_multinomial_counts(rng: np.random.Generator, totals: npt.NDArray, k: int, size: int) -> npt.NDArray:
+    # counts of the distinct values among k observations drawn with replacement
+    return rng.multinomial(k, totals / np.sum(totals), size=size)
+
+
+def _pooled_ranks(data: npt.NDArray, ties: str) -> tuple[npt.NDArray, Optional[npt.NDArray]]:
+    """
+    Rank the pooled sample once for the permutation engines.
+    Args:
+        data (np.ndarray): pooled vector of observations
+        ties (str): string specifying a method to deal with ties in data,
+            possible values as for scipy.stats.rankdata
+
+    Returns:
+        tuple: ranks of the pooled sample and, for 'ordinal' ties, the dense tie codes needed to re-rank
+            permuted replicates (None otherwise)
+    """
+    ranked = rankdata(data, method=ties)
+    codes = rankdata(data, method='dense') if ties == 'ordinal' else None
+    return ranked, codes
+
+
+def _permuted_ranks(ranked: npt.NDArray, codes: Optional[npt.NDArray], indices: npt.NDArray) -> npt.NDArray:
+    """
+    Ranks of the permuted replicates, one replicate per row of `indices`.
+
+    For all tie methods except 'ordinal' the rank of an observation depends only on its value, so permuting
+    the data permutes the pooled ranks. Ordinal ranks of tied values depend on their position, so they are
+    recomputed from the tie codes, in which case `indices` must hold full permutations.
+    """
+    if codes is None:
+        return ranked[indices]
+    return _rankdata_rows(codes[indices], method='ordinal')
+
+
+def _exact_states(scores: npt.NDArray, codes: npt.NDArray, k: int) -> int:
+    """
+    Upper bound on the number of states handled in one step of the exact subset-sum distribution.
+
+    The number of distinct score sums over the subsets of a fixed size is multiplied by the number of sizes the
+    recursion carries at once, min(k, n - k) + 1, and by the number of copies of the states made when the largest
+    tie group is added, before the duplicates are collapsed. Heavily tied samples are bounded instead by the number
+    of ways to choose how many members of every tie group are taken.
+    Args:
+        scores (np.ndarray): (2 x n) integer matrix of scores of the pooled observations
+        codes (np.ndarray): vector of tie group labels of the pooled observations
+        k (int): size of the subsets
+
+    Returns:
+        int: bound used to decide whether the exact distribution fits the time and memory budget, also exceeds it
+            when the states cannot be encoded as 64-bit integers
+    """
+    n = scores.shape[1]
+    sorted_scores = np.sort(scores, axis=1)
+    maximal = [int(np.sum(score[n - k:], dtype=float)) + 1 for score in sorted_scores]
+    if (k + 1) * maximal[0] * maximal[1] >= 2 ** 63:
+        return (k + 1) * maximal[0] * maximal[1]
+    steps = [max(int(np.gcd.reduce(score - score[0])), 1) for score in sorted_scores]
+    ranges = [int(np.sum(score[n - k:]) - np.sum(score[:k])) // step + 1 for score, step in zip(sorted_scores, steps)]
+    group_sizes = [int(size) for size in np.unique(codes, return_counts=True)[1]]
+    states = min(comb(n, k), ranges[0] * ranges[1]) * (min(k, n - k) + 1) * (max(group_sizes) + 1)
+    return min(states, prod(size + 1 for size in group_sizes))
+
+
+def _exact_subset_sums(scores: npt.NDArray, codes: npt.NDArray, k: int) -> tuple[npt.NDArray, npt.NDArray]:
+    """
+    Exact permutation distribution of the sums of two scores over the first sample.
+
+    Every k-subset of the pooled sample is equally likely under the null hypothesis. Observations are processed
+    tie group by tie group: choosing j of the m members of a group contributes the sum of the first j scores of
+    the group with weight binomial(m, j), which also covers ordinal ranks where the first sample receives the
+    lowest ranks among its ties. States (count, sum1, sum2) are encoded as sorted integer keys, so adding a group
+    merges a few sorted runs and duplicates are collapsed in linear time.
+    Args:
+        scores (np.ndarray): (2 x n) non-negative integer matrix of scores of the pooled observations,
+            columns ordered by rank
+        codes (np.ndarray): vector of tie group labels of the pooled observations in the same order
+        k (int): size of the first sample
+
+    Returns:
+        tuple: (2 x states) matrix of distinct score sums and the vector of their probabilities
+    """
+    scores = np.asarray(scores, dtype=np.int64)
+    n = scores.shape[1]
+    boundaries = np.flatnonzero(np.diff(codes)) + 1
+    sum_range = np.sum(np.sort(scores, axis=1)[:, n - k:], axis=1) + 1
+    count_step = int(sum_range[0] * sum_range[1])
+    steps = count_step * np.arange(n + 1, dtype=np.int64)
+
+    keys = np.zeros(1, dtype=np.int64)
+    weights = np.ones(1)
+    remaining = n
+    for group in np.split(np.arange(n), boundaries):
+        m = len(group)
+        remaining -= m
+        partial = np.concatenate([np.zeros((2, 1), dtype=np.int64), np.cumsum(scores[:, group], axis=1)], axis=1)
+        shifts = steps[:m + 1] + partial[0] * sum_range[1] + partial[1]
+        multiplicities = np.array([comb(m, j) for j in range(m + 1)], dtype=float)
+
+        keys = (keys[np.newaxis, :] + shifts[:, np.newaxis]).ravel()
+        weights = (weights[np.newaxis, :] * multiplicities[:, np.newaxis]).ravel()
+        order = np.argsort(keys, kind='stable')
+        keys, weights = keys[order], weights[order]
+        feasible = (keys < (k + 1) * count_step) & (keys >= (k - remaining) * count_step)
+        keys, weights = keys[feasible], weights[feasible]
+        distinct = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+        keys, weights = keys[distinct], np.add.reduceat(weights, distinct)
+
+    keys = keys - k * count_step
+    return np.stack([keys // sum_range[1], keys % sum_range[1]]), weights / np.sum(weights)
@@ -0,0 +1,231 @@
+import asyncio
+import functools
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+from joblib import effective_n_jobs
+
+from nonparstat.Cucconi import (CucconiMultisampleResult, CucconiResult, _cucconi_auto_method,
+                                _cucconi_bootstrap_tests, _cucconi_multisample_bootstrap_tests,
+                                _cucconi_multisample_data, _cucconi_multisample_permutation_tests,
+                                _cucconi_multisample_test_statistic, _cucconi_permutation_tests,
+                                _cucconi_test_statistic, cucconi_multisample_test, cucconi_test)
+from nonparstat.NullDistribution import NullDistribution
+from nonparstat.Resampling import RandomState, _resample, _sequential_pvalue, _ASYMPTOTIC_MIN_SIZE
+
+# factories of the chunk functions evaluated by the workers, called with the pooled observations and the sample sizes
+_SESSION_TESTS = {
+    'cucconi_bootstrap': lambda data, n_i, ties: _cucconi_bootstrap_tests(data[:n_i[0]], data[n_i[0]:], ties=ties),
+    'cucconi_permutation': lambda data, n_i, ties: _cucconi_permutation_tests(data[:n_i[0]], data[n_i[0]:],
+                                                                              ties=ties),
+    'cucconi_multisample_bootstrap': _cucconi_multisample_bootstrap_tests,
+    'cucconi_multisample_permutation': _cucconi_multisample_permutation_tests,
+}
+# maximal number of tests whose chunk functions a worker keeps, by the name of the shared block of their data
+_WORKER_TESTS = 16
+
+_worker_tests: 'OrderedDict[str, Callable[[np.random.Generator, int], npt.NDArray]]' = OrderedDict()
+
+
+class _SharedTests:
+    """
+    Picklable chunk function of a test whose pooled observations are shared with the workers in a shared memory
+    block. Every worker builds the chunk function of the test from the block once and reuses it for the following
+    chunks, so a task carries only the name of the block.
+    """
+
+    def __init__(self, test: str, block: str, dtype: np.dtype, n_i: npt.NDArray, ties: str):
+        self.test = test
+        self.block = block
+        self.dtype = dtype
+        self.n_i = n_i
+        self.ties = ties
+
+    def _tests(self) -> Callable[[np.random.Generator, int], npt.NDArray]:
+        tests = _worker_tests.get(self.block)
+        if tests is not None:
+            _worker_tests.move_to_end(self.block)
+            return tests
+        block = shared_memory.SharedMemory(name=self.block)
+        try:
+            data = np.ndarray(int(np.sum(self.n_i)), dtype=self.dtype, buffer=block.buf).copy()
+        finally:
+            block.close()
+        tests = _worker_tests[self.block] = _SESSION_TESTS[self.test](data, self.n_i, ties=self.ties)
+        while len(_worker_tests) > _WORKER_TESTS:
+            _worker_tests.popitem(last=False)
+        return tests
+
+    def __call__(self, rng: np.random.Generator, size: int) -> npt.NDArray:
+        return self._tests()(rng, size)
+
+
+def _start_worker(_: int) -> None:
+    # the first task of every worker, so that the pool is started when the session is created
+    return None
+
+
+class TestSession:
+    """
+    Persistent pool of worker processes for running many resampled tests.
+
+    The functions of the package start the joblib workers and pickle the resampling closures, including the data,
+    with every chunk of every call. A session starts its workers once and passes the pooled observations of a test
+    to them once through shared memory, after which a chunk task carries only the random generator and its size.
+    The p-values are the same as those of the corresponding functions with the same 'random_state'.
+    Tests that do not resample are computed in the calling process.
+
+    The 'cucconi_async' and 'cucconi_multisample_async' coroutines run the tests in threads of the event loop, so
+    many tests can be awaited concurrently, sharing the workers, without blocking the loop.
+    Args:
+        n_jobs (int): number of worker processes, as for joblib.Parallel. If -1 all CPUs are used
+        mp_context (multiprocessing.context.BaseContext): optional start method context of the workers,
+            as for concurrent.futures.ProcessPoolExecutor
+
+    Examples:
+        >>> np.random.seed(987654321) # set random seed to get the same result
+        >>> sample_a = np.random.normal(loc=0, scale=1, size=100)
+        >>> sample_b = np.random.normal(loc=0, scale=1.5, size=100)
+        >>> with TestSession(n_jobs=2) as session:
+        ...     session.cucconi(sample_a, sample_b, method='permutation', random_state=0)
+        CucconiResult(statistic=0.4601681356095048, pvalue=0.000999000999000999)
+        >>> cucconi_test(sample_a, sample_b, method='permutation', random_state=0)
+        CucconiResult(statistic=0.4601681356095048, pvalue=0.000999000999000999)
+
+    """
+    # not a test case, despite its name
+    __test__ = False
+
+    def __init__(self, n_jobs: Optional[int] = -1, mp_context=None):
+        self.n_jobs = effective_n_jobs(n_jobs)
+        # workers attaching to the shared blocks register them with the resource tracker of this process, which
+        # forgets them when the block is unlinked here, instead of starting trackers reporting them as leaked
+        resource_tracker.ensure_running()
+        self._executor = ProcessPoolExecutor(max_workers=self.n_jobs, mp_context=mp_context)
+        list(self._executor.map(_start_worker, range(self.n_jobs)))
+
+    def __enter__(self) -> 'TestSession':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        self._executor.shutdown()
+
+    def _resampled_pvalue(self, test: str, data: npt.NDArray, n_i: npt.NDArray, test_statistic: float, method: str,
+                          replications: int, ties: str, random_state: RandomState, sequential: Optional[str],
+                          alpha: float, mcse: float, exceedances: int) -> tuple[float, int]:
+        data = np.ascontiguousarray(data)
+        block = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+        try:
+            shared = np.ndarray(data.shape, dtype=data.dtype, buffer=block.buf)
+            shared[:] = data
+            del shared
+            statistics = _SharedTests(f'{test}_{method}', block.name, data.dtype, n_i, ties)
+            if sequential is not None:
+                return _sequential_pvalue(statistics, test_statistic, replications=replications,
+                                          row_size=len(data), sequential=sequential, alpha=alpha, mcse=mcse,
+                                          exceedances=exceedances, n_jobs=self.n_jobs, random_state=random_state,
+                                          executor=self._executor)
+            h0_statistics = _resample(statistics, replications=replications, row_size=len(data), n_jobs=self.n_jobs,
+                                      random_state=random_state, executor=self._executor)
+            return NullDistribution(h0_statistics).pvalue(test_statistic), replications
+        finally:
+            block.close()
+            block.unlink()
+
+    def cucconi(self, a: npt.NDArray, b: npt.NDArray, method: str = 'bootstrap', replications: int = 1000,
+                ties: str = 'average', random_state: RandomState = None, sequential: Optional[str] = None,
+                alpha: float = 0.05, mcse: float = 0.001, exceedances: int = 10) -> CucconiResult:
+        """
+        Cucconi scale-location test on the workers of the session.
+        Args:
+            a (np.ndarray): vector of observations
+            b (np.ndarray): vector of observations
+            method (str): method for determining p-value, as for cucconi_test
+            replications (int): number of bootstrap replications
+            ties (str): string specifying a method to deal with ties in data,
+                possible values as for scipy.stats.rankdata
+            random_state ({None, int, numpy.random.Generator, numpy.random.RandomState, numpy.random.SeedSequence}):
+                seed or generator of the resampling, as for cucconi_test
+            sequential (str): optional rule to stop the resampling early, as for cucconi_test
+            alpha (float): significance level of the 'alpha' stopping rule
+            mcse (float): target Monte Carlo standard error of the p-value of the 'alpha' stopping rule
+            exceedances (int): number of exceedances of the 'besag-clifford' stopping rule
+
+        Returns:
+            tuple: namedtuple with test statistic value and the p-value, as for cucconi_test
+
+        Raises:
+            ValueError: for the invalid parameters of cucconi_test
+        """
+        a, b = map(np.asarray, (a, b))
+        if method == 'auto':
+            method = _cucconi_auto_method(a=a, b=b, ties=ties)
+        if method not in ('bootstrap', 'permutation'):
+            return cucconi_test(a, b, method=method, ties=ties)
+
+        test_statistics = _cucconi_test_statistic(a=a, b=b, ties=ties)
+        p_value, used = self._resampled_pvalue('cucconi', np.concatenate((a, b)), np.array([len(a), len(b)]),
+                                               test_statistics, method=method, replications=replications, ties=ties,
+                                               random_state=random_state, sequential=sequential, alpha=alpha,
+                                               mcse=mcse, exceedances=exceedances)
+        return CucconiResult(statistic=test_statistics, pvalue=p_value, replications=used)
+
+    def cucconi_multisample(self, samples: Union[list[npt.NDArray], npt.NDArray], method: str = 'bootstrap',
+                            replications: int = 1000, ties: str = 'average', random_state: RandomState = None,
+                            sequential: Optional[str] = None, alpha: float = 0.05, mcse: float = 0.001,
+                            exceedances: int = 10,
+                            offsets: Optional[npt.ArrayLike] = None) -> CucconiMultisampleResult:
+        """
+        Multisample Cucconi scale-location test on the workers of the session.
+        Args:
+            samples (List[numpy.ndarray] or numpy.ndarray): list of observation vectors, or all observations
+                concatenated into one vector if 'offsets' is given
+            method (str): method for determining p-value, as for cucconi_multisample_test
+            replications (int): number of bootstrap replications
+            ties (str): string specifying a method to deal with ties in data,
+                possible values as for scipy.stats.rankdata
+            random_state ({None, int, numpy.random.Generator, numpy.random.RandomState, numpy.random.SeedSequence}):
+                seed or generator of the resampling, as for cucconi_multisample_test
+            sequential (str): optional rule to stop the resampling early, as for cucconi_multisample_test
+            alpha (float): significance level of the 'alpha' stopping rule
+            mcse (float): target Monte Carlo standard error of the p-value of the 'alpha' stopping rule
+            exceedances (int): number of exceedances of the 'besag-clifford' stopping rule
+            offsets (numpy.ndarray): optional start index of every sample in the vector 'samples',
+                as for cucconi_multisample_test
+
+        Returns:
+            tuple: namedtuple with test statistic value and the p-value, as for cucconi_multisample_test
+
+        Raises:
+            ValueError: for the invalid parameters of cucconi_multisample_test
+        """
+        data, n_i = _cucconi_multisample_data(samples, offsets)
+        if method == 'auto':
+            method = 'asymptotic' if np.min(n_i) >= _ASYMPTOTIC_MIN_SIZE else 'permutation'
+        if method not in ('bootstrap', 'permutation'):
+            return cucconi_multisample_test(data, method=method, ties=ties, offsets=np.cumsum(n_i) - n_i)
+
+        test_statistics = _cucconi_multisample_test_statistic(data=data, n_i=n_i, ties=ties)
+        p_value, used = self._resampled_pvalue('cucconi_multisample', data, n_i, test_statistics, method=method,
+                                               replications=replications, ties=ties, random_state=random_state,
+                                               sequential=sequential, alpha=alpha, mcse=mcse,
+                                               exceedances=exceedances)
+        return CucconiMultisampleResult(statistic=test_statistics, pvalue=p_value, replications=used)
+
+    async def cucconi_async(self, a: npt.NDArray, b: npt.NDArray, **kwargs) -> CucconiResult:
+        """Awaitable version of 'cucconi', taking the same arguments."""
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(self.cucconi, a, b, **kwargs))
+
+    async def cucconi_multisample_async(self, samples: Union[list[npt.NDArray], npt.NDArray],
+                                        **kwargs) -> CucconiMultisampleResult:
+        """Awaitable version of 'cucconi_multisample', taking the same arguments."""
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(self.cucconi_multisample,
+                                                                                        samples, **kwargs))
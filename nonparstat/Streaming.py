@@ -0,0 +1,296 @@
+import os
+import random
+from typing import Iterable, Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from nonparstat.Cucconi import (CucconiResult, _cucconi_asymptotic_pvalue, _cucconi_statistic_from_sums,
+                                cucconi_null_distribution)
+from nonparstat.Resampling import RandomState
+
+# doubled rank of the first member of a tie group of size m, relative to the observations before the group
+_TIE_OFFSETS = {
+    'average': lambda m: m + 1,
+    'min': lambda m: 2,
+    'max': lambda m: 2 * m,
+}
+
+
+class _Node:
+    """
+    Node of the treap of distinct pooled observations.
+
+    Besides its own multiplicities `m` (all observations) and `k` (first sample) every node keeps the aggregates
+    of its subtree: the number of observations `count`, of first-sample observations `first` and the sums `s1`
+    and `s2` of the doubled ranks and squared doubled ranks of the first sample, ranked within the subtree.
+    The ranks in the right subtree are shifted by the observations to its left when the aggregates are combined,
+    so an insertion or a removal only updates the nodes on its search path.
+    """
+    __slots__ = ('key', 'priority', 'left', 'right', 'm', 'k', 'count', 'first', 's1', 's2')
+
+    def __init__(self, key, priority, m=0, k=0):
+        self.key = key
+        self.priority = priority
+        self.left = None
+        self.right = None
+        self.m = m
+        self.k = k
+
+
+def _update(node: _Node, offset) -> None:
+    left, right = node.left, node.right
+    before = left.count if left is not None else 0
+    own = 2 * before + offset(node.m)
+    count, first, s1, s2 = before + node.m, node.k, node.k * own, node.k * own ** 2
+    if left is not None:
+        first, s1, s2 = first + left.first, s1 + left.s1, s2 + left.s2
+    if right is not None:
+        shift = 2 * count
+        first += right.first
+        s1 += right.s1 + shift * right.first
+        s2 += right.s2 + 2 * shift * right.s1 + shift ** 2 * right.first
+        count += right.count
+    node.count, node.first, node.s1, node.s2 = count, first, s1, s2
+
+
+def _rotate_right(node: _Node, offset) -> _Node:
+    left = node.left
+    node.left = left.right
+    _update(node, offset)
+    left.right = node
+    _update(left, offset)
+    return left
+
+
+def _rotate_left(node: _Node, offset) -> _Node:
+    right = node.right
+    node.right = right.left
+    _update(node, offset)
+    right.left = node
+    _update(right, offset)
+    return right
+
+
+def _insert(node: Optional[_Node], key, first: int, offset) -> _Node:
+    if node is None:
+        node = _Node(key, random.random(), 1, first)
+    elif key == node.key:
+        node.m += 1
+        node.k += first
+    elif key < node.key:
+        node.left = _insert(node.left, key, first, offset)
+        if node.left.priority > node.priority:
+            return _rotate_right(node, offset)
+    else:
+        node.right = _insert(node.right, key, first, offset)
+        if node.right.priority > node.priority:
+            return _rotate_left(node, offset)
+    _update(node, offset)
+    return node
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node], offset) -> Optional[_Node]:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right, offset)
+        _update(left, offset)
+        return left
+    right.left = _merge(left, right.left, offset)
+    _update(right, offset)
+    return right
+
+
+def _remove(node: Optional[_Node], key, first: int, offset) -> Optional[_Node]:
+    if node is None:
+        raise ValueError(f"Observation {key} is not in the {'first' if first else 'second'} sample")
+    if key < node.key:
+        node.left = _remove(node.left, key, first, offset)
+    elif key > node.key:
+        node.right = _remove(node.right, key, first, offset)
+    else:
+        if (node.k if first else node.m - node.k) == 0:
+            raise ValueError(f"Observation {key} is not in the {'first' if first else 'second'} sample")
+        node.m -= 1
+        node.k -= first
+        if node.m == 0:
+            return _merge(node.left, node.right, offset)
+    _update(node, offset)
+    return node
+
+
+def _build(keys: list, m: list, k: list, offset, start: int, stop: int, bound: float) -> Optional[_Node]:
+    # balanced tree over the sorted distinct observations; the priority of a subtree root is drawn as the maximum
+    # of as many uniforms as the subtree has nodes, below the priority of its parent, as in a random treap
+    if start >= stop:
+        return None
+    middle = (start + stop) // 2
+    node = _Node(keys[middle], bound * random.random() ** (1 / (stop - start)), m[middle], k[middle])
+    node.left = _build(keys, m, k, offset, start, middle, node.priority)
+    node.right = _build(keys, m, k, offset, middle + 1, stop, node.priority)
+    _update(node, offset)
+    return node
+
+
+class CucconiStream:
+    """
+    Incrementally updated two-sample Cucconi test for sliding windows.
+
+    The pooled observations are kept in a treap ordered by value, whose nodes carry the number of observations
+    and the sums of the ranks and squared ranks of the first sample in their subtrees. Adding or removing an
+    observation costs O(log n) and the statistic is read from the root in O(1), so a window is never re-ranked.
+    Args:
+        a (np.ndarray): initial observations of the first sample, e.g. the reference window
+        b (np.ndarray): initial observations of the second sample, e.g. the live window
+        ties (str): string specifying a method to deal with ties in data, possible values are 'average',
+            'min' and 'max' as for scipy.stats.rankdata
+
+    Raises:
+        ValueError: if 'ties' is not one of the supported methods
+
+    Examples:
+        >>> np.random.seed(987654321) # set random seed to get the same result
+        >>> reference = np.random.normal(loc=0, scale=1, size=100)
+        >>> stream = CucconiStream(reference, np.random.normal(loc=0, scale=1, size=100))
+        >>> stream.statistic
+        0.0018742344173916844
+        >>> for value in np.random.normal(loc=0, scale=3, size=50):
+        ...     stream.evict(stream.oldest('b'), 'b')
+        ...     stream.push(value, 'b')
+        >>> stream.test()
+        CucconiResult(statistic=0.5034983068875275, pvalue=8.880580773871336e-05)
+
+    """
+
+    def __init__(self, a: Optional[npt.ArrayLike] = None, b: Optional[npt.ArrayLike] = None, ties: str = 'average'):
+        if ties not in _TIE_OFFSETS:
+            raise ValueError(f"Unknown method for ranking, possible values are {list(_TIE_OFFSETS)},"
+                             f" but {ties} was provided")
+        self.ties = ties
+        self._offset = _TIE_OFFSETS[ties]
+        a = np.ravel(np.asarray([] if a is None else a))
+        b = np.ravel(np.asarray([] if b is None else b))
+        keys, inverse, m = np.unique(np.concatenate((a, b)), return_inverse=True, return_counts=True)
+        k = np.bincount(inverse.ravel()[:len(a)], minlength=len(keys))
+        self._root = _build(keys.tolist(), m.tolist(), k.tolist(), self._offset, 0, len(keys), 1.0)
+        self._windows = {'a': list(a.tolist()), 'b': list(b.tolist())}
+        self._starts = {'a': 0, 'b': 0}
+
+    def __len__(self) -> int:
+        return 0 if self._root is None else self._root.count
+
+    @property
+    def sizes(self) -> tuple[int, int]:
+        """Current sizes of the first and the second sample."""
+        first = 0 if self._root is None else self._root.first
+        return first, len(self) - first
+
+    def push(self, values: Union[float, Iterable[float]], sample: str = 'b') -> None:
+        """
+        Add observations to one of the samples.
+        Args:
+            values (float or Iterable[float]): observation or observations to add
+            sample (str): sample the observations belong to, 'a' or 'b'
+
+        Raises:
+            ValueError: if 'sample' is not 'a' or 'b'
+        """
+        first = self._first(sample)
+        for value in np.ravel(values).tolist():
+            self._root = _insert(self._root, value, first, self._offset)
+            self._windows[sample].append(value)
+
+    def evict(self, values: Union[float, Iterable[float]], sample: str = 'b') -> None:
+        """
+        Remove observations from one of the samples.
+        Args:
+            values (float or Iterable[float]): observation or observations to remove
+            sample (str): sample the observations belong to, 'a' or 'b'
+
+        Raises:
+            ValueError: if 'sample' is not 'a' or 'b' or an observation is not in the sample
+        """
+        first = self._first(sample)
+        for value in np.ravel(values).tolist():
+            self._root = _remove(self._root, value, first, self._offset)
+            self._forget(value, sample)
+
+    def oldest(self, sample: str = 'b') -> float:
+        """
+        Oldest observation of a sample that has not been evicted, the one to evict when a window slides.
+        Args:
+            sample (str): 'a' or 'b'
+
+        Returns:
+            float: the observation
+
+        Raises:
+            ValueError: if 'sample' is not 'a' or 'b' or the sample is empty
+        """
+        self._first(sample)
+        if self._starts[sample] == len(self._windows[sample]):
+            raise ValueError(f"Sample {sample} is empty")
+        return self._windows[sample][self._starts[sample]]
+
+    @property
+    def statistic(self) -> float:
+        """Cucconi statistic of the current samples, NaN if one of them is empty."""
+        n1, n2 = self.sizes
+        if n1 == 0 or n2 == 0:
+            return np.nan
+        n = n1 + n2
+        sum_ranks = self._root.s1 / 2
+        sum_sq = self._root.s2 / 4
+        sum_rev_sq = n1 * (n + 1) ** 2 - 2 * (n + 1) * sum_ranks + sum_sq
+        return _cucconi_statistic_from_sums(sum_sq, sum_rev_sq, n1, n2)
+
+    def test(self, method: str = 'asymptotic', replications: int = 1000, random_state: RandomState = None,
+             cache_dir: Optional[Union[str, os.PathLike]] = None) -> CucconiResult:
+        """
+        Cucconi test of the current samples.
+        Args:
+            method (str): method for determining p-value, possible values are 'asymptotic', 'bootstrap'
+                and 'permutation'. The resampled null distributions depend only on the sample sizes, as for
+                data without ties, and are cached, so windows of a fixed size reuse the same distribution
+            replications (int): number of replications of the resampled null distribution
+            random_state ({None, int, numpy.random.Generator, numpy.random.RandomState, numpy.random.SeedSequence}):
+                seed of the resampled null distribution
+            cache_dir (str): optional directory in which the resampled null distributions are persisted
+
+        Returns:
+            tuple: namedtuple with test statistic value and the p-value
+
+        Raises:
+            ValueError: if 'method' parameter is not specified to 'asymptotic', 'bootstrap' or 'permutation'
+        """
+        statistic = self.statistic
+        n1, n2 = self.sizes
+        if method == 'asymptotic':
+            return CucconiResult(statistic=statistic, pvalue=_cucconi_asymptotic_pvalue(statistic, n1 + n2))
+        if method not in ('bootstrap', 'permutation'):
+            raise ValueError(f"Unknown method for constructing the distribution, possible values are"
+                             f" ['asymptotic', 'bootstrap', 'permutation'], but {method} was provided")
+        h0_distribution = cucconi_null_distribution(n1, n2, method=method, replications=replications, ties=self.ties,
+                                                    random_state=random_state, cache_dir=cache_dir)
+        return CucconiResult(statistic=statistic, pvalue=h0_distribution.pvalue(statistic),
+                             replications=replications)
+
+    @staticmethod
+    def _first(sample: str) -> int:
+        if sample not in ('a', 'b'):
+            raise ValueError(f"Unknown sample, possible values are ['a', 'b'], but {sample} was provided")
+        return int(sample == 'a')
+
+    def _forget(self, value: float, sample: str) -> None:
+        window, start = self._windows[sample], self._starts[sample]
+        if window[start] == value:
+            start += 1
+        else:
+            del window[window.index(value, start)]
+        if 2 * start > len(window):
+            del window[:start]
+            start = 0
+        self._starts[sample] = start
@@ -1,6 +1,15 @@
+import itertools
 import unittest
+import warnings
+
+from scipy.stats import f, rankdata
 
 from nonparstat.Cucconi import *
+from nonparstat.Cucconi import (_cucconi_multisample_permuted_statistics, _cucconi_multisample_test_statistic,
+                                _cucconi_permuted_statistics, _cucconi_test_statistic)
+from nonparstat.Resampling import _pooled_ranks
+from nonparstat.Lepage import *
+from nonparstat.Lepage import _lepage_test_statistic
 from nonparstat.PodgorGastwirth import *
 
 
@@ -45,7 +54,103 @@ class Cucconi(unittest.TestCase):
 
     def test_method(self):
         sample_a = sample_b = np.random.normal(loc=0, scale=1, size=100)
+        self.assertRaises(ValueError, cucconi_test, sample_a, sample_b, method='unknown')
+
+    def test_exact(self):
+        data = np.random.randint(0, 5, size=11).astype(float)
+        for ties in ('average', 'min', 'max', 'dense', 'ordinal'):
+            with self.subTest(ties=ties):
+                observed = _cucconi_test_statistic(data[:4], data[4:], ties=ties)
+                statistics = []
+                for subset in itertools.combinations(range(11), 4):
+                    mask = np.isin(np.arange(11), subset)
+                    statistics.append(_cucconi_test_statistic(data[mask], data[~mask], ties=ties))
+                self.assertAlmostEqual(cucconi_test(data[:4], data[4:], method='exact', ties=ties).pvalue,
+                                       np.mean(np.array(statistics) >= observed - 1e-9))
+
+    def test_exact_mirror(self):
+        # reversing the ranks swaps U and V, so the mirrored subset ties with the observed statistic
+        data = np.arange(11.0)
+        mask = np.isin(np.arange(11), [0, 1, 2, 5])
+        mirror = np.isin(np.arange(11), [5, 8, 9, 10])
+        observed = _cucconi_test_statistic(data[mask], data[~mask])
+        self.assertAlmostEqual(_cucconi_test_statistic(data[mirror], data[~mirror]), observed)
+        statistics = []
+        for subset in itertools.combinations(range(11), 4):
+            subset_mask = np.isin(np.arange(11), subset)
+            statistics.append(_cucconi_test_statistic(data[subset_mask], data[~subset_mask]))
+        self.assertAlmostEqual(cucconi_test(data[mask], data[~mask], method='exact').pvalue,
+                               np.mean(np.array(statistics) >= observed - 1e-9))
+
+    def test_asymptotic(self):
+        sample_a = np.random.normal(loc=0, scale=1, size=300)
+        sample_b = np.random.normal(loc=0.1, scale=1.1, size=200)
+        self.assertAlmostEqual(cucconi_test(sample_a, sample_b, method='asymptotic').pvalue,
+                               cucconi_test(sample_a, sample_b, method='permutation', replications=10000).pvalue,
+                               delta=0.03)
+        self.assertLess(cucconi_test(sample_a, sample_b + 10, method='asymptotic').pvalue, 0.001)
+
+    def test_auto(self):
+        sample_a = np.random.normal(loc=0, scale=1, size=300)
+        sample_b = np.random.normal(loc=0, scale=1, size=200)
+        self.assertEqual(cucconi_test(sample_a, sample_b, method='auto'),
+                         cucconi_test(sample_a, sample_b, method='asymptotic'))
+        self.assertEqual(cucconi_test(sample_a[:10], sample_b[:10], method='auto'),
+                         cucconi_test(sample_a[:10], sample_b[:10], method='exact'))
+        self.assertEqual(cucconi_test(sample_a[:20], sample_b[:20], method='auto', random_state=1),
+                         cucconi_test(sample_a[:20], sample_b[:20], method='permutation', random_state=1))
+        self.assertEqual(cucconi_test(sample_a[:50], sample_b[:50], method='auto', random_state=1),
+                         cucconi_test(sample_a[:50], sample_b[:50], method='permutation', random_state=1))
+
+    def test_exact_size(self):
+        sample_a = np.random.normal(loc=0, scale=1, size=100)
+        sample_b = np.random.normal(loc=0, scale=1, size=100)
         self.assertRaises(ValueError, cucconi_test, sample_a, sample_b, method='exact')
+        self.assertRaises(ValueError, cucconi_test, sample_a[:20], sample_b[:20], method='exact')
+
+    def test_random_state(self):
+        sample_a = np.random.normal(loc=0, scale=1, size=50)
+        sample_b = np.random.normal(loc=0.2, scale=1.2, size=50)
+        for method in ('bootstrap', 'permutation'):
+            with self.subTest(method=method):
+                p_values = [cucconi_test(sample_a, sample_b, method=method, random_state=123, n_jobs=n_jobs).pvalue
+                            for n_jobs in (1, 2)]
+                self.assertEqual(p_values[0], p_values[1])
+                self.assertEqual(
+                    cucconi_test(sample_a, sample_b, method=method, random_state=np.random.default_rng(5)).pvalue,
+                    cucconi_test(sample_a, sample_b, method=method, random_state=np.random.default_rng(5)).pvalue)
+        self.assertRaises(ValueError, cucconi_test, sample_a, sample_b, random_state='seed')
+
+    def test_sequential(self):
+        sample_a = sample_b = np.random.normal(loc=0, scale=1, size=100)
+        for sequential in ('besag-clifford', 'alpha'):
+            with self.subTest(sequential=sequential):
+                result = cucconi_test(sample_a, sample_b, method='permutation', replications=100000,
+                                      sequential=sequential, random_state=1)
+                self.assertGreater(result.pvalue, 0.9)
+                self.assertLess(result.replications, 100000)
+                self.assertEqual(result.replications,
+                                 cucconi_test(sample_a, sample_b, method='permutation', replications=100000,
+                                              sequential=sequential, random_state=1, n_jobs=2).replications)
+
+    def test_sequential_rejection(self):
+        sample_a = np.random.normal(loc=0, scale=1, size=100)
+        sample_b = np.random.normal(loc=10, scale=10, size=100)
+        result = cucconi_test(sample_a, sample_b, method='permutation', replications=10000, sequential='alpha',
+                              alpha=0.001)
+        self.assertLess(result.pvalue, 0.001)
+        self.assertLessEqual(result.replications, 10000)
+        self.assertRaises(ValueError, cucconi_test, sample_a, sample_b, sequential='wald')
+
+    def test_sequential_invalid(self):
+        sample_a = np.random.normal(loc=0, scale=1, size=20)
+        sample_b = np.random.normal(loc=0, scale=1, size=20)
+        for sequential, options in (('besag-clifford', {'exceedances': 0}), ('besag-clifford', {'exceedances': -1}),
+                                    ('alpha', {'mcse': 0}), ('alpha', {'mcse': -0.01}), ('alpha', {'alpha': 0}),
+                                    ('alpha', {'alpha': 1.5})):
+            with self.subTest(sequential=sequential, **options):
+                self.assertRaises(ValueError, cucconi_test, sample_a, sample_b, method='permutation',
+                                  sequential=sequential, **options)
 
 
 class Cucconi_multisample(unittest.TestCase):
@@ -91,6 +196,170 @@ class Cucconi_multisample(unittest.TestCase):
         sample_a = sample_b = np.random.normal(loc=0, scale=1, size=100)
         self.assertRaises(ValueError, cucconi_multisample_test, [sample_a, sample_b], method='exact')
 
+    def test_random_state(self):
+        samples = [np.random.normal(loc=0, scale=s, size=30) for s in (1, 1.2, 1.4)]
+        for method in ('bootstrap', 'permutation'):
+            with self.subTest(method=method):
+                p_values = [cucconi_multisample_test(samples, method=method, random_state=123, n_jobs=n_jobs).pvalue
+                            for n_jobs in (1, 2)]
+                self.assertEqual(p_values[0], p_values[1])
+
+    def test_asymptotic(self):
+        samples = [np.random.normal(loc=0, scale=1, size=n) for n in (200, 150, 250)]
+        self.assertAlmostEqual(cucconi_multisample_test(samples, method='asymptotic').pvalue,
+                               cucconi_multisample_test(samples, method='permutation', replications=10000).pvalue,
+                               delta=0.03)
+        self.assertEqual(cucconi_multisample_test(samples, method='auto'),
+                         cucconi_multisample_test(samples, method='asymptotic'))
+        self.assertAlmostEqual(cucconi_multisample_test(samples[:2], method='asymptotic').pvalue,
+                               cucconi_test(samples[0], samples[1], method='asymptotic').pvalue)
+
+    def test_sequential(self):
+        sample_a = sample_b = np.random.normal(loc=0, scale=1, size=100)
+        result = cucconi_multisample_test([sample_a, sample_b], replications=100000, sequential='besag-clifford')
+        self.assertGreater(result.pvalue, 0.9)
+        self.assertLess(result.replications, 100000)
+
+    def test_offsets(self):
+        samples = [np.random.normal(loc=0, scale=s, size=n) for s, n in ((1, 30), (1.2, 20), (1.4, 25))]
+        data, offsets = np.concatenate(samples), [0, 30, 50]
+        for method in ('bootstrap', 'permutation', 'asymptotic'):
+            with self.subTest(method=method):
+                self.assertEqual(cucconi_multisample_test(data, offsets=offsets, method=method, random_state=5),
+                                 cucconi_multisample_test(samples, method=method, random_state=5))
+        for offsets in ([], [1, 30], [0, 30, 30], [0, 50, 30], [0, 75]):
+            with self.subTest(offsets=offsets):
+                self.assertRaises(ValueError, cucconi_multisample_test, data, offsets=offsets)
+
+    def test_many_groups(self):
+        data = np.random.normal(loc=0, scale=1, size=2000 * 5)
+        samples = np.split(data, 2000)
+        result = cucconi_multisample_test(data, offsets=np.arange(0, data.size, 5), method='permutation',
+                                          replications=100, random_state=1)
+        n = data.size
+        ranks = np.split(rankdata(data), 2000)
+        expected, sd = 5 * (n + 1) * (2 * n + 1) / 6, np.sqrt(5 * (n - 5) * (n + 1) * (2 * n + 1) * (8 * n + 11) / 180)
+        rho = -(30 * n + 14 * n ** 2 + 19) / ((8 * n + 11) * (2 * n + 1))
+        u = np.array([(np.sum(r ** 2) - expected) / sd for r in ranks])
+        v = np.array([(np.sum((n + 1 - r) ** 2) - expected) / sd for r in ranks])
+        self.assertAlmostEqual(result.statistic, np.mean(u ** 2 + v ** 2 - 2 * u * v * rho) / (2 - 2 * rho ** 2))
+        self.assertEqual(result, cucconi_multisample_test(samples, method='permutation', replications=100,
+                                                          random_state=1))
+
+
+class CucconiBatch(unittest.TestCase):
+    def setUp(self):
+        self.sample_a = np.random.normal(loc=0, scale=1, size=(4, 60))
+        self.sample_b = np.random.normal(loc=[[0], [10], [0], [10]], scale=[[1], [1], [10], [10]], size=(4, 50))
+
+    def test_statistic(self):
+        result = cucconi_test_batch(self.sample_a, self.sample_b, method='permutation')
+        np.testing.assert_allclose(result.statistic,
+                                   [_cucconi_test_statistic(a, b) for a, b in zip(self.sample_a, self.sample_b)])
+
+    def test_pvalue(self):
+        for method in ('bootstrap', 'permutation'):
+            with self.subTest(method=method):
+                equal = np.random.normal(loc=0, scale=1, size=10)
+                result = cucconi_test_batch(np.vstack([np.repeat(equal, 6), self.sample_a]),
+                                            np.vstack([np.repeat(equal, 5), self.sample_b]), method=method,
+                                            chunk_size=2)
+                self.assertGreater(result.pvalue[0], 0.9)
+                self.assertTrue(np.all(result.pvalue[2:] < 0.001))
+
+    def test_ties(self):
+        sample_a = np.random.randint(0, 5, size=(6, 20))
+        sample_b = np.random.randint(0, 5, size=(6, 25))
+        for ties in ('average', 'ordinal'):
+            with self.subTest(ties=ties):
+                result = cucconi_test_batch(sample_a, sample_b, method='permutation', ties=ties, random_state=1)
+                np.testing.assert_allclose(result.statistic,
+                                           [_cucconi_test_statistic(a, b, ties=ties)
+                                            for a, b in zip(sample_a, sample_b)])
+                self.assertTrue(np.all((result.pvalue > 0) & (result.pvalue <= 1)))
+
+    def test_asymptotic(self):
+        result = cucconi_test_batch(self.sample_a, self.sample_b, method='asymptotic', chunk_size=3)
+        np.testing.assert_allclose(result.pvalue, [cucconi_test(a, b, method='asymptotic').pvalue
+                                                   for a, b in zip(self.sample_a, self.sample_b)])
+
+    def test_shape(self):
+        self.assertRaises(ValueError, cucconi_test_batch, self.sample_a, self.sample_b[:2])
+        self.assertRaises(ValueError, cucconi_test_batch, self.sample_a, self.sample_b, method='exact')
+
+
+class CucconiPermutationEngine(unittest.TestCase):
+    def setUp(self):
+        self.data = np.random.randint(0, 8, size=25).astype(float)
+        self.permutations = np.array([np.random.permutation(25) for _ in range(50)])
+
+    def test_two_sample_matches_statistic(self):
+        for ties in ('average', 'min', 'max', 'dense', 'ordinal'):
+            with self.subTest(ties=ties):
+                ranked, codes = _pooled_ranks(self.data, ties=ties)
+                expected = [_cucconi_test_statistic(self.data[p][:10], self.data[p][10:], ties=ties)
+                            for p in self.permutations]
+                np.testing.assert_array_equal(
+                    _cucconi_permuted_statistics(ranked, codes, 10, self.permutations), expected)
+
+    def test_multisample_matches_statistic(self):
+        for ties in ('average', 'min', 'max', 'dense', 'ordinal'):
+            with self.subTest(ties=ties):
+                ranked, codes = _pooled_ranks(self.data, ties=ties)
+                expected = [_cucconi_multisample_test_statistic(self.data[p], np.array([7, 8, 10]), ties=ties)
+                            for p in self.permutations]
+                np.testing.assert_array_equal(
+                    _cucconi_multisample_permuted_statistics(ranked, codes, np.array([7, 8, 10]),
+                                                             self.permutations), expected)
+
+
+class CucconiCounts(unittest.TestCase):
+    def setUp(self):
+        self.sample_a = np.random.poisson(lam=6, size=80)
+        self.sample_b = np.random.poisson(lam=6, size=60)
+        self.values = np.unique(np.concatenate((self.sample_a, self.sample_b)))
+        self.counts_a = [np.sum(self.sample_a == value) for value in self.values]
+        self.counts_b = [np.sum(self.sample_b == value) for value in self.values]
+
+    def test_statistic(self):
+        for ties in ('average', 'min', 'max', 'dense', 'ordinal'):
+            with self.subTest(ties=ties):
+                result = cucconi_test_counts(self.values, self.counts_a, self.counts_b, method='asymptotic',
+                                             ties=ties)
+                expected = cucconi_test(self.sample_a, self.sample_b, method='asymptotic', ties=ties)
+                self.assertAlmostEqual(result.statistic, expected.statistic)
+                self.assertAlmostEqual(result.pvalue, expected.pvalue)
+
+    def test_pvalue(self):
+        for method in ('bootstrap', 'permutation'):
+            for ties in ('average', 'ordinal'):
+                with self.subTest(method=method, ties=ties):
+                    result = cucconi_test_counts(self.values, self.counts_a, self.counts_b, method=method,
+                                                 replications=4000, ties=ties, random_state=1)
+                    expected = cucconi_test(self.sample_a, self.sample_b, method=method, replications=4000,
+                                            ties=ties, random_state=1)
+                    self.assertLess(abs(result.pvalue - expected.pvalue), 0.05)
+                    self.assertEqual(result.replications, 4000)
+
+    def test_unsorted_values(self):
+        order = np.random.permutation(len(self.values))
+        values = np.concatenate((self.values[order], self.values[:2]))
+        counts_a = np.concatenate((np.array(self.counts_a)[order], [0, 0]))
+        counts_b = np.concatenate((np.array(self.counts_b)[order], [0, 0]))
+        self.assertEqual(cucconi_test_counts(values, counts_a, counts_b, method='permutation', random_state=2),
+                         cucconi_test_counts(self.values, self.counts_a, self.counts_b, method='permutation',
+                                             random_state=2))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, cucconi_test_counts, [1, 2], [1, 2], [1, 2], method='exact')
+        self.assertRaises(ValueError, cucconi_test_counts, [1, 2], [1, 2], [1])
+        self.assertRaises(ValueError, cucconi_test_counts, [1, 2], [1, -2], [1, 2])
+        self.assertRaises(ValueError, cucconi_test_counts, [1, 2], [1, 2.5], [1, 2])
+        self.assertRaises(ValueError, cucconi_test_counts, [1, np.nan], [1, 2], [1, 2])
+        self.assertRaises(ValueError, cucconi_test_counts, [1, 2], [0, 0], [1, 2])
+        self.assertRaises(ValueError, cucconi_test_counts, [1, 2], [1, 2], [0, 0], method='asymptotic')
+        self.assertRaises(ValueError, cucconi_test_counts, [], [], [])
+
 
 class PodgorGastwirth(unittest.TestCase):
     def test_equal(self):
@@ -112,6 +381,185 @@ class PodgorGastwirth(unittest.TestCase):
         sample_b = np.random.normal(loc=10, scale=10, size=100)
         self.assertLess(podgor_gastwirth_test(sample_a, sample_b).pvalue, 0.001)
 
+    def test_regression(self):
+        sample_a = np.random.randint(0, 10, size=30)
+        sample_b = np.random.randint(0, 10, size=25)
+        ranked = rankdata(np.concatenate((sample_a, sample_b)))
+        design = np.column_stack((np.ones_like(ranked), ranked, ranked ** 2))
+        indicator = np.concatenate((np.ones(len(sample_a)), np.zeros(len(sample_b))))
+        fitted = design @ np.linalg.lstsq(design, indicator, rcond=None)[0]
+        n1, n = len(sample_a), len(ranked)
+        explained = indicator @ fitted
+        expected = (explained - n1 ** 2 / n) / 2 / ((n1 - explained) / (n - 3))
+        self.assertAlmostEqual(podgor_gastwirth_test(sample_a, sample_b).statistic, expected)
+
+    def test_two_values(self):
+        # the squared ranks of binary data are linear in the ranks, so only the linear regression term is tested
+        sample_a = np.random.randint(0, 2, size=40)
+        sample_b = np.random.randint(0, 2, size=30)
+        ranked = rankdata(np.concatenate((sample_a, sample_b)))
+        design = np.column_stack((np.ones_like(ranked), ranked))
+        indicator = np.concatenate((np.ones(len(sample_a)), np.zeros(len(sample_b))))
+        explained = indicator @ design @ np.linalg.lstsq(design, indicator, rcond=None)[0]
+        n1, n = len(sample_a), len(ranked)
+        expected = (explained - n1 ** 2 / n) / ((n1 - explained) / (n - 2))
+        continuous = np.random.normal(size=30)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            result = podgor_gastwirth_test(sample_a, sample_b)
+            batch = podgor_gastwirth_test_batch(np.vstack([sample_a, sample_a]), np.vstack([sample_b, continuous]))
+        self.assertAlmostEqual(result.statistic, expected)
+        self.assertAlmostEqual(result.pvalue, f.sf(expected, 1, n - 2))
+        # rows of a batch keep their own degrees of freedom
+        np.testing.assert_allclose(batch.pvalue, [result.pvalue, podgor_gastwirth_test(sample_a, continuous).pvalue])
+
+    def test_constant(self):
+        self.assertRaises(ValueError, podgor_gastwirth_test, np.ones(10), np.ones(8))
+        self.assertRaises(ValueError, podgor_gastwirth_test_batch, np.ones((2, 10)), np.zeros((2, 8)) + 1)
+
+    def test_large_sample(self):
+        sample = np.random.normal(loc=0, scale=1, size=10 ** 6)
+        self.assertAlmostEqual(podgor_gastwirth_test(sample, sample).statistic, 0)
+        result = podgor_gastwirth_test(sample[::2], sample[1::2])
+        self.assertTrue(np.isfinite(result.statistic))
+        self.assertGreaterEqual(result.statistic, 0)
+
+
+class PodgorGastwirthBatch(unittest.TestCase):
+    def test_matches_single(self):
+        sample_a = np.random.randint(0, 20, size=(5, 40))
+        sample_b = np.random.randint(0, 20, size=(5, 30))
+        result = podgor_gastwirth_test_batch(sample_a, sample_b, chunk_size=2)
+        expected = [podgor_gastwirth_test(a, b) for a, b in zip(sample_a, sample_b)]
+        np.testing.assert_allclose(result.statistic, [r.statistic for r in expected])
+        np.testing.assert_allclose(result.pvalue, [r.pvalue for r in expected])
+
+    def test_shape(self):
+        self.assertRaises(ValueError, podgor_gastwirth_test_batch, np.zeros((2, 5)), np.zeros((3, 5)))
+
+
+class PodgorGastwirthCounts(unittest.TestCase):
+    def test_matches_expanded(self):
+        sample_a = np.random.randint(0, 15, size=70)
+        sample_b = np.random.randint(3, 20, size=50)
+        values, counts = np.unique(np.concatenate((sample_a, sample_b)), return_counts=True)
+        counts_a = [np.sum(sample_a == value) for value in values]
+        for ties in ('average', 'min', 'max', 'dense', 'ordinal'):
+            with self.subTest(ties=ties):
+                result = podgor_gastwirth_test_counts(values, counts_a, counts - counts_a, ties=ties)
+                expected = podgor_gastwirth_test(sample_a, sample_b, ties=ties)
+                self.assertAlmostEqual(result.statistic, expected.statistic)
+                self.assertAlmostEqual(result.pvalue, expected.pvalue)
+
+    def test_two_values(self):
+        for ties in ('average', 'ordinal'):
+            with self.subTest(ties=ties):
+                result = podgor_gastwirth_test_counts([0, 1], [25, 15], [10, 20], ties=ties)
+                expected = podgor_gastwirth_test(np.repeat([0, 1], [25, 15]), np.repeat([0, 1], [10, 20]), ties=ties)
+                self.assertAlmostEqual(result.statistic, expected.statistic)
+                self.assertAlmostEqual(result.pvalue, expected.pvalue)
+        self.assertRaises(ValueError, podgor_gastwirth_test_counts, [3, 4], [10, 0], [8, 0])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, podgor_gastwirth_test_counts, [1, 2], [0, 0], [3, 4])
+        self.assertRaises(ValueError, podgor_gastwirth_test_counts, [1, 2], [3, 4], [0, 0])
+        self.assertRaises(ValueError, podgor_gastwirth_test_counts, [1, 2, 3], [1, 1, 0], [0, 0, 1])
+
+
+class Lepage(unittest.TestCase):
+    def test_equal(self):
+        sample_a = sample_b = np.random.normal(loc=0, scale=1, size=100)
+        for method in ('asymptotic', 'permutation'):
+            with self.subTest(method=method):
+                self.assertGreater(lepage_test(sample_a, sample_b, method=method).pvalue, 0.99)
+
+    def test_mean_variance(self):
+        sample_a = np.random.normal(loc=0, scale=1, size=100)
+        sample_b = np.random.normal(loc=10, scale=10, size=100)
+        for method in ('asymptotic', 'permutation'):
+            with self.subTest(method=method):
+                self.assertLess(lepage_test(sample_a, sample_b, method=method).pvalue, 0.001)
+
+    def test_statistic(self):
+        sample_a = np.random.normal(loc=0, scale=1, size=7)
+        sample_b = np.random.normal(loc=0, scale=1, size=9)
+        n1, n2, n = 7, 9, 16
+        ranks = rankdata(np.concatenate((sample_a, sample_b)))[:n1]
+        wilcoxon = (np.sum(ranks) - n1 * (n + 1) / 2) ** 2 / (n1 * n2 * (n + 1) / 12)
+        ansari_bradley = ((np.sum(np.minimum(ranks, n + 1 - ranks)) - n1 * (n + 2) / 4) ** 2
+                          / (n1 * n2 * (n + 2) * (n - 2) / (48 * (n - 1))))
+        self.assertAlmostEqual(_lepage_test_statistic(sample_a, sample_b), wilcoxon + ansari_bradley)
+
+    def test_exact(self):
+        data = np.random.randint(0, 5, size=11).astype(float)
+        for ties in ('average', 'min', 'max', 'dense', 'ordinal'):
+            with self.subTest(ties=ties):
+                observed = _lepage_test_statistic(data[:4], data[4:], ties=ties)
+                statistics = []
+                for subset in itertools.combinations(range(11), 4):
+                    mask = np.isin(np.arange(11), subset)
+                    statistics.append(_lepage_test_statistic(data[mask], data[~mask], ties=ties))
+                self.assertAlmostEqual(lepage_test(data[:4], data[4:], method='exact', ties=ties).pvalue,
+                                       np.mean(np.array(statistics) >= observed - 1e-9))
+
+    def test_auto(self):
+        sample_a = np.random.normal(loc=0, scale=1, size=300)
+        sample_b = np.random.normal(loc=0, scale=1, size=200)
+        self.assertEqual(lepage_test(sample_a, sample_b), lepage_test(sample_a, sample_b, method='asymptotic'))
+        self.assertEqual(lepage_test(sample_a[:10], sample_b[:10]),
+                         lepage_test(sample_a[:10], sample_b[:10], method='exact'))
+        self.assertEqual(lepage_test(sample_a[:60], sample_b[:60], random_state=1),
+                         lepage_test(sample_a[:60], sample_b[:60], method='permutation', random_state=1))
+        self.assertRaises(ValueError, lepage_test, sample_a[:60], sample_b[:60], method='exact')
+
+    def test_random_state(self):
+        sample_a = np.random.randint(0, 10, size=50)
+        sample_b = np.random.randint(0, 12, size=50)
+        for ties in ('average', 'ordinal'):
+            with self.subTest(ties=ties):
+                p_values = [lepage_test(sample_a, sample_b, method='permutation', ties=ties, random_state=123,
+                                        n_jobs=n_jobs).pvalue for n_jobs in (1, 2)]
+                self.assertEqual(p_values[0], p_values[1])
+
+    def test_sequential(self):
+        sample_a = sample_b = np.random.normal(loc=0, scale=1, size=100)
+        result = lepage_test(sample_a, sample_b, method='permutation', replications=100000,
+                             sequential='besag-clifford', random_state=1)
+        self.assertGreater(result.pvalue, 0.9)
+        self.assertLess(result.replications, 100000)
+        self.assertRaises(ValueError, lepage_test, sample_a, sample_b, method='permutation',
+                          sequential='besag-clifford', exceedances=0)
+
+    def test_method(self):
+        sample_a = sample_b = np.random.normal(loc=0, scale=1, size=100)
+        self.assertRaises(ValueError, lepage_test, sample_a, sample_b, method='bootstrap')
+
+
+class LepageBatch(unittest.TestCase):
+    def test_matches_single(self):
+        sample_a = np.random.randint(0, 20, size=(5, 40))
+        sample_b = np.random.randint(0, 20, size=(5, 30))
+        for ties in ('average', 'ordinal'):
+            with self.subTest(ties=ties):
+                result = lepage_test_batch(sample_a, sample_b, ties=ties, chunk_size=2)
+                expected = [lepage_test(a, b, method='asymptotic', ties=ties) for a, b in zip(sample_a, sample_b)]
+                np.testing.assert_allclose(result.statistic, [r.statistic for r in expected])
+                np.testing.assert_allclose(result.pvalue, [r.pvalue for r in expected])
+
+    def test_permutation(self):
+        sample_a = np.random.normal(loc=0, scale=1, size=(3, 60))
+        sample_b = np.random.normal(loc=[[0], [10], [0]], scale=[[1], [1], [10]], size=(3, 50))
+        equal = np.random.normal(loc=0, scale=1, size=10)
+        result = lepage_test_batch(np.vstack([np.repeat(equal, 6), sample_a]),
+                                   np.vstack([np.repeat(equal, 5), sample_b]), method='permutation',
+                                   chunk_size=2, random_state=0)
+        self.assertGreater(result.pvalue[0], 0.9)
+        self.assertTrue(np.all(result.pvalue[2:] < 0.001))
+
+    def test_shape(self):
+        self.assertRaises(ValueError, lepage_test_batch, np.zeros((2, 5)), np.zeros((3, 5)))
+        self.assertRaises(ValueError, lepage_test_batch, np.zeros((2, 5)), np.zeros((2, 5)), method='exact')
+
 
 if __name__ == '__main__':
     unittest.main()
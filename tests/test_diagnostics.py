@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+
+from nonparstat.Cucconi import cucconi_multisample_test, cucconi_test
+from nonparstat.Diagnostics import Diagnostics, register_hook, unregister_hook
+
+
+class CucconiDiagnostics(unittest.TestCase):
+    def setUp(self):
+        self.sample_a = np.random.normal(loc=0, scale=1, size=50)
+        self.sample_b = np.random.normal(loc=0, scale=1.2, size=40)
+
+    def test_disabled(self):
+        result = cucconi_test(self.sample_a, self.sample_b, method='permutation', random_state=0)
+        self.assertIsNone(result.diagnostics)
+        self.assertEqual(result, cucconi_test(self.sample_a, self.sample_b, method='permutation', random_state=0,
+                                              diagnostics=True))
+
+    def test_phases(self):
+        for method in ('bootstrap', 'permutation'):
+            with self.subTest(method=method):
+                result = cucconi_test(self.sample_a, self.sample_b, method=method, replications=500,
+                                      diagnostics=True)
+                diagnostics = result.diagnostics
+                self.assertIsInstance(diagnostics, Diagnostics)
+                self.assertEqual(diagnostics.method, method)
+                self.assertEqual(diagnostics.sizes, (50, 40))
+                self.assertEqual(diagnostics.replications, 500)
+                self.assertEqual(set(diagnostics.phases), {'ranking', 'resampling', 'pvalue'})
+                self.assertGreater(diagnostics.worker_time, 0)
+                self.assertGreater(diagnostics.throughput, 0)
+                self.assertGreaterEqual(diagnostics.dispatch_overhead, 0)
+                self.assertGreaterEqual(diagnostics.total, sum(diagnostics.phases.values()))
+
+    def test_auto(self):
+        result = cucconi_test(self.sample_a, self.sample_b, method='auto', diagnostics=True)
+        self.assertIn(result.diagnostics.method, ('exact', 'asymptotic', 'permutation'))
+
+    def test_sequential(self):
+        result = cucconi_test(self.sample_a, self.sample_b, method='permutation', replications=10000,
+                              sequential='besag-clifford', diagnostics=True)
+        self.assertEqual(result.diagnostics.replications, result.replications)
+
+    def test_progress(self):
+        updates = []
+        result = cucconi_test(self.sample_a, self.sample_b, method='permutation', replications=3000, random_state=0,
+                              progress=lambda done, total: updates.append((done, total)))
+        self.assertEqual(updates[-1], (3000, 3000))
+        self.assertEqual(updates, sorted(updates))
+        self.assertEqual(result.pvalue, cucconi_test(self.sample_a, self.sample_b, method='permutation',
+                                                     replications=3000, random_state=0).pvalue)
+
+    def test_hook(self):
+        collected = []
+        register_hook(collected.append)
+        try:
+            result = cucconi_multisample_test([self.sample_a, self.sample_b, self.sample_a], replications=100)
+        finally:
+            unregister_hook(collected.append)
+        self.assertEqual(collected, [result.diagnostics])
+        self.assertEqual(collected[0].test, 'cucconi_multisample')
+        self.assertIsNone(cucconi_test(self.sample_a, self.sample_b).diagnostics)
+        self.assertEqual(len(collected), 1)
+        self.assertRaises(ValueError, unregister_hook, collected.append)
+
+
+if __name__ == '__main__':
+    unittest.main()
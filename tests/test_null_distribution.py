@@ -0,0 +1,74 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from nonparstat.Cucconi import (cucconi_multisample_null_distribution, cucconi_multisample_test,
+                                cucconi_null_distribution, cucconi_test)
+from nonparstat.NullDistribution import NullDistribution, cached_null_distribution, clear_cache
+
+
+class NullDistributionPvalue(unittest.TestCase):
+    def test_pvalue(self):
+        statistics = np.random.normal(size=1000)
+        null = NullDistribution(statistics)
+        observed = np.array([-5, -0.3, 0, statistics[10], 1.7, 5])
+        expected = [(np.sum(statistics >= x) + 1) / 1001 for x in observed]
+        np.testing.assert_allclose(null.pvalue(observed), expected)
+
+    def test_save_load(self):
+        null = NullDistribution(np.random.normal(size=100))
+        with tempfile.TemporaryDirectory() as directory:
+            null.save(Path(directory) / 'null.npy')
+            loaded = NullDistribution.load(Path(directory) / 'null.npy')
+            self.assertIsInstance(loaded.statistics, np.memmap)
+            np.testing.assert_array_equal(loaded.statistics, null.statistics)
+            del loaded
+
+
+class NullDistributionCache(unittest.TestCase):
+    def setUp(self):
+        clear_cache()
+
+    def test_memory_cache(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return np.arange(10.)
+
+        first = cached_null_distribution(('test', 10), compute)
+        self.assertIs(cached_null_distribution(('test', 10), compute), first)
+        self.assertEqual(len(calls), 1)
+
+    def test_disk_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first = cucconi_null_distribution(10, 12, replications=500, random_state=1, cache_dir=directory)
+            clear_cache()
+            second = cucconi_null_distribution(10, 12, replications=500, random_state=1, cache_dir=directory)
+            self.assertIsInstance(second.statistics, np.memmap)
+            np.testing.assert_array_equal(first.statistics, second.statistics)
+            del second
+
+    def test_cucconi_cache(self):
+        sample_a = np.random.normal(loc=0, scale=1, size=50)
+        sample_b = np.random.normal(loc=0.2, scale=1.3, size=40)
+        for method in ('bootstrap', 'permutation'):
+            with self.subTest(method=method):
+                cached = cucconi_test(sample_a, sample_b, method=method, random_state=3, cache=True)
+                self.assertEqual(cached, cucconi_test(sample_a + 1, sample_b + 1, method=method, random_state=3,
+                                                      cache=True))
+                self.assertEqual(cached.pvalue,
+                                 cucconi_null_distribution(50, 40, method=method, random_state=3).pvalue(
+                                     cached.statistic))
+
+    def test_multisample_cache(self):
+        samples = [np.random.normal(size=n) for n in (20, 30, 25)]
+        cached = cucconi_multisample_test(samples, method='permutation', random_state=3, cache=True)
+        self.assertEqual(cached.pvalue, cucconi_multisample_null_distribution([20, 30, 25], random_state=3).pvalue(
+            cached.statistic))
+
+
+if __name__ == '__main__':
+    unittest.main()
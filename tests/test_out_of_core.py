@@ -0,0 +1,64 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from nonparstat.Cucconi import _cucconi_test_statistic, cucconi_test
+from nonparstat.OutOfCore import _external_sort, cucconi_test_out_of_core
+
+
+class ExternalSort(unittest.TestCase):
+    def test_sort(self):
+        data = np.random.randint(0, 50, size=1000)
+        with tempfile.TemporaryDirectory() as directory:
+            for block in (3, 7, 100, 1000):
+                with self.subTest(block=block):
+                    np.testing.assert_array_equal(_external_sort(data, Path(directory), f'sorted{block}', block),
+                                                  np.sort(data))
+
+    def test_multiple_passes(self):
+        # 400 runs of 25 elements are merged two at a time in 8 passes and a final merge, every merge removes its runs
+        data = np.random.normal(size=10000)
+        with tempfile.TemporaryDirectory() as directory:
+            np.testing.assert_array_equal(_external_sort(data, Path(directory), 'sorted', 25), np.sort(data))
+            self.assertEqual([path.name for path in Path(directory).iterdir()], ['sorted.npy'])
+
+
+class CucconiOutOfCore(unittest.TestCase):
+    def test_statistic(self):
+        sample_a = np.random.randint(0, 30, size=500).astype(float)
+        sample_b = np.random.randint(0, 40, size=400).astype(float)
+        for ties in ('average', 'min', 'max', 'ordinal'):
+            for memory in (256, 1000, 2 ** 20):
+                with self.subTest(ties=ties, memory=memory):
+                    self.assertAlmostEqual(cucconi_test_out_of_core(sample_a, sample_b, ties=ties,
+                                                                    memory=memory).statistic,
+                                           _cucconi_test_statistic(sample_a, sample_b, ties=ties))
+
+    def test_large_ties(self):
+        sample_a = np.zeros(300)
+        sample_b = np.concatenate([np.zeros(200), np.ones(50)])
+        self.assertAlmostEqual(cucconi_test_out_of_core(sample_a, sample_b, memory=256).statistic,
+                               _cucconi_test_statistic(sample_a, sample_b))
+
+    def test_memmap(self):
+        sample_a = np.random.normal(loc=0, scale=1, size=5000)
+        sample_b = np.random.normal(loc=0, scale=1.2, size=4000)
+        with tempfile.TemporaryDirectory() as directory:
+            np.save(Path(directory) / 'a.npy', sample_a)
+            np.save(Path(directory) / 'b.npy', sample_b)
+            result = cucconi_test_out_of_core(Path(directory) / 'a.npy', np.load(Path(directory) / 'b.npy',
+                                                                                 mmap_mode='r'),
+                                              memory=2 ** 15, temporary_directory=directory)
+            self.assertEqual(sorted(path.name for path in Path(directory).iterdir()), ['a.npy', 'b.npy'])
+        expected = cucconi_test(sample_a, sample_b, method='asymptotic')
+        self.assertAlmostEqual(result.statistic, expected.statistic)
+        self.assertAlmostEqual(result.pvalue, expected.pvalue)
+
+    def test_ties_method(self):
+        self.assertRaises(ValueError, cucconi_test_out_of_core, np.zeros(3), np.ones(3), ties='dense')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import itertools
+import unittest
+
+import numpy as np
+
+from nonparstat.Cucconi import cucconi_test
+from nonparstat.Pairwise import _ADJUSTMENTS, cucconi_pairwise
+
+
+class CucconiPairwise(unittest.TestCase):
+    def setUp(self):
+        self.samples = [np.random.normal(loc=0, scale=scale, size=size)
+                        for scale, size in ((1, 30), (1, 40), (5, 30), (1, 30))]
+
+    def test_statistic(self):
+        for ties in ('average', 'ordinal'):
+            samples = [np.round(sample, 1) for sample in self.samples]
+            result = cucconi_pairwise(samples, method='asymptotic', ties=ties, adjustment=None)
+            for i, j in itertools.combinations(range(len(samples)), 2):
+                with self.subTest(ties=ties, pair=(i, j)):
+                    expected = cucconi_test(samples[i], samples[j], method='asymptotic', ties=ties)
+                    self.assertAlmostEqual(result.statistic[i, j], expected.statistic)
+                    self.assertAlmostEqual(result.statistic[j, i], expected.statistic)
+                    self.assertAlmostEqual(result.pvalue[i, j], expected.pvalue)
+            self.assertTrue(np.all(np.isnan(np.diag(result.pvalue))))
+
+    def test_cache(self):
+        result = cucconi_pairwise(self.samples, method='permutation', random_state=3, cache=True)
+        for i, j in itertools.combinations(range(len(self.samples)), 2):
+            with self.subTest(pair=(i, j)):
+                self.assertEqual(result.pvalue[i, j], cucconi_test(self.samples[i], self.samples[j],
+                                                                   method='permutation', random_state=3,
+                                                                   cache=True).pvalue)
+
+    def test_resampled(self):
+        samples = [np.round(sample, 1) for sample in self.samples] + [np.round(self.samples[0], 1)]
+        for method in ('bootstrap', 'permutation'):
+            with self.subTest(method=method):
+                result = cucconi_pairwise(samples, method=method, random_state=1)
+                self.assertGreater(result.pvalue[0, 4], 0.99)
+                self.assertLess(result.adjusted_pvalue[0, 2], 0.05)
+                self.assertTrue(np.all(result.adjusted_pvalue[0, 1:] >= result.pvalue[0, 1:]))
+                np.testing.assert_array_equal(result.pvalue, cucconi_pairwise(samples, method=method,
+                                                                              random_state=1).pvalue)
+
+    def test_adjustments(self):
+        p_values = np.array([0.01, 0.04, 0.03, 0.005])
+        np.testing.assert_allclose(_ADJUSTMENTS['bonferroni'](p_values), [0.04, 0.16, 0.12, 0.02])
+        np.testing.assert_allclose(_ADJUSTMENTS['holm'](p_values), [0.03, 0.06, 0.06, 0.02])
+        np.testing.assert_allclose(_ADJUSTMENTS['benjamini-hochberg'](p_values), [0.02, 0.04, 0.04, 0.02])
+
+    def test_offsets(self):
+        result = cucconi_pairwise(np.concatenate(self.samples), offsets=[0, 30, 70, 100], method='asymptotic')
+        np.testing.assert_array_equal(result.statistic, cucconi_pairwise(self.samples, method='asymptotic').statistic)
+
+    def test_errors(self):
+        self.assertRaises(ValueError, cucconi_pairwise, self.samples, method='exact')
+        self.assertRaises(ValueError, cucconi_pairwise, self.samples, adjustment='sidak')
+        self.assertRaises(ValueError, cucconi_pairwise, self.samples[:1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+import numpy as np
+
+from nonparstat.Cucconi import cucconi_test
+from nonparstat.Lepage import lepage_test
+from nonparstat.Panel import location_scale_panel
+from nonparstat.PodgorGastwirth import podgor_gastwirth_test
+
+
+class LocationScalePanel(unittest.TestCase):
+    def setUp(self):
+        self.sample_a = np.random.normal(loc=0, scale=1, size=60)
+        self.sample_b = np.random.normal(loc=0.2, scale=1.2, size=50)
+
+    def test_statistic(self):
+        result = location_scale_panel(self.sample_a, self.sample_b, replications=10)
+        self.assertEqual(result.tests, ('cucconi', 'lepage', 'podgor_gastwirth'))
+        np.testing.assert_allclose(result.statistic,
+                                   [cucconi_test(self.sample_a, self.sample_b).statistic,
+                                    lepage_test(self.sample_a, self.sample_b).statistic,
+                                    podgor_gastwirth_test(self.sample_a, self.sample_b).statistic])
+
+    def test_shared_permutations(self):
+        result = location_scale_panel(self.sample_a, self.sample_b, tests=['lepage', 'cucconi'], random_state=3)
+        self.assertEqual(result.pvalue[0],
+                         lepage_test(self.sample_a, self.sample_b, method='permutation', random_state=3).pvalue)
+        self.assertEqual(result.pvalue[1],
+                         cucconi_test(self.sample_a, self.sample_b, method='permutation', random_state=3).pvalue)
+
+    def test_ties(self):
+        sample_a = np.random.randint(0, 5, size=40)
+        sample_b = np.random.randint(0, 5, size=30)
+        for ties in ('average', 'ordinal'):
+            with self.subTest(ties=ties):
+                result = location_scale_panel(sample_a, sample_b, tests=['cucconi'], ties=ties, random_state=1)
+                self.assertEqual(result.pvalue[0], cucconi_test(sample_a, sample_b, method='permutation',
+                                                                ties=ties, random_state=1).pvalue)
+
+    def test_adjusted_pvalue(self):
+        result = location_scale_panel(self.sample_a, self.sample_b, random_state=0)
+        self.assertTrue(np.all(result.adjusted_pvalue >= result.pvalue))
+        result = location_scale_panel(self.sample_a, self.sample_a + 10, random_state=0)
+        np.testing.assert_allclose(result.adjusted_pvalue, 1 / 1001)
+
+    def test_tests(self):
+        self.assertRaises(ValueError, location_scale_panel, self.sample_a, self.sample_b, tests=['wilcoxon'])
+        self.assertRaises(ValueError, location_scale_panel, self.sample_a, self.sample_b, tests=[])
+
+
+if __name__ == '__main__':
+    unittest.main()
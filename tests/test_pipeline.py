@@ -0,0 +1,126 @@
+import importlib.util
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import numpy as np
+
+from nonparstat.Cucconi import cucconi_test
+from nonparstat.Lepage import lepage_test
+from nonparstat.PodgorGastwirth import podgor_gastwirth_test
+
+if importlib.util.find_spec('pyarrow') is not None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from nonparstat.Pipeline import _read_groups, compare_groups, main
+
+
+@unittest.skipIf(importlib.util.find_spec('pyarrow') is None, 'pyarrow is not installed')
+class CompareGroups(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name)
+        self.groups = {'a': np.random.normal(loc=0, scale=1, size=40), 'b': np.random.normal(loc=0, scale=1, size=40),
+                       'c': np.random.normal(loc=0, scale=3, size=40), 'd': np.random.normal(loc=1, scale=1, size=30)}
+        labels = np.repeat(list(self.groups), [len(values) for values in self.groups.values()])
+        order = np.random.permutation(len(labels))
+        self.table = pa.table({'group': labels[order],
+                               'value': np.concatenate(list(self.groups.values()))[order]})
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read_groups(self):
+        pq.write_table(self.table, self.path / 'data.parquet', row_group_size=17)
+        groups = _read_groups(self.path / 'data.parquet', 'group', 'value')
+        self.assertEqual(sorted(groups), sorted(self.groups))
+        for label, values in self.groups.items():
+            np.testing.assert_array_equal(np.sort(groups[label]), np.sort(values))
+
+    def test_results(self):
+        pq.write_table(self.table, self.path / 'data.parquet', row_group_size=50)
+        written = compare_groups(self.path / 'data.parquet', self.path / 'results.parquet',
+                                 tests=['cucconi', 'lepage', 'podgor_gastwirth'], batch_size=2)
+        self.assertEqual(written, 6)
+        results = pq.read_table(self.path / 'results.parquet').to_pylist()
+        self.assertEqual(len(results), 6)
+        for row in results:
+            a, b = self.groups[row['group_a']], self.groups[row['group_b']]
+            with self.subTest(pair=(row['group_a'], row['group_b'])):
+                self.assertEqual((row['size_a'], row['size_b']), (len(a), len(b)))
+                expected = cucconi_test(a, b, method='asymptotic')
+                self.assertAlmostEqual(row['cucconi_statistic'], expected.statistic)
+                self.assertAlmostEqual(row['cucconi_pvalue'], expected.pvalue)
+                self.assertAlmostEqual(row['lepage_pvalue'], lepage_test(a, b, method='asymptotic').pvalue)
+                self.assertAlmostEqual(row['podgor_gastwirth_pvalue'], podgor_gastwirth_test(a, b).pvalue)
+
+    def test_arrow(self):
+        with pa.OSFile(str(self.path / 'data.arrow'), 'wb') as sink:
+            with pa.ipc.new_file(sink, self.table.schema) as writer:
+                writer.write_table(self.table, max_chunksize=30)
+        compare_groups(self.path / 'data.arrow', self.path / 'results.arrow', reference='a', method='permutation',
+                       replications=200, random_state=0)
+        with pa.memory_map(str(self.path / 'results.arrow')) as source:
+            results = pa.ipc.open_file(source).read_all()
+        self.assertEqual(sorted(results.column('group_b').to_pylist()), ['b', 'c', 'd'])
+        self.assertTrue(np.all(results.column('cucconi_pvalue').to_numpy() >= 1 / 201))
+
+    def test_pairs(self):
+        pq.write_table(self.table, self.path / 'data.parquet')
+        compare_groups(self.path / 'data.parquet', self.path / 'results.parquet', pairs=[('c', 'a'), ('b', 'd')])
+        results = pq.read_table(self.path / 'results.parquet')
+        self.assertEqual(sorted(zip(results.column('group_a').to_pylist(), results.column('group_b').to_pylist())),
+                         [('b', 'd'), ('c', 'a')])
+        self.assertRaises(ValueError, compare_groups, self.path / 'data.parquet', self.path / 'results.parquet',
+                          pairs=[('a', 'e')])
+        self.assertRaises(ValueError, compare_groups, self.path / 'data.parquet', self.path / 'results.parquet',
+                          pairs=[('a', 'b')], reference='a')
+        self.assertRaises(ValueError, compare_groups, self.path / 'data.parquet', self.path / 'results.parquet',
+                          tests=['wilcoxon'])
+
+    def test_invalid_method(self):
+        pq.write_table(self.table, self.path / 'data.parquet')
+        self.assertRaises(ValueError, compare_groups, self.path / 'data.parquet', self.path / 'results.parquet',
+                          tests=['cucconi', 'lepage'], method='bootstrap')
+        self.assertRaises(ValueError, compare_groups, self.path / 'data.parquet', self.path / 'results.parquet',
+                          method='exact')
+        self.assertFalse((self.path / 'results.parquet').exists())
+
+    def test_failure_keeps_destination(self):
+        pq.write_table(self.table, self.path / 'data.parquet')
+        (self.path / 'results.arrow').write_bytes(b'previous results')
+        # the invalid tie method fails only when the first batch is ranked
+        self.assertRaises(ValueError, compare_groups, self.path / 'data.parquet', self.path / 'results.arrow',
+                          ties='mean')
+        self.assertEqual((self.path / 'results.arrow').read_bytes(), b'previous results')
+        self.assertEqual(sorted(path.name for path in self.path.iterdir()), ['data.parquet', 'results.arrow'])
+
+    def test_read_selected_groups(self):
+        pq.write_table(self.table, self.path / 'data.parquet', row_group_size=17)
+        groups = _read_groups(self.path / 'data.parquet', 'group', 'value', labels={'b', 'd'})
+        self.assertEqual(sorted(groups), ['b', 'd'])
+        np.testing.assert_array_equal(np.sort(groups['d']), np.sort(self.groups['d']))
+
+    def test_missing_values(self):
+        table = pa.table({'group': ['a', 'a', 'b', 'b'], 'value': [1.0, None, 2.0, 3.0]})
+        pq.write_table(table, self.path / 'data.parquet')
+        self.assertRaises(ValueError, compare_groups, self.path / 'data.parquet', self.path / 'results.parquet')
+
+    def test_main(self):
+        table = pa.table({'group': np.repeat([3, 7, 9], 30), 'value': np.random.normal(size=90)})
+        pq.write_table(table, self.path / 'data.parquet')
+        with redirect_stdout(io.StringIO()) as output:
+            main([str(self.path / 'data.parquet'), str(self.path / 'results.parquet'), '--reference', '7',
+                  '--tests', 'cucconi'])
+        self.assertEqual(output.getvalue().split()[0], '2')
+        results = pq.read_table(self.path / 'results.parquet')
+        self.assertEqual(results.column_names, ['group_a', 'group_b', 'size_a', 'size_b', 'cucconi_statistic',
+                                                'cucconi_pvalue'])
+        self.assertEqual(results.column('group_a').to_pylist(), [7, 7])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+import numpy as np
+
+from nonparstat.Power import simulate_power
+
+
+class SimulatePower(unittest.TestCase):
+    def test_size(self):
+        result = simulate_power(tests=['cucconi', 'lepage', 'podgor_gastwirth'], distributions=['normal', 'laplace'],
+                                sizes=[30], simulations=2000, replications=500, random_state=0)
+        self.assertEqual(result.power.shape, (3, 2, 1, 1, 1))
+        # rejection rates under the null hypothesis within four standard errors of the nominal level
+        self.assertTrue(np.all(np.abs(result.power - 0.05) < 4 * np.sqrt(0.05 * 0.95 / 2000)))
+
+    def test_power(self):
+        result = simulate_power(sizes=[20, (30, 40)], shifts=[0, 0.5], scales=[1, 1.5, 3], simulations=500,
+                                method='asymptotic', random_state=1)
+        self.assertEqual(result.power.shape, (2, 1, 2, 2, 3))
+        self.assertEqual(result.sizes, [(20, 20), (30, 40)])
+        self.assertTrue(np.all(np.diff(result.power, axis=-1) >= 0))
+        self.assertTrue(np.all(result.power[..., 1, :] >= result.power[..., 0, :]))
+        self.assertTrue(np.all(result.power[..., 1, 0] > 0.2))
+        np.testing.assert_allclose(result.standard_error, np.sqrt(result.power * (1 - result.power) / 500))
+
+    def test_random_state(self):
+        kwargs = dict(tests=['cucconi', 'lepage'], sizes=[15], shifts=[0, 1], simulations=100, random_state=5)
+        result = simulate_power(**kwargs)
+        np.testing.assert_array_equal(simulate_power(**kwargs).power, result.power)
+        np.testing.assert_array_equal(simulate_power(n_jobs=2, **kwargs).power, result.power)
+        generated = simulate_power(**{**kwargs, 'random_state': np.random.default_rng(5)})
+        self.assertEqual(generated.power.shape, result.power.shape)
+
+    def test_distribution(self):
+        result = simulate_power(distributions=['cauchy', lambda rng, shape: rng.standard_t(3, size=shape)],
+                                sizes=[25], scales=[4], simulations=200, method='asymptotic', random_state=2)
+        self.assertEqual(len(result.distributions), 2)
+        self.assertTrue(np.all(result.power > 0.5))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, simulate_power, tests=['wilcoxon'])
+        self.assertRaises(ValueError, simulate_power, tests=[])
+        self.assertRaises(ValueError, simulate_power, method='bootstrap')
+        self.assertRaises(ValueError, simulate_power, distributions=['gamma'])
+
+
+if __name__ == '__main__':
+    unittest.main()
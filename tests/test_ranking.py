@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+from scipy.stats import rankdata
+
+from nonparstat.Ranking import _frequency_rank_sums, _frequency_ranks, _frequency_table, _rankdata_rows
+
+
+class RankdataRows(unittest.TestCase):
+    def test_matches_rankdata(self):
+        data = np.random.randint(0, 5, size=(40, 13)).astype(float)
+        for method in ('average', 'min', 'max', 'dense', 'ordinal'):
+            with self.subTest(method=method):
+                np.testing.assert_array_equal(_rankdata_rows(data, method=method),
+                                              [rankdata(row, method=method) for row in data])
+
+    def test_nan(self):
+        data = np.random.normal(size=(3, 5))
+        data[1, 2] = np.nan
+        ranked = _rankdata_rows(data)
+        self.assertTrue(np.isnan(ranked[1]).all())
+        np.testing.assert_array_equal(ranked[[0, 2]], [rankdata(data[0]), rankdata(data[2])])
+
+    def test_method(self):
+        self.assertRaises(ValueError, _rankdata_rows, np.zeros((2, 2)), method='mean')
+
+
+class FrequencyRanks(unittest.TestCase):
+    def test_matches_rankdata(self):
+        sample_a = np.random.randint(0, 10, size=30)
+        sample_b = np.random.randint(5, 15, size=20)
+        counts = _frequency_table(np.arange(15), np.bincount(sample_a, minlength=15),
+                                  np.bincount(sample_b, minlength=15))
+        for method in ('average', 'min', 'max', 'dense', 'ordinal'):
+            with self.subTest(method=method):
+                ranked = rankdata(np.concatenate((sample_a, sample_b)), method=method)[:30]
+                ranks = _frequency_ranks(np.sum(counts, axis=0), method=method)
+                np.testing.assert_allclose(_frequency_rank_sums(ranks, counts[0], method=method),
+                                           (np.sum(ranked), np.sum(np.square(ranked))))
+
+    def test_table(self):
+        np.testing.assert_array_equal(_frequency_table([3, 1, 3, 2], [1, 2, 3, 0], [0, 1, 1, 0]), [[2, 4], [1, 1]])
+        self.assertRaises(ValueError, _frequency_table, [1, 2], [1, 2], [1, 2, 3])
+        self.assertRaises(ValueError, _frequency_table, [1, 2], [0, 0], [1, 2])
+        self.assertRaises(ValueError, _frequency_ranks, [1, 2], method='mean')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import asyncio
+import unittest
+
+import numpy as np
+
+from nonparstat.Cucconi import cucconi_multisample_test, cucconi_test
+from nonparstat.Session import TestSession
+
+
+class Session(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.session = TestSession(n_jobs=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.session.close()
+
+    def setUp(self):
+        self.sample_a = np.random.normal(loc=0, scale=1, size=60)
+        self.sample_b = np.random.normal(loc=0, scale=1.3, size=50)
+
+    def test_cucconi(self):
+        for method in ('bootstrap', 'permutation'):
+            for ties in ('average', 'ordinal'):
+                a, b = np.round(self.sample_a, 1), np.round(self.sample_b, 1)
+                with self.subTest(method=method, ties=ties):
+                    self.assertEqual(self.session.cucconi(a, b, method=method, ties=ties, random_state=4),
+                                     cucconi_test(a, b, method=method, ties=ties, random_state=4))
+
+    def test_analytic(self):
+        for method in ('asymptotic', 'exact', 'auto'):
+            with self.subTest(method=method):
+                self.assertEqual(self.session.cucconi(self.sample_a[:8], self.sample_b[:7], method=method),
+                                 cucconi_test(self.sample_a[:8], self.sample_b[:7], method=method))
+        self.assertRaises(ValueError, self.session.cucconi, self.sample_a, self.sample_b, method='normal')
+
+    def test_sequential(self):
+        result = self.session.cucconi(self.sample_a, self.sample_a, method='permutation', replications=100000,
+                                      sequential='besag-clifford', random_state=2)
+        expected = cucconi_test(self.sample_a, self.sample_a, method='permutation', replications=100000,
+                                sequential='besag-clifford', random_state=2)
+        self.assertEqual(result, expected)
+        self.assertEqual(result.replications, expected.replications)
+
+    def test_multisample(self):
+        samples = [self.sample_a, self.sample_b, self.sample_a[:20]]
+        for method in ('bootstrap', 'permutation', 'asymptotic'):
+            with self.subTest(method=method):
+                expected = cucconi_multisample_test(samples, method=method, random_state=7)
+                self.assertEqual(self.session.cucconi_multisample(samples, method=method, random_state=7), expected)
+                self.assertEqual(self.session.cucconi_multisample(np.concatenate(samples), offsets=[0, 60, 110],
+                                                                  method=method, random_state=7), expected)
+
+    def test_async(self):
+        pairs = [(self.sample_a, self.sample_b * scale) for scale in (1, 2, 3, 4)]
+
+        async def run():
+            return await asyncio.gather(*[self.session.cucconi_async(a, b, method='permutation', random_state=1)
+                                          for a, b in pairs],
+                                        self.session.cucconi_multisample_async(pairs[0], random_state=1))
+
+        results = asyncio.run(run())
+        self.assertEqual(results[:4], [cucconi_test(a, b, method='permutation', random_state=1) for a, b in pairs])
+        self.assertEqual(results[4], cucconi_multisample_test(pairs[0], random_state=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
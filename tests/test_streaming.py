@@ -0,0 +1,73 @@
+import unittest
+
+import numpy as np
+
+from nonparstat.Cucconi import _cucconi_test_statistic, cucconi_null_distribution, cucconi_test
+from nonparstat.Streaming import CucconiStream
+
+
+class CucconiStreamUpdates(unittest.TestCase):
+    def test_statistic(self):
+        for ties in ('average', 'min', 'max'):
+            with self.subTest(ties=ties):
+                sample_a = list(np.random.randint(0, 20, size=30).astype(float))
+                sample_b = list(np.random.randint(0, 20, size=25).astype(float))
+                stream = CucconiStream(sample_a, sample_b, ties=ties)
+                for _ in range(200):
+                    sample = np.random.choice(['a', 'b'])
+                    window = sample_a if sample == 'a' else sample_b
+                    if np.random.rand() < 0.5 and len(window) > 2:
+                        value = window[np.random.randint(len(window))]
+                        stream.evict(value, sample)
+                        window.remove(value)
+                    else:
+                        value = float(np.random.randint(0, 25))
+                        stream.push(value, sample)
+                        window.append(value)
+                    self.assertAlmostEqual(stream.statistic,
+                                           _cucconi_test_statistic(np.array(sample_a), np.array(sample_b), ties=ties))
+                self.assertEqual(stream.sizes, (len(sample_a), len(sample_b)))
+
+    def test_sliding_window(self):
+        reference = np.random.normal(loc=0, scale=1, size=200)
+        live = np.random.normal(loc=0, scale=1, size=300)
+        stream = CucconiStream(reference, live[:100])
+        for value in live[100:]:
+            stream.evict(stream.oldest('b'), 'b')
+            stream.push(value, 'b')
+        self.assertAlmostEqual(stream.statistic, _cucconi_test_statistic(reference, live[-100:]))
+
+    def test_empty(self):
+        stream = CucconiStream()
+        self.assertEqual(len(stream), 0)
+        self.assertTrue(np.isnan(stream.statistic))
+        stream.push([1.0, 2.0], 'a')
+        stream.push(3.0)
+        self.assertAlmostEqual(stream.statistic, _cucconi_test_statistic(np.array([1.0, 2.0]), np.array([3.0])))
+
+    def test_errors(self):
+        stream = CucconiStream([1.0, 2.0], [3.0])
+        self.assertRaises(ValueError, stream.evict, 1.0, 'b')
+        self.assertRaises(ValueError, stream.evict, 5.0, 'a')
+        self.assertRaises(ValueError, stream.push, 1.0, 'c')
+        self.assertRaises(ValueError, CucconiStream, ties='ordinal')
+
+
+class CucconiStreamTest(unittest.TestCase):
+    def setUp(self):
+        self.sample_a = np.random.normal(loc=0, scale=1, size=40)
+        self.sample_b = np.random.normal(loc=0, scale=2, size=30)
+        self.stream = CucconiStream(self.sample_a, self.sample_b)
+
+    def test_asymptotic(self):
+        self.assertAlmostEqual(self.stream.test().pvalue,
+                               cucconi_test(self.sample_a, self.sample_b, method='asymptotic').pvalue)
+
+    def test_cached_null(self):
+        result = self.stream.test(method='permutation', random_state=1)
+        self.assertEqual(result.pvalue, cucconi_null_distribution(40, 30, random_state=1).pvalue(result.statistic))
+        self.assertRaises(ValueError, self.stream.test, method='exact')
+
+
+if __name__ == '__main__':
+    unittest.main()